@@ -1,9 +1,32 @@
+"""
+Ядро игры морской бой: точки, корабли, доски (Board, BitBoard), игроки,
+простые стратегии компьютера, расстановка флота, партия Game и пакетное
+моделирование партий. Остальное вынесено в отдельные модули:
+strategies (стратегии на numpy и точный решатель), records (двоичные
+записи и сохранённые партии), server (TCP-сервер), env (BatchGame
+и среды для обучения).
+"""
+
+import random
+import sys
 import time
-from random import randint, choice
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+# numpy, shutil, пул процессов и модули strategies, records, server и env импортируются
+# при первом использовании, чтобы импорт модуля занимал миллисекунды (см. load_numpy()).
+np = None
 
 # Последовательность букв латинского алфавита для координат оси x.
 L_R = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 
+# Состав флота по умолчанию: длины кораблей в клетках.
+FLEET = (4, 3, 3, 2, 2, 2, 1, 1, 1, 1)
+
+# Наибольшее число шагов перебора расстановок флота (см. search_fleet()).
+SEARCH_BUDGET = 200000
+
 
 class Color:
     """
@@ -19,11 +42,83 @@ class Color:
     violet = '\033[1;35m'
 
 
-# функция, которая окрашивает объект в заданный цвет.
+# функция, которая окрашивает объект в заданный цвет (одинаковые строки берутся из кэша).
+@lru_cache(maxsize=256)
 def set_color(obj, color):
     return color + obj + Color.reset
 
 
+class Cell:
+    """
+    Класс Cell задаёт коды состояний клеток игрового поля.
+    Доска хранит только эти коды, а символы для вывода в консоль
+    берутся из GLYPHS при отрисовке.
+    """
+    empty = 0
+    ship = 1
+    miss = 2
+    hit = 3
+    contour = 4
+
+
+class Seen:
+    """
+    Класс Seen задаёт коды клеток поля противника так, как их видит
+    стреляющий: корабли, по которым не стреляли, не отличаются
+    от пустых клеток (см. Board.view).
+    """
+    unknown = 0
+    miss = 1
+    hit = 2
+    sunk = 3
+    contour = 4
+
+
+# Символы клеток для вывода в консоль: открытое поле и поле со скрытыми кораблями.
+GLYPHS = {
+    False: ("0", set_color("■", Color.yellow), ".", set_color("X", Color.red), "."),
+    True: ("0", "0", ".", set_color("X", Color.red), "."),
+}
+
+
+@lru_cache(maxsize=4096)
+def render_row(x, row, hid):
+    """
+    Строка игрового поля для вывода в консоль. Строки с одинаковым
+    содержимым отрисовываются один раз и берутся из кэша.
+
+    :param x: int Номер строки поля.
+    :param row: bytes Коды состояний клеток строки.
+    :param hid: bool Скрывать ли корабли.
+    :return: str
+    """
+
+    glyphs = GLYPHS[hid]
+    return f"{L_R[x + 1]} | " + " | ".join(glyphs[c] for c in row) + " |"
+
+
+@lru_cache(maxsize=None)
+def board_header(size):
+    """
+    Строка с номерами столбцов игрового поля. Ширина каждого столбца
+    совпадает с шириной клетки в render_row().
+
+    :param size: int Размер игрового поля.
+    :return: str
+    """
+
+    return "  |" + "".join(f" {y:<2}|" for y in range(1, size + 1))
+
+
+class Shot:
+    """
+    Класс Shot задаёт коды результатов выстрела.
+    """
+    miss = 0
+    hit = 1
+    sunk = 2
+
+
 # Создадим собственный класс исключений.
 class BoardException(Exception):
     pass
@@ -44,9 +139,19 @@ class BoardWrongShipException(BoardException):
     pass
 
 
+# Перебор расстановок флота (search_fleet()) не уложился в отведённое число шагов:
+# неизвестно, можно ли расставить флот.
+class FleetSearchException(BoardWrongShipException):
+    pass
+
+
 class Dot:
     """
     Класс Dot используется для описания точек на игровом поле.
+    Точки неизменяемы и хешируемы, поэтому их можно хранить в множествах
+    и использовать как ключи словарей. Точки в пределах максимального
+    игрового поля создаются один раз: повторный вызов Dot(x, y)
+    возвращает тот же объект.
 
     Attributes
     ----------
@@ -61,21 +166,45 @@ class Dot:
         Сравнивает объекты класса Dot,
         выводит булевое значение равенства.
 
+    __hash__()
+        Хеш точки, согласованный с __eq__().
+
     __repr__()
         Выводит в консоль информацию об объекте класса Dot
         в виде кода создания этого объекта.
     """
 
-    def __init__(self, x, y):
+    __slots__ = ("x", "y", "_hash")
+
+    # Кэш уже созданных точек, ключ - пара координат.
+    _cache = {}
+
+    def __new__(cls, x, y):
         """
-        Устанавливает все необходимые атрибуты для объекта Dot.
+        Возвращает точку с координатами (x, y). Точки в диапазоне от -1
+        до len(L_R) - 1 (поле максимального размера вместе с соседними
+        клетками за его краем) берутся из кэша.
 
         :param x: (int) координата по оси х
         :param y: (int) координата по оси Y
         """
 
-        self.x = x
-        self.y = y
+        d = cls._cache.get((x, y))
+        if d is None:
+            d = object.__new__(cls)
+            object.__setattr__(d, "x", x)
+            object.__setattr__(d, "y", y)
+            object.__setattr__(d, "_hash", hash((x, y)))
+            if -1 <= x < len(L_R) and -1 <= y < len(L_R):
+                cls._cache[(x, y)] = d
+        return d
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Точка Dot неизменяема")
+
+    def __reduce__(self):
+        # при копировании и передаче между процессами точка создаётся заново через кэш.
+        return Dot, (self.x, self.y)
 
     def __eq__(self, other):
         """
@@ -87,8 +216,19 @@ class Dot:
         :return: bool значение равенства объектов
         """
 
+        if self is other:
+            return True
+        if not isinstance(other, Dot):
+            return NotImplemented
         return self.x == other.x and self.y == other.y
 
+    def __hash__(self):
+        """
+        :return: int хеш пары координат точки
+        """
+
+        return self._hash
+
     def __repr__(self):
         """
         Выводит в консоль информацию об объекте класса Dot
@@ -100,6 +240,129 @@ class Dot:
         return f"Dot({self.x}, {self.y})"
 
 
+# Таблицы точек для каждого размера игрового поля.
+_dot_tables = {}
+
+
+def dot_table(size):
+    """
+    Таблица точек игрового поля заданного размера: dot_table(size)[x][y]
+    возвращает ту же точку, что и Dot(x, y), но без поиска в кэше.
+    Таблица строится один раз и общая для всех досок этого размера.
+
+    :param size: int Размер игрового поля.
+    :return: tuple[tuple[Dot, ...], ...]
+    """
+
+    table = _dot_tables.get(size)
+    if table is None:
+        table = tuple(tuple(Dot(x, y) for y in range(size)) for x in range(size))
+        _dot_tables[size] = table
+    return table
+
+
+class CellSet:
+    """
+    Множество точек с доступом по индексу. Добавление, удаление и проверка
+    принадлежности работают за O(1), а индексация позволяет выбирать
+    случайную точку через random.choice() без копирования в список.
+    Порядок элементов не сохраняется: при удалении на место удалённой
+    точки переносится последняя.
+
+    Attributes
+    ----------
+    items : list
+        Точки множества.
+
+    pos : dict
+        Словарь точка -> индекс в списке items.
+    """
+
+    __slots__ = ("items", "pos")
+
+    def __init__(self, dots=()):
+        """
+        :param dots: iterable Начальный набор точек.
+        """
+
+        self.items = list(dict.fromkeys(dots))
+        self.pos = {d: i for i, d in enumerate(self.items)}
+
+    def add(self, d):
+        if d not in self.pos:
+            self.pos[d] = len(self.items)
+            self.items.append(d)
+
+    def discard(self, d):
+        i = self.pos.pop(d, None)
+        if i is not None:
+            last = self.items.pop()
+            if i < len(self.items):
+                self.items[i] = last
+                self.pos[last] = i
+
+    def __contains__(self, d):
+        return d in self.pos
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __repr__(self):
+        return f"CellSet({self.items})"
+
+
+class CellGrid(CellSet):
+    """
+    CellSet для точек игрового поля размера size: индекс точки в items
+    хранится в списке pos по номеру клетки x * size + y, а не в словаре.
+    Список выделяется один раз на доску, занимает в несколько раз меньше
+    памяти и не вычисляет хеши точек.
+    """
+
+    __slots__ = ("size",)
+
+    def __init__(self, size, dots=None):
+        """
+        :param size: int Размер игрового поля.
+        :param dots: iterable Начальный набор точек (None - все точки поля).
+        """
+
+        self.size = size
+        self.items = list(dots) if dots is not None else [d for row in dot_table(size) for d in row]
+        self.pos = [-1] * (size * size)
+        for i, d in enumerate(self.items):
+            self.pos[d.x * size + d.y] = i
+
+    def add(self, d):
+        j = d.x * self.size + d.y
+        if self.pos[j] < 0:
+            self.pos[j] = len(self.items)
+            self.items.append(d)
+
+    def discard(self, d):
+        j = d.x * self.size + d.y
+        i = self.pos[j]
+        if i >= 0:
+            self.pos[j] = -1
+            last = self.items.pop()
+            if i < len(self.items):
+                self.items[i] = last
+                self.pos[last.x * self.size + last.y] = i
+
+    def __contains__(self, d):
+        size = self.size
+        return 0 <= d.x < size and 0 <= d.y < size and self.pos[d.x * size + d.y] >= 0
+
+    def __repr__(self):
+        return f"CellGrid({self.size}, {self.items})"
+
+
 class Ship:
     """
     Класс Ship используется для описания корабля на игровом поле.
@@ -121,14 +384,19 @@ class Ship:
 
     Methods
     -------
-    dots()
-        Создаёт описание корабля в виде списка точек игрового поля
-        на которых расположен корабль
+    dots
+        Описание корабля в виде кортежа точек игрового поля
+        на которых расположен корабль (вычисляется один раз).
+
+    build_dots()
+        Создаёт описание корабля в виде кортежа точек игрового поля.
 
     hits()
         Делает проверку есть ли попадание выстрела по кораблю.
     """
 
+    __slots__ = ("bow", "len_", "ori", "lives", "_dots")
+
     def __init__(self, bow, len_, ori):
         """
         Устанавливает все необходимые атрибуты для объекта Ship.
@@ -149,15 +417,26 @@ class Ship:
         self.len_ = len_
         self.ori = ori
         self.lives = len_
+        self._dots = self.build_dots()
 
     @property
     def dots(self):
         """
-        Создаёт описание корабля в виде списка точек игрового поля
-        на которых расположен корабль, по сути является свойством
-        поэтому декорируется <@property>.
+        Описание корабля в виде точек игрового поля на которых
+        расположен корабль. Точки вычисляются один раз при создании
+        корабля, свойство лишь возвращает готовый кортеж.
+
+        :return: tuple(Dot(x, y), ..., Dot(xi, yi))
+        """
+
+        return self._dots
+
+    def build_dots(self):
+        """
+        Создаёт описание корабля в виде кортежа точек игрового поля
+        на которых расположен корабль.
 
-        :return: list[Dot(x, y), ..., Dot(xi, yi)]
+        :return: tuple(Dot(x, y), ..., Dot(xi, yi))
         """
 
         ship_dots = []
@@ -181,7 +460,7 @@ class Ship:
 
             ship_dots.append(Dot(cur_x, cur_y))
 
-        return ship_dots
+        return tuple(ship_dots)
 
     def hits(self, shot):
         """
@@ -195,6 +474,500 @@ class Ship:
         return shot in self.dots
 
 
+# Таблицы положений кораблей для каждой пары (размер поля, длина корабля).
+_slot_tables = {}
+
+
+def ship_slots(size, len_):
+    """
+    Все положения корабля длины len_, целиком лежащие на игровом поле.
+    Корабли направлены вниз (ori = 0) или вправо (ori = 2), поэтому каждое
+    положение встречается ровно один раз. Таблица строится один раз
+    для каждой пары (size, len_).
+
+    :param size: int Размер игрового поля.
+    :param len_: int Длина корабля.
+    :return: tuple(slots, by_cell) - кортеж положений (bow, ori, dots)
+             и словарь точка -> номера положений, которые её занимают.
+    """
+
+    key = (size, len_)
+    if key not in _slot_tables:
+        table = dot_table(size)
+        oris = (0,) if len_ == 1 else (0, 2)
+        slots = []
+        for ori in oris:
+            for x in range(size - len_ + 1 if ori == 0 else size):
+                for y in range(size - len_ + 1 if ori == 2 else size):
+                    ship = Ship(table[x][y], len_, ori)
+                    slots.append((ship.bow, ori, ship.dots))
+
+        by_cell = {}
+        for i, (bow, ori, dots) in enumerate(slots):
+            for d in dots:
+                by_cell.setdefault(d, []).append(i)
+
+        _slot_tables[key] = (tuple(slots), by_cell)
+    return _slot_tables[key]
+
+
+# Таблицы пересечений положений кораблей, ключ - (размер поля, длина, другая длина).
+_conflict_tables = {}
+
+
+def slot_conflicts(size, len_, other):
+    """
+    Для каждого положения корабля длины len_ строит битовую маску положений
+    корабля длины other, которые задевают этот корабль или его контур.
+    Номер бита совпадает с номером положения в ship_slots(size, other).
+
+    :param size: int Размер игрового поля.
+    :param len_: int Длина размещаемого корабля.
+    :param other: int Длина корабля, положения которого проверяются.
+    :return: tuple[int] маски конфликтующих положений.
+    """
+
+    key = (size, len_, other)
+    if key not in _conflict_tables:
+        near = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 0), (0, 1), (1, -1), (1, 0), (1, 1)]
+        by_cell = ship_slots(size, other)[1]
+
+        masks = []
+        for bow, ori, dots in ship_slots(size, len_)[0]:
+            mask = 0
+            for d in {Dot(d.x + dx, d.y + dy) for d in dots for dx, dy in near}:
+                for i in by_cell.get(d, ()):
+                    mask |= 1 << i
+            masks.append(mask)
+
+        _conflict_tables[key] = tuple(masks)
+    return _conflict_tables[key]
+
+
+# Маски положений по клеткам, ключ - (размер поля, длина корабля).
+_cell_mask_tables = {}
+
+
+def cell_slot_masks(size, len_):
+    """
+    Для каждой клетки поля строит битовую маску положений корабля длины
+    len_, которые её занимают. Клетка (x, y) хранится под индексом
+    x * size + y, номер бита совпадает с номером положения в ship_slots().
+
+    :param size: int Размер игрового поля.
+    :param len_: int Длина корабля.
+    :return: tuple[int] маски положений для каждой клетки.
+    """
+
+    key = (size, len_)
+    if key not in _cell_mask_tables:
+        masks = [0] * (size * size)
+        for d, slots in ship_slots(size, len_)[1].items():
+            for i in slots:
+                masks[d.x * size + d.y] |= 1 << i
+        _cell_mask_tables[key] = tuple(masks)
+    return _cell_mask_tables[key]
+
+
+# Маски клеток положений кораблей с контуром, ключ - (размер поля, длина корабля).
+_contour_tables = {}
+
+
+def slot_contours(size, len_):
+    """
+    Для каждого положения корабля длины len_ строит маску клеток корабля
+    и маску клеток корабля вместе с контуром (соседние клетки, включая
+    диагональные, в пределах поля) - те же клетки, что помечает Board.contour().
+    Клетка (x, y) соответствует биту x * size + y.
+
+    :param size: int Размер игрового поля.
+    :param len_: int Длина корабля.
+    :return: tuple[(ship_mask, near_mask)] в порядке ship_slots(size, len_).
+    """
+
+    key = (size, len_)
+    if key not in _contour_tables:
+        res = []
+        for bow, ori, dots in ship_slots(size, len_)[0]:
+            ship = near = 0
+            for d in dots:
+                ship |= 1 << d.x * size + d.y
+                for x in range(max(d.x - 1, 0), min(d.x + 2, size)):
+                    for y in range(max(d.y - 1, 0), min(d.y + 2, size)):
+                        near |= 1 << x * size + y
+            res.append((ship, near))
+        _contour_tables[key] = tuple(res)
+    return _contour_tables[key]
+
+
+# Таблицы контуров кораблей, ключ - (размер поля, длина корабля).
+_ship_contour_tables = {}
+
+
+def ship_contour(size, ship):
+    """
+    Клетки корабля вместе с контуром в пределах поля. Таблица строится
+    один раз для каждой пары (size, len_) по slot_contours() и общая
+    для всех досок этого размера; корабли, направленные вверх и влево
+    (ori = 1 и ori = 3), находятся по тому же положению, что и
+    направленные вниз и вправо.
+
+    :param size: int Размер игрового поля.
+    :param ship: Объект класса Ship, целиком лежащий на поле.
+    :return: tuple(dots, ship_mask, near_mask) - точки корабля с контуром
+             и маски из slot_contours().
+    """
+
+    key = (size, ship.len_)
+    table = _ship_contour_tables.get(key)
+    if table is None:
+        table = {}
+        box = neighbours(size)[1]
+        for (bow, ori, ship_dots), (ship_mask, near_mask) in zip(ship_slots(size, ship.len_)[0],
+                                                                 slot_contours(size, ship.len_)):
+            first, last = ship_dots[0], ship_dots[-1]
+            keys = [(first, o) for o in range(4)] if ship.len_ == 1 else [(first, ori), (last, ori + 1)]
+            for k in keys:
+                # точки идут в том же порядке, что и при обходе соседей каждой клетки корабля.
+                dots = dict.fromkeys(c for d in Ship(k[0], ship.len_, k[1]).dots for c in box[d.x * size + d.y])
+                table[k] = (tuple(dots), ship_mask, near_mask)
+        _ship_contour_tables[key] = table
+    return table[ship.bow, ship.ori]
+
+
+# Таблицы соседей клеток для каждого размера игрового поля.
+_neighbour_tables = {}
+
+
+def neighbours(size):
+    """
+    Соседи клеток игрового поля заданного размера. Для клетки (x, y)
+    под индексом x * size + y хранятся точки в пределах поля, поэтому
+    при обходе соседей не нужны проверки границ и новые точки.
+    Таблица строится один раз и общая для всех досок этого размера.
+
+    :param size: int Размер игрового поля.
+    :return: tuple(cross, box) - cross[i] соседи по стороне,
+             box[i] квадрат 3 x 3 вокруг клетки вместе с ней самой.
+    """
+
+    tables = _neighbour_tables.get(size)
+    if tables is None:
+        dots = dot_table(size)
+        cross, box = [], []
+        for x in range(size):
+            for y in range(size):
+                cross.append(tuple(
+                    dots[i][j] for i, j in ((x - 1, y), (x, y - 1), (x, y + 1), (x + 1, y))
+                    if 0 <= i < size and 0 <= j < size
+                ))
+                box.append(tuple(
+                    dots[i][j] for i in range(max(x - 1, 0), min(x + 2, size))
+                    for j in range(max(y - 1, 0), min(y + 2, size))
+                ))
+        tables = (tuple(cross), tuple(box))
+        _neighbour_tables[size] = tables
+    return tables
+
+
+# Записи журнала Board.history о промахах: таблицы по размеру поля.
+_miss_tables = {}
+
+
+def miss_entries(size):
+    """
+    Готовые записи журнала Board.history о промахе для каждой клетки поля.
+    Запись промаха зависит только от клетки и от того, была ли она точкой
+    прицеливания, поэтому кортежи создаются один раз и общие для всех
+    досок этого размера, а выстрел мимо не создаёт новых объектов.
+
+    :param size: int Размер игрового поля.
+    :return: tuple(plain, target) - записи по индексу x * size + y для
+             клетки вне набора targets и в нём.
+    """
+
+    tables = _miss_tables.get(size)
+    if tables is None:
+        dots = [d for row in dot_table(size) for d in row]
+        tables = (tuple((d, None, False, None, None) for d in dots), tuple((d, None, True, None, None) for d in dots))
+        _miss_tables[size] = tables
+    return tables
+
+
+# функция, которая находит номер n-го (с нуля) установленного бита маски.
+def nth_bit(mask, n):
+    lo, hi = 0, mask.bit_length() - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if (mask & ((2 << mid) - 1)).bit_count() > n:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def place_fleet(size, lens, rng=None):
+    """
+    Конструктивная расстановка флота. Свободные положения кораблей каждой
+    длины хранятся битовой маской. Для каждого корабля (от длинных
+    к коротким) выбирается случайное свободное положение, после чего
+    из масок убираются все положения, задевающие корабль или его контур
+    (см. slot_conflicts()). Занятость не проверяется повторно, а исключения
+    не используются: если для очередного корабля не осталось положений,
+    функция сразу возвращает None.
+
+    :param size: int Размер игрового поля.
+    :param lens: list Список длин кораблей.
+    :param rng: random.Random Генератор случайных чисел.
+    :return: list[Ship] или None, если флот не удалось расставить.
+    """
+
+    slots = fleet_slots(size, lens, rng)
+    if slots is None:
+        return None
+
+    ships = []
+    for len_, i in zip(sorted(lens, reverse=True), slots):
+        bow, ori, dots = ship_slots(size, len_)[0][i]
+        ships.append(Ship(bow, len_, ori))
+    return ships
+
+
+def random_fleet(size, lens, rng, attempts=1000):
+    """
+    Случайная допустимая расстановка флота: до attempts попыток
+    place_fleet(), а если флот слишком плотный и все они зашли в тупик -
+    известная расстановка fleet_layout(), перемешанная shuffle_fleet().
+
+    :param size: int Размер игрового поля.
+    :param lens: list Список длин кораблей.
+    :param rng: random.Random Генератор случайных чисел.
+    :param attempts: int Количество попыток place_fleet().
+    :return: list[Ship]
+    """
+
+    for _ in range(attempts):
+        ships = place_fleet(size, lens, rng)
+        if ships is not None:
+            return ships
+
+    layout = fleet_layout(size, lens)
+    if layout is None:
+        raise BoardWrongShipException(f"Флот {list(lens)} нельзя расставить на поле {size} x {size}")
+    return [Ship(bow, len_, ori) for bow, len_, ori in shuffle_fleet(size, layout, rng)]
+
+
+def shuffle_fleet(size, layout, rng, moves=None):
+    """
+    Перемешивает допустимую расстановку флота: поворачивает или отражает
+    поле (одна из 8 симметрий квадрата), затем moves раз переносит
+    случайный корабль в случайное положение, не задевающее остальные
+    корабли и их контур (текущее положение тоже допустимо, поэтому перенос
+    всегда удаётся). Расстановки получаются не равновероятными, зато
+    за полиномиальное время даже для самого плотного флота.
+
+    :param size: int Размер игрового поля.
+    :param layout: list[(bow, len_, ori)] Допустимая расстановка.
+    :param rng: random.Random Генератор случайных чисел.
+    :param moves: int Количество переносов (None - четыре на корабль).
+    :return: list[(bow, len_, ori)]
+    """
+
+    n = size - 1
+    flip, swap = rng.randrange(4), rng.randrange(2)
+    fleet = []
+    for bow, len_, ori in layout:
+        dots = []
+        for d in Ship(bow, len_, ori).dots:
+            x, y = (n - d.x if flip & 1 else d.x), (n - d.y if flip & 2 else d.y)
+            dots.append((y, x) if swap else (x, y))
+        x, y = min(dots)
+        ori = 0 if len_ == 1 or dots[0][1] == dots[-1][1] else 2
+        index = {(b.x, b.y, o): i for i, (b, o, _) in enumerate(ship_slots(size, len_)[0])}
+        fleet.append([len_, index[x, y, ori]])
+
+    for _ in range(len(fleet) * 4 if moves is None else moves):
+        j = rng.randrange(len(fleet))
+        len_ = fleet[j][0]
+        free = (1 << len(ship_slots(size, len_)[0])) - 1
+        for k, (other, i) in enumerate(fleet):
+            if k != j:
+                free &= ~slot_conflicts(size, other, len_)[i]
+        fleet[j][1] = nth_bit(free, rng.randrange(free.bit_count()))
+
+    table = dot_table(size)
+    res = []
+    for len_, i in fleet:
+        bow, ori, _ = ship_slots(size, len_)[0][i]
+        res.append((table[bow.x][bow.y], len_, ori))
+    return res
+
+
+def fleet_slots(size, lens, rng=None):
+    """
+    Расстановка флота так же, как в place_fleet(), но в виде номеров
+    положений кораблей в ship_slots(size, len_) (корабли от длинных
+    к коротким) - без создания объектов Ship.
+
+    :param size: int Размер игрового поля.
+    :param lens: list Список длин кораблей.
+    :param rng: random.Random Генератор случайных чисел.
+    :return: list[int] или None, если флот не удалось расставить.
+    """
+
+    if rng is None:
+        rng = random.Random()
+
+    free = {len_: (1 << len(ship_slots(size, len_)[0])) - 1 for len_ in set(lens)}
+
+    slots = []
+    for len_ in sorted(lens, reverse=True):
+        mask = free[len_]
+        if not mask:
+            return None
+
+        i = nth_bit(mask, rng.randrange(mask.bit_count()))
+        slots.append(i)
+
+        for other in free:
+            free[other] &= ~slot_conflicts(size, len_, other)[i]
+
+    return slots
+
+
+def fleet_layout(size, lens, rng=None, budget=SEARCH_BUDGET):
+    """
+    Проверяет, что флот можно расставить на поле, и возвращает одну
+    допустимую расстановку. Сначала проверяются необходимые условия:
+    корабль помещается в строку, корабли вместе с контуром справа
+    и снизу (прямоугольник (len_ + 1) x 2) помещаются в поле (size + 1) x (size + 1),
+    а клетки разных кораблей не попадают в один квадрат 2 x 2 разбиения
+    поля: корабль длины len_ задевает не меньше ceil(len_ / 2) из
+    ceil(size / 2) ** 2 квадратов (поэтому однопалубных кораблей не больше
+    ceil(size / 2) ** 2). Если rng не задан, корабли сначала укладываются
+    по строкам через одну от длинных к коротким. Если это не удалось,
+    расстановка ищется перебором с возвратами (см. search_fleet()), поэтому
+    ответ None означает, что флот расставить нельзя.
+
+    :param size: int Размер игрового поля.
+    :param lens: list Список длин кораблей.
+    :param rng: random.Random Генератор случайных чисел: если задан, перебор
+                идёт в случайном порядке и возвращает случайную расстановку.
+    :param budget: int Наибольшее число шагов перебора.
+    :return: list[(bow, len_, ori)] или None, если флот расставить нельзя.
+    :raises FleetSearchException: перебор не уложился в budget шагов.
+    """
+
+    if not lens or min(lens) < 1 or max(lens) > size:
+        return None
+    if sum((len_ + 1) * 2 for len_ in lens) > (size + 1) ** 2:
+        return None
+    if sum((len_ + 1) // 2 for len_ in lens) > ((size + 1) // 2) ** 2:
+        return None
+
+    if rng is None:
+        table = dot_table(size)
+        free = [0] * ((size + 1) // 2)
+        layout = []
+        for len_ in sorted(lens, reverse=True):
+            for row, y in enumerate(free):
+                if y + len_ <= size:
+                    layout.append((table[row * 2][y], len_, 2 if len_ > 1 else 0))
+                    free[row] = y + len_ + 1
+                    break
+            else:
+                break
+        else:
+            return layout
+
+    return search_fleet(size, lens, rng, budget)
+
+
+def search_fleet(size, lens, rng=None, budget=SEARCH_BUDGET):
+    """
+    Перебор с возвратами для fleet_layout(). Корабль вместе с контуром
+    справа и снизу - прямоугольник (len_ + 1) x 2 на поле (size + 1) x (size + 1),
+    и корабли не касаются друг друга тогда и только тогда, когда такие
+    прямоугольники не пересекаются. Клетки расширенного поля обходятся
+    по строкам: первая нерешённая клетка либо становится левым верхним
+    углом прямоугольника одного из оставшихся кораблей, либо остаётся
+    пустой, пока пустых клеток не больше, чем позволяет площадь поля.
+    Состояния (занятые клетки и оставшиеся корабли), из которых флот
+    не удалось достроить, запоминаются и больше не проверяются.
+    Перебор в худшем случае экспоненциален, поэтому число шагов
+    ограничено budget.
+
+    :param size: int Размер игрового поля.
+    :param lens: list Список длин кораблей.
+    :param rng: random.Random Генератор для случайного порядка перебора
+                (None - сначала корабли от длинных к коротким, затем пустая клетка).
+    :param budget: int Наибольшее число шагов перебора.
+    :return: list[(bow, len_, ori)] или None, если флот расставить нельзя.
+    :raises FleetSearchException: перебор не уложился в budget шагов.
+    """
+
+    w = size + 1
+    full = (1 << w * w) - 1
+    kinds = sorted(set(lens), reverse=True)
+    shapes = []
+    for len_ in kinds:
+        options = [(2, len_ + 1, 2)] + ([(len_ + 1, 2, 0)] if len_ > 1 else [])
+        shapes.append([(h, wd, ori, sum(((1 << wd) - 1) << r * w for r in range(h))) for h, wd, ori in options])
+    count = [lens.count(len_) for len_ in kinds]
+    slack = w * w - sum((len_ + 1) * 2 for len_ in lens)
+    if slack < 0:
+        return None
+
+    table = dot_table(size)
+    failed = set()
+    layout = []
+    left = budget
+
+    def place(covered, slack):
+        nonlocal left
+        if not any(count):
+            return True
+        key = (covered, tuple(count))
+        if covered == full or key in failed:
+            return False
+        left -= 1
+        if left < 0:
+            raise FleetSearchException(
+                f"Не удалось за {budget} шагов перебора выяснить, можно ли расставить флот "
+                f"{list(lens)} на поле {size} x {size}")
+
+        pos = (~covered & (covered + 1)).bit_length() - 1
+        x, y = divmod(pos, w)
+        options = [
+            (k, ori, mask << pos)
+            for k in range(len(kinds)) if count[k]
+            for h, wd, ori, mask in shapes[k]
+            if x + h <= w and y + wd <= w and not covered & mask << pos
+        ]
+        if slack:
+            options.append(None)
+        if rng is not None:
+            rng.shuffle(options)
+
+        for option in options:
+            if option is None:
+                if place(covered | 1 << pos, slack - 1):
+                    return True
+                continue
+            k, ori, mask = option
+            count[k] -= 1
+            layout.append((table[x][y], kinds[k], ori))
+            if place(covered | mask, slack):
+                return True
+            layout.pop()
+            count[k] += 1
+
+        failed.add(key)
+        return False
+
+    return layout if place(0, slack) else None
+
+
 class Board:
     """
     Класс игровая доска.
@@ -211,21 +984,62 @@ class Board:
     count : int
         Счётчик поражённых кораблей.
 
+    cells : bytearray
+        Состояние всех клеток поля (коды Cell), клетка (x, y) хранится
+        под индексом x * size + y.
+
     field : list
-        Сетка игрового поля, в которой хранится состояние всех клеток.
+        Сетка игрового поля из символов для вывода в консоль (только чтение).
 
-    busy : list
-        Список всех занятых точек: корабли, клетки по которым были произведены
-        выстрелы.
+    busy : set
+        Множество всех занятых точек: корабли, клетки по которым были произведены
+        выстрелы. Во время игры это выстрелы (shot_at) вместе с контурами
+        уничтоженных кораблей (blocked).
+
+    shot_at : set
+        Точки, по которым стреляли (только чтение).
+
+    blocked : set
+        Точки контуров уничтоженных кораблей, по которым не стреляли (только чтение).
 
     ships : list
         Список кораблей игрового поля.
 
+    ship_at : dict
+        Словарь точка -> корабль для всех клеток, занятых кораблями.
+
+    recorder : GameWriter
+        Запись партии: получает каждый добавленный корабль и каждый выстрел
+        (None - партия не записывается).
+
+    events : GameEvents
+        События и счётчики партии (None - события не передаются).
+
+    view : bytearray
+        Наблюдение стреляющего (коды Seen, клетка (x, y) под индексом
+        x * size + y): буфер, который shot() и unmake() обновляют на месте
+        (None - наблюдение не ведётся, см. observe()).
+
+    history : list
+        Журнал выстрелов с данными для их отмены (см. unmake()).
+
+    free : CellGrid
+        Свободные точки: по ним ещё можно стрелять (дополнение к busy).
+
+    targets : CellSet
+        Точки для прицельных выстрелов по подбитым кораблям.
+
+    wounded : dict
+        Словарь подбитый, но не уничтоженный корабль -> список попаданий.
+
     Methods
     -------
     add_ship()
         Добавляет корабли на игровое поле.
 
+    place()
+        Расставляет заранее проверенный флот без проверок.
+
     contour()
         Создаёт список точек вокруг корабля - его контур.
 
@@ -245,7 +1059,7 @@ class Board:
         Сравнивает количество подбитых кораблей с общим количеством.
 
     begin()
-        Обнуляет список занятых клеток игрового поля.
+        Обнуляет множество занятых клеток игрового поля.
 
     not_aim()
         Создаёт список валидных точек - координат для неприцельных выстрелов.
@@ -254,93 +1068,129 @@ class Board:
         Создаёт список валидных точек - координат для прицельных выстрелов
         по вероятным клеткам расположения подбитого корабля.
 
+    update_targets()
+        Пересчитывает точки для прицельных выстрелов по подбитым кораблям.
+
+    unmake()
+        Отменяет последний выстрел.
+
+    snapshot()
+        Запоминает состояние доски.
+
+    restore()
+        Возвращает доску к запомненному состоянию.
+
+    observe()
+        Заполняет наблюдение стреляющего по текущему состоянию доски.
+
+    shot_order()
+        Выстрелы по доске по порядку.
+
     """
 
-    def __init__(self, hid=False, size=10):
+    __slots__ = ("size", "hid", "quiet", "count", "cells", "busy", "ships", "ship_at", "recorder", "events",
+                 "view", "history", "free", "targets", "wounded")
+
+    def __init__(self, hid=False, size=10, quiet=False):
         """
         Устанавливает все необходимые атрибуты для объекта Board.
 
         :param hid: bool Определяет нужно ли скрывать корабли на игровом поле.
         :param size: int Размер сетки игрового поля.
+        :param quiet: bool Отключает вывод сообщений о результатах выстрелов
+                      (используется при симуляции партий без консоли).
 
         count : int Счётчик поражённых кораблей.
 
-        field : list Сетка игрового поля, в которой хранится состояние всех клеток.
+        cells : bytearray Состояние всех клеток поля (коды Cell).
 
-        busy : list Список всех занятых точек: корабли, клетки по которым были
-                    произведены выстрелы.
+        busy : set Множество всех занятых точек: корабли, клетки по которым были
+                   произведены выстрелы.
 
         ships : list Список кораблей игрового поля.
 
+        ship_at : dict Словарь точка -> корабль для клеток, занятых кораблями.
+
+        free : CellGrid Свободные точки, по которым ещё можно стрелять.
+
+        targets : CellSet Точки для прицельных выстрелов.
+
+        wounded : dict Подбитые, но не уничтоженные корабли и попадания по ним.
+
         """
 
         self.size = size
         self.hid = hid
+        self.quiet = quiet
         self.count = 0
-        self.field = [["0"] * size for _ in range(size)]
-        self.busy = []
+        self.cells = bytearray(size * size)
+        self.busy = set()
         self.ships = []
+        self.ship_at = {}
+        self.recorder = None
+        self.events = None
+        self.view = None
+        self.history = []
+        self.free = CellGrid(size)
+        self.targets = CellSet()
+        self.wounded = {}
 
     def not_aim(self):
         """
-        Создаёт список валидных точек - координат клеток игрового поля
-        по которым можно производить выстрел. Занятые промахом
-        и контуром убитых кораблей точки удаляются из списка.
+        Возвращает валидные точки - координаты клеток игрового поля
+        по которым можно производить выстрел. Набор поддерживается
+        в актуальном состоянии методами shot() и contour(), поэтому
+        метод ничего не пересчитывает, а замер "not_aim" делает shot().
+        Возвращаемый объект изменять нельзя.
 
-        :return: list[Dot(x0, y0), ...., Dot(xi, yj)]
+        :return: CellSet[Dot(x0, y0), ...., Dot(xi, yj)]
         """
 
-        res = []
-        for i, row in enumerate(self.field):
-            x = i
-            for j, val in enumerate(row):
-                y = j
-                d = Dot(x, y)
-                res.append(d)
-        for d in self.busy:
-            res.remove(d)
-
-        return res
+        return self.free
 
     def aim(self):
         """
-        Создаёт список валидных точек - координат клеток игрового поля
+        Возвращает валидные точки - координаты клеток игрового поля
         где вероятнее всего располагаются следующие клетки подбитого, но
-        не уничтоженного полностью корабля.
-        :return: list[Dot(x0, y0), ...., Dot(xi, yj)]
+        не уничтоженного полностью корабля. Набор пересчитывается
+        в shot() только для подбитого корабля, там же делается замер "aim".
+        Возвращаемый объект изменять нельзя.
+
+        :return: CellSet[Dot(x0, y0), ...., Dot(xi, yj)]
         """
 
-        near_1 = [(-1, 0), (1, 0)]
-        near_2 = [(0, -1), (0, 1)]
-        near_3 = [(-1, 0), (0, -1), (0, 1), (1, 0)]
+        return self.targets
 
-        res = []
-        for d in self.busy:
-            for ship in self.ships:
-                if d in ship.dots and ship.lives != 0:
-
-                    for dx, dy in near_3:
-                        aim = Dot(d.x + dx, d.y + dy)
-                        if not (self.out(aim)) and aim not in self.busy:
-                            res.append(aim)
-
-                    if (Dot(d.x + 1, d.y) in self.busy and Dot(d.x + 1, d.y) in ship.dots)\
-                            or Dot(d.x - 1, d.y) in self.busy and Dot(d.x - 1, d.y) in ship.dots:
-                        res.clear()
-                        for dx, dy in near_1:
-                            aim = Dot(d.x + dx, d.y + dy)
-                            if not (self.out(aim)) and aim not in self.busy:
-                                res.append(aim)
-
-                    if Dot(d.x, d.y + 1) in self.busy and Dot(d.x, d.y + 1) in ship.dots\
-                            or Dot(d.x, d.y - 1) in self.busy and Dot(d.x, d.y - 1) in ship.dots:
-                        res.clear()
-                        for dx, dy in near_2:
-                            aim = Dot(d.x + dx, d.y + dy)
-                            if not (self.out(aim)) and aim not in self.busy:
-                                res.append(aim)
+    def update_targets(self):
+        """
+        Пересчитывает точки для прицельных выстрелов. Для корабля с одним
+        попаданием это свободные соседние клетки, а если попаданий несколько,
+        то только свободные клетки на линии попаданий.
+        """
 
-        return res
+        size = self.size
+        cross = neighbours(size)[0]
+        free = self.free
+
+        res = CellSet()
+        for hits in self.wounded.values():
+            if len(hits) == 1:
+                d = hits[0]
+                cells = cross[d.x * size + d.y]
+            else:
+                # на линии попаданий проверяются только соседи двух крайних клеток.
+                first, last = min(hits, key=lambda d: d.x * size + d.y), max(hits, key=lambda d: d.x * size + d.y)
+                cells = cross[first.x * size + first.y] + cross[last.x * size + last.y]
+                if first.x == last.x:
+                    cells = [d for d in cells if d.x == first.x]
+                else:
+                    cells = [d for d in cells if d.y == first.y]
+
+            for d in cells:
+                if d in free:
+                    res.add(d)
+
+        self.targets = res
 
     def add_ship(self, ship):
         """
@@ -354,11 +1204,34 @@ class Board:
                 raise BoardWrongShipException()
 
         for d in ship.dots:
-            self.field[d.x][d.y] = set_color("■", Color.yellow)
-            self.busy.append(d)
+            self.cells[d.x * self.size + d.y] = Cell.ship
+            self.busy.add(d)
+            self.free.discard(d)
+            self.ship_at[d] = ship
 
         self.ships.append(ship)
         self.contour(ship)
+        if self.recorder is not None:
+            self.recorder.ship(self, ship)
+
+    def place(self, ships):
+        """
+        Расставляет флот, про который уже известно, что он допустим
+        (например, из LayoutPool), на пустую доску. В отличие от add_ship()
+        не проверяет клетки и не помечает контуры: доска сразу готова
+        к игре, как после add_ship() и begin().
+
+        :param ships: list Корабли флота.
+        """
+
+        size = self.size
+        for ship in ships:
+            for d in ship.dots:
+                self.cells[d.x * size + d.y] = Cell.ship
+                self.ship_at[d] = ship
+            self.ships.append(ship)
+            if self.recorder is not None:
+                self.recorder.ship(self, ship)
 
     def contour(self, ship, verb=False):
         """
@@ -367,22 +1240,20 @@ class Board:
 
         :param ship: Объект класса Ship - корабль.
         :param verb: bool Статус корабля (True если корабль уничтожен)
+        :return: list Точки контура, которые стали занятыми.
 
         """
 
-        near = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1), (0, 0), (0, 1),
-            (1, -1), (1, 0), (1, 1)
-        ]
-
-        for d in ship.dots:
-            for dx, dy in near:
-                cur = Dot(d.x + dx, d.y + dy)
-                if not (self.out(cur)) and cur not in self.busy:
-                    if verb:
-                        self.field[cur.x][cur.y] = "."
-                    self.busy.append(cur)
+        busy = self.busy
+        added = []
+        for cur in ship_contour(self.size, ship)[0]:
+            if cur not in busy:
+                if verb:
+                    self.cells[cur.x * self.size + cur.y] = Cell.contour
+                busy.add(cur)
+                self.free.discard(cur)
+                added.append(cur)
+        return added
 
     def __str__(self):
         """
@@ -391,17 +1262,28 @@ class Board:
 
         """
 
-        res = ""
-        res += "  | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8 | 9 | 10|"
-
-        for i, row in enumerate(self.field):
-            res += f"\n{L_R[i + 1]} | " + " | ".join(row) + " |"
+        res = board_header(self.size)
 
-        if self.hid:
-            res = res.replace("■", set_color("0", Color.reset))
+        cells = bytes(self.cells)
+        size = self.size
+        for x in range(size):
+            res += "\n" + render_row(x, cells[x * size:(x + 1) * size], self.hid)
 
         return res
 
+    @property
+    def field(self):
+        """
+        Сетка игрового поля из символов для вывода в консоль,
+        собранная из кодов состояний клеток.
+
+        :return: list Сетка игрового поля.
+        """
+
+        glyphs = GLYPHS[False]
+        size = self.size
+        return [[glyphs[c] for c in self.cells[x * size:(x + 1) * size]] for x in range(size)]
+
     def out(self, d):
         """
         Делает проверку выходит ли точка d за пределы игрового поля.
@@ -432,180 +1314,1370 @@ class Board:
         if d in self.busy:
             raise BoardOutException()
 
-        self.busy.append(d)
-
-        for ship in self.ships:
-
-            if d in ship.dots:
-                ship.lives -= 1
-                self.field[d.x][d.y] = set_color("X", Color.red)
-
-                if ship.lives == 0:
-                    self.count += 1
-                    self.contour(ship, verb=True)
+        # у Board наборы aim() и not_aim() обновляются здесь, поэтому и замеры делаются здесь.
+        events = self.events
+        start = time.perf_counter() if events is not None else 0.0
+        self.busy.add(d)
+        self.free.discard(d)
+        if events is not None:
+            events.timed("not_aim", start)
+
+        ship = self.ship_at.get(d)
+        if ship is not None:
+            ship.lives -= 1
+            self.cells[d.x * self.size + d.y] = Cell.hit
+
+            if ship.lives == 0:
+                self.count += 1
+                hits = self.wounded.pop(ship, None)
+                start = time.perf_counter() if events is not None else 0.0
+                added = self.contour(ship, verb=True)
+                if events is not None:
+                    events.timed("not_aim", start)
+                self.history.append((d, ship, self.targets, hits, added))
+                start = time.perf_counter() if events is not None else 0.0
+                self.update_targets()
+                if events is not None:
+                    events.timed("aim", start)
+                if self.view is not None:
+                    for cur in ship.dots:
+                        self.view[cur.x * self.size + cur.y] = Seen.sunk
+                    for cur in added:
+                        self.view[cur.x * self.size + cur.y] = Seen.contour
+                if self.recorder is not None:
+                    self.recorder.shot(self, d, Shot.sunk)
+                if self.events is not None:
+                    self.events.shot(self, d, Shot.sunk, ship)
+                if not self.quiet:
                     print(set_color("Корабль уничтожен!", Color.red_1))
 
-                    return True
+                return True
 
-                else:
+            else:
+                self.wounded.setdefault(ship, []).append(d)
+                self.history.append((d, ship, self.targets, None, None))
+                start = time.perf_counter() if events is not None else 0.0
+                self.update_targets()
+                if events is not None:
+                    events.timed("aim", start)
+                if self.view is not None:
+                    self.view[d.x * self.size + d.y] = Seen.hit
+                if self.recorder is not None:
+                    self.recorder.shot(self, d, Shot.hit)
+                if self.events is not None:
+                    self.events.shot(self, d, Shot.hit, ship)
+                if not self.quiet:
                     print(set_color("Корабль ранен!", Color.turq))
 
-                    return True
-
-        self.field[d.x][d.y] = "."
-        print(set_color("Мимо!", Color.violet))
+                return True
+
+        i = d.x * self.size + d.y
+        self.history.append(miss_entries(self.size)[d in self.targets][i])
+        self.targets.discard(d)
+        self.cells[i] = Cell.miss
+        if self.view is not None:
+            self.view[i] = Seen.miss
+        if self.recorder is not None:
+            self.recorder.shot(self, d, Shot.miss)
+        if self.events is not None:
+            self.events.shot(self, d, Shot.miss)
+        if not self.quiet:
+            print(set_color("Мимо!", Color.violet))
 
         return False
 
-    def defeat(self):
-        """
-        Сравнивает количество подбитых кораблей с общим количеством.
-
-        :return: bool значение сравнения
-
+    def unmake(self):
         """
-        return self.count == len(self.ships)
+        Отменяет последний выстрел за O(1) (плюс размер контура уничтоженного
+        корабля): возвращает клетки, жизни корабля, счётчик и точки прицеливания.
+        Отмена не передаётся в запись партии (recorder).
 
-    def begin(self):
+        :return: Dot Точка отменённого выстрела.
         """
-        Обнуляет список занятых клеток игрового поля.
 
-        :return: list Пустой список занятых клеток.
+        d, ship, targets, hits, added = self.history.pop()
+        i = d.x * self.size + d.y
+        view = self.view
 
-        """
+        if ship is None:
+            self.cells[i] = Cell.empty
+            if targets:
+                self.targets.add(d)
+        else:
+            self.cells[i] = Cell.ship
+            if ship.lives == 0:
+                self.count -= 1
+                for cur in added:
+                    self.cells[cur.x * self.size + cur.y] = Cell.empty
+                    self.busy.discard(cur)
+                    self.free.add(cur)
+                if view is not None:
+                    for cur in ship.dots:
+                        view[cur.x * self.size + cur.y] = Seen.hit
+                    for cur in added:
+                        view[cur.x * self.size + cur.y] = Seen.unknown
+                if hits:
+                    self.wounded[ship] = hits
+            else:
+                self.wounded[ship].pop()
+                if not self.wounded[ship]:
+                    del self.wounded[ship]
+            ship.lives += 1
+            self.targets = targets
+
+        self.busy.discard(d)
+        self.free.add(d)
+        if view is not None:
+            view[i] = Seen.unknown
+        return d
+
+    @property
+    def shot_at(self):
+        """
+        Точки, по которым стреляли: промахи и попадания.
+
+        :return: set{Dot(x0, y0), ...., Dot(xi, yj)}
+        """
+
+        table = dot_table(self.size)
+        size = self.size
+        return {table[i // size][i % size] for i, c in enumerate(self.cells) if c == Cell.miss or c == Cell.hit}
+
+    @property
+    def blocked(self):
+        """
+        Точки контуров уничтоженных кораблей, по которым не стреляли:
+        стрелять по ним нельзя, но выстрелами они не являются.
+
+        :return: set{Dot(x0, y0), ...., Dot(xi, yj)}
+        """
+
+        table = dot_table(self.size)
+        size = self.size
+        return {table[i // size][i % size] for i, c in enumerate(self.cells) if c == Cell.contour}
+
+    def shot_order(self):
+        """
+        :return: list[Dot] Выстрелы по доске по порядку (по журналу history).
+        """
+
+        return [entry[0] for entry in self.history]
+
+    def observe(self, out=None):
+        """
+        Заполняет наблюдение стреляющего (коды Seen) по текущему состоянию
+        доски: корабли, по которым не стреляли, видны как unknown.
+
+        :param out: Буфер из size * size байт для заполнения на месте
+                    (bytearray, memoryview или массив numpy; None - новый bytearray).
+        :return: Заполненный буфер.
+        """
+
+        if out is None:
+            out = bytearray(self.size * self.size)
+        size = self.size
+        seen = (Seen.unknown, Seen.unknown, Seen.miss, Seen.hit, Seen.contour)
+        for i, c in enumerate(self.cells):
+            out[i] = seen[c]
+        for ship in self.ships:
+            if not ship.lives:
+                for d in ship.dots:
+                    out[d.x * size + d.y] = Seen.sunk
+        return out
+
+    def snapshot(self):
+        """
+        Запоминает состояние доски. Снимок - это просто длина журнала
+        выстрелов, поэтому он ничего не копирует.
+
+        :return: int Снимок для restore().
+        """
+
+        return len(self.history)
+
+    def restore(self, snap):
+        """
+        Отменяет выстрелы, сделанные после снимка.
+
+        :param snap: int Снимок, полученный из snapshot().
+        """
+
+        while len(self.history) > snap:
+            self.unmake()
+
+    def defeat(self):
+        """
+        Сравнивает количество подбитых кораблей с общим количеством.
+
+        :return: bool значение сравнения
+
+        """
+        return self.count == len(self.ships)
+
+    def begin(self):
+        """
+        Обнуляет множество занятых клеток игрового поля.
+
+        :return: set Пустое множество занятых клеток.
+
+        """
+
+        self.busy = set()
+        self.free = CellGrid(self.size)
+        self.history = []
+
+
+# функция, которая перебирает номера установленных битов маски.
+def bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class MaskCells:
+    """
+    Набор точек, заданный битовой маской (бит x * size + y - точка (x, y)).
+    Набор не копирует точки в список: длина берётся из количества
+    установленных битов, а i-я точка находится функцией nth_bit(), поэтому
+    random.choice() работает с ним так же, как со списком.
+
+    Attributes
+    ----------
+    mask : int
+        Маска точек.
+
+    size : int
+        Размер игрового поля.
+
+    """
+
+    __slots__ = ("mask", "size", "_len")
+
+    def __init__(self, mask, size):
+        self.mask = mask
+        self.size = size
+        self._len = mask.bit_count()
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        j = nth_bit(self.mask, i)
+        return dot_table(self.size)[j // self.size][j % self.size]
+
+    def __iter__(self):
+        table = dot_table(self.size)
+        for j in bits(self.mask):
+            yield table[j // self.size][j % self.size]
+
+    def __contains__(self, d):
+        return 0 <= d.x < self.size and 0 <= d.y < self.size and self.mask >> d.x * self.size + d.y & 1 == 1
+
+
+class BitBoard(Board):
+    """
+    Игровая доска, хранящая состояние клеток в виде битовых масок.
+    Клетка (x, y) соответствует биту с номером x * size + y.
+    Публичные методы совпадают с методами Board, но проверки
+    занятости и соседства выполняются битовыми операциями,
+    а не перебором списков точек.
+
+    Attributes
+    ----------
+    full : int
+        Маска всех клеток игрового поля.
+
+    ships_mask : int
+        Клетки, занятые кораблями.
+
+    shots_mask : int
+        Клетки, по которым были произведены выстрелы.
+
+    hits_mask : int
+        Клетки с попаданиями по кораблям.
+
+    contour_mask : int
+        Клетки контуров уничтоженных кораблей.
+
+    busy_mask : int
+        Все занятые клетки: при расстановке - корабли с контурами,
+        во время игры - выстрелы и контуры уничтоженных кораблей.
+
+    ship_masks : list
+        Маски кораблей в том же порядке, что и список ships.
+
+    """
+
+    __slots__ = ("ship_masks", "full", "not_first", "not_last", "ships_mask", "shots_mask", "hits_mask",
+                 "contour_mask", "busy_mask")
+
+    def __init__(self, hid=False, size=10, quiet=False):
+        """
+        Устанавливает все необходимые атрибуты для объекта BitBoard.
+
+        :param hid: bool Определяет нужно ли скрывать корабли на игровом поле.
+        :param size: int Размер сетки игрового поля.
+        :param quiet: bool Отключает вывод сообщений о результатах выстрелов.
+        """
+
+        self.size = size
+        self.hid = hid
+        self.quiet = quiet
+        self.count = 0
+        self.ships = []
+        self.ship_masks = []
+        self.ship_at = {}
+        self.recorder = None
+        self.events = None
+        self.view = None
+        self.history = []
+
+        self.full = (1 << size * size) - 1
+        # маски клеток, которые не могут получить соседа слева/справа при сдвиге.
+        first_col = sum(1 << x * size for x in range(size))
+        self.not_first = self.full & ~first_col
+        self.not_last = self.full & ~(first_col << size - 1)
+
+        self.ships_mask = 0
+        self.shots_mask = 0
+        self.hits_mask = 0
+        self.contour_mask = 0
+        self.busy_mask = 0
+
+    def bit(self, d):
+        """
+        :param d: объект класса Dot
+        :return: int маска с единственным битом точки d
+        """
+
+        return 1 << d.x * self.size + d.y
+
+    def dot(self, i):
+        """
+        :param i: int номер бита
+        :return: Dot точка, соответствующая биту
+        """
+
+        return dot_table(self.size)[i // self.size][i % self.size]
+
+    def near(self, mask, diagonal=True):
+        """
+        Расширяет маску на соседние клетки (по умолчанию вместе с диагональными).
+
+        :param mask: int исходная маска
+        :param diagonal: bool учитывать ли диагональных соседей
+        :return: int маска исходных клеток вместе с соседями
+        """
+
+        size = self.size
+        row = mask | (mask << 1) & self.not_first | (mask >> 1) & self.not_last
+        if not diagonal:
+            return (row | mask << size | mask >> size) & self.full
+        return (row | row << size | row >> size) & self.full
+
+    @property
+    def busy(self):
+        """
+        Множество занятых точек для совместимости с Board.
+
+        :return: set{Dot(x0, y0), ...., Dot(xi, yj)}
+        """
+
+        return {self.dot(i) for i in bits(self.busy_mask)}
+
+    @property
+    def shot_at(self):
+        """
+        Точки, по которым стреляли, см. Board.shot_at.
+
+        :return: set{Dot(x0, y0), ...., Dot(xi, yj)}
+        """
+
+        return {self.dot(i) for i in bits(self.shots_mask)}
+
+    @property
+    def blocked(self):
+        """
+        Точки контуров уничтоженных кораблей, по которым не стреляли, см. Board.blocked.
+
+        :return: set{Dot(x0, y0), ...., Dot(xi, yj)}
+        """
+
+        return {self.dot(i) for i in bits(self.contour_mask & ~self.shots_mask)}
+
+    def shot_order(self):
+        """
+        :return: list[Dot] Выстрелы по доске по порядку: журнал хранит маски
+                 до каждого выстрела, выстрел - разница соседних масок.
+        """
+
+        masks = [entry[1] for entry in self.history] + [self.shots_mask]
+        return [self.dot((b ^ a).bit_length() - 1) for a, b in zip(masks, masks[1:])]
+
+    @property
+    def wounded(self):
+        """
+        Подбитые, но не уничтоженные корабли для совместимости с Board.
+
+        :return: dict корабль -> список точек попаданий
+        """
+
+        return {
+            ship: [self.dot(i) for i in bits(mask & self.hits_mask)]
+            for ship, mask in zip(self.ships, self.ship_masks)
+            if ship.lives and mask & self.hits_mask
+        }
+
+    @property
+    def cells(self):
+        """
+        Состояние клеток поля (коды Cell), собранное из битовых масок,
+        в том же виде, что и Board.cells.
+
+        :return: bytearray
+        """
+
+        cells = bytearray(self.size * self.size)
+        for i in bits(self.ships_mask):
+            cells[i] = Cell.ship
+        for i in bits(self.contour_mask):
+            cells[i] = Cell.contour
+        for i in bits(self.shots_mask & ~self.ships_mask):
+            cells[i] = Cell.miss
+        for i in bits(self.hits_mask):
+            cells[i] = Cell.hit
+        return cells
+
+    def not_aim(self):
+        """
+        Возвращает точки игрового поля, по которым можно производить выстрел.
+        Точки не перебираются: набор задан маской свободных клеток.
+
+        :return: MaskCells[Dot(x0, y0), ...., Dot(xi, yj)]
+        """
+
+        if self.events is None:
+            return MaskCells(self.full & ~self.busy_mask, self.size)
+        start = time.perf_counter()
+        res = MaskCells(self.full & ~self.busy_mask, self.size)
+        self.events.timed("not_aim", start)
+        return res
+
+    def aim(self):
+        """
+        Возвращает точки рядом с попаданиями по подбитым, но не
+        уничтоженным кораблям по тому же правилу, что и Board.update_targets():
+        для корабля с одним попаданием - свободные соседние клетки, а если
+        попаданий несколько - свободные клетки на их линии рядом с двумя
+        крайними попаданиями.
+
+        :return: MaskCells[Dot(x0, y0), ...., Dot(xi, yj)]
+        """
+
+        start = time.perf_counter() if self.events is not None else 0.0
+        size = self.size
+        free = self.full & ~self.busy_mask
+        res = 0
+        for ship, mask in zip(self.ships, self.ship_masks):
+            hit = mask & self.hits_mask
+            if not hit or ship.lives == 0:
+                continue
+
+            first, last = hit & -hit, 1 << hit.bit_length() - 1
+            if first == last:
+                res |= self.near(hit, diagonal=False) & free
+                continue
+
+            ends = first | last
+            if (first.bit_length() - 1) // size == (last.bit_length() - 1) // size:
+                res |= ((ends << 1) & self.not_first | (ends >> 1) & self.not_last) & free
+            else:
+                res |= (ends << size | ends >> size) & free
+
+        if self.events is not None:
+            self.events.timed("aim", start)
+        return MaskCells(res, size)
+
+    def add_ship(self, ship):
+        """
+        Добавляет корабль на игровое поле. Если точки корабля выходят за игровое
+        поле или являются занятыми, то вызывает исключение BoardWrongShipException().
+
+        """
+
+        mask = 0
+        for d in ship.dots:
+            if self.out(d):
+                raise BoardWrongShipException()
+            mask |= self.bit(d)
+
+        if mask & self.busy_mask:
+            raise BoardWrongShipException()
+
+        for d in ship.dots:
+            self.ship_at[d] = ship
+        self.ships.append(ship)
+        self.ship_masks.append(mask)
+        self.ships_mask |= mask
+        self.busy_mask |= ship_contour(self.size, ship)[2]
+        if self.recorder is not None:
+            self.recorder.ship(self, ship)
+
+    def place(self, ships):
+        """
+        Расставляет допустимый флот без проверок, см. Board.place().
+
+        :param ships: list Корабли флота.
+        """
+
+        for ship in ships:
+            mask = ship_contour(self.size, ship)[1]
+            for d in ship.dots:
+                self.ship_at[d] = ship
+            self.ships.append(ship)
+            self.ship_masks.append(mask)
+            self.ships_mask |= mask
+            if self.recorder is not None:
+                self.recorder.ship(self, ship)
+
+    def contour(self, ship, verb=False):
+        """
+        Помечает занятым контур корабля, если корабль уничтожен
+        выводит контур на игровое поле.
+
+        :param ship: Объект класса Ship - корабль.
+        :param verb: bool Статус корабля (True если корабль уничтожен)
+
+        """
+
+        dots, mask, near = ship_contour(self.size, ship)
+        if verb:
+            self.contour_mask |= near & ~mask
+        self.busy_mask |= near
+
+    def shot(self, d):
+        """
+        Делает выстрел по кораблю. Правила и исключения те же, что и у Board.shot().
+
+        :param d: объект класса Dot.
+        :return: bool возвращает True если попали по кораблю и False при промахе.
+
+        """
+
+        if self.out(d):
+            raise BoardOutException()
+
+        bit = self.bit(d)
+        if bit & self.busy_mask:
+            raise BoardOutException()
+
+        self.history.append((self.busy_mask, self.shots_mask, self.hits_mask, self.contour_mask, self.ship_at.get(d)))
+        self.busy_mask |= bit
+        self.shots_mask |= bit
+
+        if bit & self.ships_mask:
+            ship = self.ship_at[d]
+            ship.lives -= 1
+            self.hits_mask |= bit
+
+            if ship.lives == 0:
+                self.count += 1
+                contour = self.contour_mask
+                self.contour(ship, verb=True)
+                if self.view is not None:
+                    for cur in ship.dots:
+                        self.view[cur.x * self.size + cur.y] = Seen.sunk
+                    for i in bits(self.contour_mask & ~contour & ~self.shots_mask):
+                        self.view[i] = Seen.contour
+                if self.recorder is not None:
+                    self.recorder.shot(self, d, Shot.sunk)
+                if self.events is not None:
+                    self.events.shot(self, d, Shot.sunk, ship)
+                if not self.quiet:
+                    print(set_color("Корабль уничтожен!", Color.red_1))
+            else:
+                if self.view is not None:
+                    self.view[d.x * self.size + d.y] = Seen.hit
+                if self.recorder is not None:
+                    self.recorder.shot(self, d, Shot.hit)
+                if self.events is not None:
+                    self.events.shot(self, d, Shot.hit, ship)
+                if not self.quiet:
+                    print(set_color("Корабль ранен!", Color.turq))
+
+            return True
+
+        if self.view is not None:
+            self.view[d.x * self.size + d.y] = Seen.miss
+        if self.recorder is not None:
+            self.recorder.shot(self, d, Shot.miss)
+        if self.events is not None:
+            self.events.shot(self, d, Shot.miss)
+        if not self.quiet:
+            print(set_color("Мимо!", Color.violet))
+
+        return False
+
+    def unmake(self):
+        """
+        Отменяет последний выстрел: маски восстанавливаются из журнала.
+
+        :return: Dot Точка отменённого выстрела.
+        """
+
+        busy, shots, hits, contour, ship = self.history.pop()
+        d = self.dot((self.shots_mask ^ shots).bit_length() - 1)
+        if ship is not None:
+            if ship.lives == 0:
+                self.count -= 1
+            ship.lives += 1
+        self.busy_mask, self.shots_mask, self.hits_mask, self.contour_mask = busy, shots, hits, contour
+        if self.view is not None:
+            self.observe(self.view)
+        return d
+
+    def begin(self):
+        """
+        Обнуляет маску занятых клеток игрового поля.
+        """
+
+        self.busy_mask = 0
+        self.history = []
+
+
+class Player:
+    """
+    Основной класс игроков.
+
+    Attributes
+    ----------
+    board : класс Board
+        Игровая доска - поле пользователя.
+
+    enemy : класс Board
+        Игровая доска - поле противника.
+
+    Methods
+    -------
+    ask()
+        Данный метод будет определён в наследственных классах игроков.
+
+    move()
+        Данный метод в бесконечном цикле пытается сделать выстрел.
+        Если выстрел прошёл хорошо, то возвращается к условию нужно
+        ли делать следующий выстрел. При возникновении исключений
+        печатает соответствующее исключение.
+
+    """
+
+    __slots__ = ("board", "enemy")
+
+    def __init__(self, board, enemy):
+        """
+        Устанавливает все необходимые атрибуты для объекта Board.
+
+        :param board: класс Board Игровая доска - поле пользователя.
+        :param enemy: класс Board Игровая доска - поле противника.
+        """
+        self.board = board
+        self.enemy = enemy
+
+    def ask(self):
+        raise NotImplementedError()
+
+    def move(self):
+        """
+        Данный метод в бесконечном цикле пытается сделать выстрел.
+        Если выстрел прошёл хорошо, то возвращается к условию нужно
+        ли делать следующий выстрел. При возникновении исключений
+        печатает соответствующее исключение.
+        :return: bool значение результата выстрела (True при попадании).
+        """
+
+        while True:
+            try:
+                target = self.ask()
+                repeat = self.enemy.shot(target)
+                return repeat
+            except BoardException as e:
+                print(e)
+
+
+class Strategy:
+    """
+    Основной класс стратегий выбора выстрела для AI. Стратегия не хранит
+    состояния партии и может использоваться несколькими игроками сразу.
+
+    Methods
+    -------
+    choose()
+        Данный метод будет определён в наследственных классах стратегий.
+
+    """
+
+    def choose(self, enemy, rng):
+        """
+        Выбирает точку выстрела.
+
+        :param enemy: класс Board Игровая доска - поле противника.
+        :param rng: random.Random Генератор случайных чисел игрока.
+        :return: Dot(x, y) координаты выстрела.
+        """
+
+        raise NotImplementedError()
+
+
+class RandomStrategy(Strategy):
+    """
+    Стратегия случайных выстрелов: точка выбирается среди всех клеток,
+    по которым ещё можно стрелять.
+    """
+
+    def choose(self, enemy, rng):
+        return rng.choice(enemy.not_aim())
+
+
+class HuntTargetStrategy(Strategy):
+    """
+    Стратегия "поиск - добивание": точка выбирается из списка неприцельных
+    выстрелов, если список прицельных выстрелов пуст.
+
+    Methods
+    -------
+    hunt()
+        Выбирает неприцельный выстрел.
+
+    """
+
+    def choose(self, enemy, rng):
+        targets = enemy.aim()
+        if targets:
+            return rng.choice(targets)
+        return self.hunt(enemy, rng)
+
+    def hunt(self, enemy, rng):
+        """
+        Выбирает точку неприцельного выстрела.
+
+        :param enemy: класс Board Игровая доска - поле противника.
+        :param rng: random.Random Генератор случайных чисел игрока.
+        :return: Dot(x, y) координаты выстрела.
+        """
+
+        return rng.choice(enemy.not_aim())
+
+
+class ParityStrategy(HuntTargetStrategy):
+    """
+    Стратегия "поиск - добивание" с поиском по шахматному порядку: пока
+    у противника нет однопалубных кораблей, любой корабль накрывает
+    хотя бы одну клетку с чётной суммой координат, поэтому неприцельные
+    выстрелы делаются только по таким клеткам.
+    """
+
+    def hunt(self, enemy, rng):
+        free = enemy.not_aim()
+        if min(ship.len_ for ship in enemy.ships if ship.lives) > 1:
+            # чётные клетки выбираются повторной выборкой, чтобы не перебирать всё поле.
+            for _ in range(64):
+                d = rng.choice(free)
+                if (d.x + d.y) % 2 == 0:
+                    return d
+            cells = [d for d in free if (d.x + d.y) % 2 == 0]
+            if cells:
+                return rng.choice(cells)
+        return rng.choice(free)
+
+
+def load_numpy():
+    """
+    Импортирует numpy при первом вызове и сохраняет модуль в глобальной
+    переменной np.
+
+    :return: модуль numpy или None, если пакет не установлен.
+    """
+
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+class AI(Player):
+    """
+    Класс игрока - компьютера (AI). Выбор выстрела делегируется стратегии,
+    а случайные числа берутся из собственного генератора игрока, поэтому
+    несколько AI в одном процессе не влияют друг на друга.
+
+    Attributes
+    ----------
+    strategy : Strategy
+        Стратегия выбора выстрела (по умолчанию HuntTargetStrategy).
+
+    rng : random.Random
+        Генератор случайных чисел игрока.
+
+    Methods
+    -------
+    choose()
+        Выбирает точку выстрела с помощью стратегии.
+
+    ask()
+        Выбирает точку выстрела и сообщает о ходе компьютера.
+
+    """
+
+    __slots__ = ("strategy", "rng")
+
+    def __init__(self, board, enemy, strategy=None, rng=None):
+        """
+        Устанавливает все необходимые атрибуты для объекта AI.
+
+        :param board: класс Board Игровая доска - поле компьютера.
+        :param enemy: класс Board Игровая доска - поле противника.
+        :param strategy: Strategy Стратегия выбора выстрела.
+        :param rng: random.Random Генератор случайных чисел.
+        """
+
+        super().__init__(board, enemy)
+        self.strategy = strategy if strategy is not None else HuntTargetStrategy()
+        self.rng = rng if rng is not None else random.Random()
+
+    def choose(self):
+        """
+        Выбирает точку выстрела с помощью стратегии.
+
+        :return: Dot(x, y) координаты выстрела.
+        """
+
+        return self.strategy.choose(self.enemy, self.rng)
+
+    def ask(self):
+        """
+        Выбирает точку выстрела методом choose() и выводит ход в консоль.
+
+        :return: Dot(x, y) координаты выстрела.
+        """
+
+        events = self.enemy.events
+        if events is None:
+            d = self.choose()
+        else:
+            start = time.perf_counter()
+            d = self.choose()
+            events.timed("ask", start)
+        if not self.board.quiet:
+            print(f"Ход компьютера: {format_dot(d)}")
+        return d
+
+
+def parse_move(text):
+    """
+    Разбирает ход в формате "x y", где x - латинская буква строки,
+    а y - номер столбца, попутно делая проверки на корректность данных.
+
+    :param text: str Введённая строка.
+    :return: tuple(Dot или None, str или None) координаты выстрела
+             либо сообщение об ошибке ввода.
+    """
+
+    cords = text.split()
+
+    if len(cords) != 2:
+        return None, " Введите 2 координаты! "
+
+    x, y = cords
+    x = x.upper()
+
+    # проверка: является ли x буквой, только одна буква, буква из латинского алфавита.
+    if not x.isalpha() or len(x) > 1 or x not in L_R:
+        return None, " Первой координатой введите \n соответствующую латинскую букву! "
+
+    if not (y.isdigit()):
+        return None, " Второй координатой введите цифру! "
+
+    x = L_R.index(x)
+    x, y = int(x), int(y)
+
+    return Dot(x - 1, y - 1), None
+
+
+# функция, которая записывает точку в формате ввода хода: "x y".
+def format_dot(d):
+    return f"{L_R[d.x + 1]} {d.y + 1}"
+
+
+class User(Player):
+    """
+    Класс игрока - пользователя.
+
+    Methods
+    -------
+    ask()
+        Данный метод запрашивает у пользователя координаты выстрела,
+        попутно делая проверки на корректность вводимых данных.
+
+    """
+
+    __slots__ = ()
+
+    def ask(self):
+        """
+        Данный метод запрашивает у пользователя координаты выстрела,
+        попутно делая проверки на корректность вводимых данных (parse_move()).
+
+        :return: Dot(x, y) координаты выстрела.
+        """
+
+        while True:
+            d, error = parse_move(input("Ваш ход: "))
+            if error:
+                print(error)
+                continue
+            return d
+
+
+# Разделитель между досками при выводе в консоль.
+BOARDS_SEP = '    *    '
+
+
+def board_lines(boards, titles):
+    """
+    Строки для вывода игровых досок в консоль рядом друг с другом:
+    разделительная линия, подписи досок и сами доски.
+
+    :param boards: list Игровые доски.
+    :param titles: list Подписи досок.
+    :return: list[str]
+    """
+
+    grids = [str(board).splitlines() for board in boards]
+    for grid, title in zip(grids, titles):
+        grid.insert(0, title.ljust(len(grid[0])))
+
+    lines = ['-' * 95]
+    for row in zip(*grids):
+        lines.append(BOARDS_SEP.join(row))
+    return lines
+
+
+class TerminalRenderer:
+    """
+    Отрисовка игровых досок в терминале с обновлением только изменившихся
+    клеток. При первом кадре экран очищается и доски выводятся целиком
+    в верхней части экрана, а ниже задаётся область прокрутки для сообщений
+    игры. В следующих кадрах состояние клеток сравнивается с прошлым кадром,
+    и изменившиеся клетки перерисовываются по адресу курсора.
+
+    Attributes
+    ----------
+    out : file
+        Поток вывода (по умолчанию sys.stdout).
+
+    prev : list
+        Коды состояний клеток досок в последнем выведенном кадре.
+
+    Methods
+    -------
+    draw()
+        Выводит кадр: целиком или только изменения.
+
+    close()
+        Возвращает терминалу обычную прокрутку.
+
+    """
+
+    def __init__(self, out=None):
+        self.out = out if out is not None else sys.stdout
+        self.prev = None
+        self.hid = None
+
+    def draw(self, boards, titles):
+        """
+        Выводит кадр с игровыми досками.
+
+        :param boards: list Игровые доски.
+        :param titles: list Подписи досок.
+        """
+
+        cells = [bytes(board.cells) for board in boards]
+        hid = [board.hid for board in boards]
+        if self.prev is None or hid != self.hid or [len(c) for c in cells] != [len(c) for c in self.prev]:
+            self.full(boards, titles, cells)
+        else:
+            self.diff(boards, cells)
+        self.prev = cells
+        self.hid = hid
+        self.out.flush()
+
+    def full(self, boards, titles, cells):
+        import shutil
+        lines = board_lines(boards, titles)
+        height = shutil.get_terminal_size().lines
+        self.out.write("\033[r\033[2J\033[H" + "\n".join(lines) + "\n")
+        # сообщения игры прокручиваются только под досками.
+        self.out.write(f"\033[{len(lines) + 1};{height}r\033[{len(lines) + 1};1H")
+
+    def diff(self, boards, cells):
+        out = ["\0337"]
+        left = 1
+        for board, new, old in zip(boards, cells, self.prev):
+            if new != old:
+                glyphs = GLYPHS[board.hid]
+                for i, (a, b) in enumerate(zip(new, old)):
+                    if a != b:
+                        x, y = divmod(i, board.size)
+                        # 1 строка - линия, 2 - подписи, 3 - шапка доски.
+                        out.append(f"\033[{x + 4};{left + 4 + 4 * y}H{glyphs[a]}")
+            left += 4 * board.size + 3 + len(BOARDS_SEP)
+        out.append("\0338")
+        self.out.write("".join(out))
+
+    def close(self):
+        """
+        Сбрасывает область прокрутки терминала.
+        """
+
+        if self.prev is not None:
+            self.out.write("\033[r")
+            self.out.flush()
+        self.prev = None
+
+
+# Матрицы пересечений положений кораблей для numpy, ключ - (размер поля, длина, другая длина).
+_conflict_arrays = {}
+
+
+def conflict_array(size, len_, other):
+    """
+    slot_conflicts() в виде булевой матрицы numpy: элемент [i, j] истинен,
+    если положение j корабля длины other задевает положение i корабля
+    длины len_ или его контур.
+
+    :return: numpy.ndarray bool
+    """
+
+    key = (size, len_, other)
+    if key not in _conflict_arrays:
+        n = len(ship_slots(size, other)[0])
+        nbytes = (n + 7) // 8
+        rows = [
+            np.unpackbits(np.frombuffer(mask.to_bytes(nbytes, "little"), dtype=np.uint8), bitorder="little")[:n]
+            for mask in slot_conflicts(size, len_, other)
+        ]
+        _conflict_arrays[key] = np.array(rows, dtype=bool)
+    return _conflict_arrays[key]
+
+
+def sample_layouts(size, lens, n, seed=None, uniform=True, attempts=1_000_000):
+    """
+    Строит до n расстановок флота. Расстановка хранится номерами положений
+    кораблей в ship_slots(size, len_), корабли от длинных к коротким.
+
+    Если uniform истинно, все допустимые расстановки равновероятны: каждый
+    корабль получает случайное положение среди всех положений своей длины,
+    и набор отбрасывается, если корабли задевают друг друга. С numpy наборы
+    проверяются пачками (следующий корабль добавляется только к уцелевшим
+    наборам), без numpy - по одному с остановкой на первом пересечении.
+    Иначе расстановки строятся fleet_slots(): это быстрее, но чаще
+    встречаются расстановки с кораблями, которые мешают друг другу меньше.
+
+    :param size: int Размер игрового поля.
+    :param lens: list Список длин кораблей.
+    :param n: int Количество расстановок.
+    :param seed: int Зерно генератора случайных чисел.
+    :param uniform: bool Равновероятный выбор среди допустимых расстановок.
+    :param attempts: int Наибольшее количество проверенных наборов на одну
+                     расстановку (для плотного флота, который почти не удаётся
+                     расставить): построение прекращается, если наборов
+                     проверено больше, чем attempts * (найдено + 1).
+    :return: array('H') номера положений, len(lens) подряд на каждую расстановку.
+    """
+
+    lens = sorted(lens, reverse=True)
+    k = len(lens)
+    res = array("H")
+    tried = 0
+
+    if not uniform:
+        rng = random.Random(seed)
+        while len(res) < n * k and tried <= attempts * (len(res) // k + 1):
+            tried += 1
+            slots = fleet_slots(size, lens, rng)
+            if slots is not None:
+                res.extend(slots)
+        return res
+
+    if load_numpy() is None:
+        rng = random.Random(seed)
+        random_ = rng.random
+        plan = [slot_contours(size, len_) for len_ in lens]
+        while len(res) < n * k and tried <= attempts * (len(res) // k + 1):
+            tried += 1
+            blocked = 0
+            slots = []
+            for table in plan:
+                i = int(random_() * len(table))
+                ship, near = table[i]
+                if ship & blocked:
+                    break
+                blocked |= near
+                slots.append(i)
+            else:
+                res.extend(slots)
+        return res
+
+    gen = np.random.default_rng(seed)
+    counts = [len(ship_slots(size, len_)[0]) for len_ in lens]
+    conflicts = [[conflict_array(size, lens[i], lens[j]) for i in range(j)] for j in range(k)]
+    batch = 1 << 16
+    while len(res) < n * k and tried <= attempts * (len(res) // k + 1):
+        tried += batch
+        cols = [gen.integers(0, counts[0], batch)]
+        for j in range(1, k):
+            col = gen.integers(0, counts[j], len(cols[0]))
+            ok = np.ones(len(col), dtype=bool)
+            for i in range(j):
+                ok &= ~conflicts[j][i][cols[i], col]
+            cols = [c[ok] for c in cols]
+            cols.append(col[ok])
+        got = np.stack(cols, axis=1).astype(np.uint16)
+        res.frombytes(got[:n - len(res) // k].tobytes())
+    return res
+
+
+class LayoutPool:
+    """
+    Запас готовых расстановок флота для быстрого создания досок в большом
+    количестве партий. Расстановки хранятся в кольцевом буфере array('H')
+    номерами положений кораблей (len(lens) чисел на расстановку)
+    и строятся функцией sample_layouts() пачками по batch штук: в текущем
+    процессе или в фоне в нескольких процессах. Когда в запасе остаётся
+    меньше low расстановок, запас пополняется до capacity.
+
+    Равновероятность расстановок можно проверить методом uniformity().
+
+    Attributes
+    ----------
+    size : int
+        Размер игрового поля.
+
+    lens : list
+        Длины кораблей флота (от длинных к коротким).
 
-        self.busy = []
+    capacity : int
+        Наибольшее количество расстановок в запасе.
 
+    low : int
+        Порог пополнения запаса.
 
-class Player:
-    """
-    Основной класс игроков.
+    batch : int
+        Количество расстановок в одной пачке.
 
-    Attributes
-    ----------
-    board : класс Board
-        Игровая доска - поле пользователя.
+    workers : int
+        Количество процессов для построения расстановок; если не задано,
+        расстановки строятся в текущем процессе.
 
-    enemy : класс Board
-        Игровая доска - поле противника.
+    uniform : bool
+        Равновероятный выбор среди допустимых расстановок (см. sample_layouts()).
+
+    stats : Counter
+        Счётчики: built (построено расстановок), taken (выдано), refills
+        (пачек заказано), waits (сколько раз запас был пуст и пришлось ждать).
 
     Methods
     -------
-    ask()
-        Данный метод будет определён в наследственных классах игроков.
+    take()
+        Выдаёт следующую расстановку из запаса.
 
-    move()
-        Данный метод в бесконечном цикле пытается сделать выстрел.
-        Если выстрел прошёл хорошо, то возвращается к условию нужно
-        ли делать следующий выстрел. При возникновении исключений
-        печатает соответствующее исключение.
+    board()
+        Создаёт игровую доску по следующей расстановке.
 
-    """
+    refill()
+        Пополняет запас, если он опустился ниже порога.
 
-    def __init__(self, board, enemy):
-        """
-        Устанавливает все необходимые атрибуты для объекта Board.
+    uniformity()
+        Проверяет равновероятность расстановок критерием хи-квадрат.
 
-        :param board: класс Board Игровая доска - поле пользователя.
-        :param enemy: класс Board Игровая доска - поле противника.
-        """
-        self.board = board
-        self.enemy = enemy
+    close()
+        Останавливает процессы, если они были запущены.
 
-    def ask(self):
-        raise NotImplementedError()
+    """
 
-    def move(self):
+    def __init__(self, size=10, lens=None, capacity=4096, low=1024, batch=1024, workers=None, uniform=True,
+                 seed=None):
         """
-        Данный метод в бесконечном цикле пытается сделать выстрел.
-        Если выстрел прошёл хорошо, то возвращается к условию нужно
-        ли делать следующий выстрел. При возникновении исключений
-        печатает соответствующее исключение.
-        :return: bool значение результата выстрела (True при попадании).
+        Если флот нельзя расставить на поле заданного размера, вызывает
+        исключение BoardWrongShipException().
+
+        :param size: int Размер игрового поля.
+        :param lens: list Список длин кораблей (None - флот FLEET).
+        :param capacity: int Наибольшее количество расстановок в запасе.
+        :param low: int Порог пополнения запаса.
+        :param batch: int Количество расстановок в одной пачке.
+        :param workers: int Количество процессов для построения расстановок.
+        :param uniform: bool Равновероятный выбор среди допустимых расстановок.
+        :param seed: int Зерно генератора, из которого берутся зёрна пачек.
         """
 
-        while True:
-            try:
-                target = self.ask()
-                repeat = self.enemy.shot(target)
-                return repeat
-            except BoardException as e:
-                print(e)
-
-
-class AI(Player):
-    """
-    Класс игрока - компьютера (AI).
+        self.size = size
+        self.lens = sorted(lens if lens is not None else FLEET, reverse=True)
+        if fleet_layout(size, self.lens) is None:
+            raise BoardWrongShipException(f"Флот {self.lens} нельзя расставить на поле {size} x {size}")
+
+        self.capacity = capacity
+        self.low = min(low, capacity)
+        self.batch = batch
+        self.workers = workers
+        self.uniform = uniform
+        self.rng = random.Random(seed)
+        self.stats = Counter()
+
+        self.data = array("H", bytes(2 * capacity * len(self.lens)))
+        self.head = 0
+        self.count = 0
+        self.pending = []
+        self.tables = [ship_slots(size, len_)[0] for len_ in self.lens]
+        self._executor = None
 
-    Methods
-    -------
-    ask()
-        Данный метод выбирает точку выстрела из списка неприцельных
-        выстрелов, если список прицельных выстрелов пуст.
+    def __getstate__(self):
+        # пул процессов и заказанные пачки не передаются в другие процессы.
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        state["pending"] = []
+        return state
 
-    """
+    def __len__(self):
+        return self.count
 
-    def ask(self):
+    def push(self, layouts):
         """
-        Данный метод выбирает точку выстрела из списка неприцельных
-        выстрелов, если список прицельных выстрелов пуст.
+        Добавляет расстановки в запас; те, что не поместились, отбрасываются.
 
-        :return: Dot(x, y) координаты выстрела.
+        :param layouts: array('H') Расстановки из sample_layouts().
         """
 
-        if self.enemy.aim():
-            d = choice(self.enemy.aim())
-        else:
-            d = choice(self.enemy.not_aim())
+        k = len(self.lens)
+        n = min(len(layouts) // k, self.capacity - self.count)
+        tail = (self.head + self.count) % self.capacity
+        first = min(n, self.capacity - tail)
+        self.data[tail * k:(tail + first) * k] = layouts[:first * k]
+        self.data[:(n - first) * k] = layouts[first * k:n * k]
+        self.count += n
+        self.stats["built"] += len(layouts) // k
 
-        print(f"Ход компьютера: {L_R[d.x + 1]} {d.y + 1}")
-        return d
+    def refill(self):
+        """
+        Забирает готовые пачки и, если в запасе меньше low расстановок,
+        заказывает новые: в фоне, если заданы workers, иначе строит их сразу.
+        """
 
+        while self.pending and self.pending[0].done():
+            self.push(self.pending.pop(0).result())
 
-class User(Player):
-    """
-    Класс игрока - пользователя.
+        if self.count >= self.low and self.count:
+            return
 
-    Methods
-    -------
-    ask()
-        Данный метод запрашивает у пользователя координаты выстрела,
-        попутно делая проверки на корректность вводимых данных.
+        if not self.workers or self.workers < 2:
+            self.stats["refills"] += 1
+            self.push(sample_layouts(self.size, self.lens, self.capacity - self.count,
+                                     self.rng.getrandbits(64), self.uniform))
+            return
 
-    """
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(self.workers)
+        while self.count + len(self.pending) * self.batch < self.capacity:
+            self.stats["refills"] += 1
+            self.pending.append(self._executor.submit(
+                sample_layouts, self.size, self.lens, self.batch, self.rng.getrandbits(64), self.uniform
+            ))
 
-    def ask(self):
+    def take(self):
         """
-        Данный метод запрашивает у пользователя координаты выстрела,
-        попутно делая проверки на корректность вводимых данных.
+        Выдаёт следующую расстановку из запаса. Если запас пуст, ждёт
+        заказанную пачку. Если расставить флот так и не удалось,
+        вызывает исключение BoardWrongShipException().
 
-        :return: Dot(x, y) координаты выстрела.
+        :return: array('H') номера положений кораблей в ship_slots().
         """
 
-        while True:
+        if self.count < self.low or not self.count:
+            self.refill()
+        if not self.count:
+            self.stats["waits"] += 1
+            while not self.count and self.pending:
+                self.push(self.pending.pop(0).result())
+            if not self.count:
+                raise BoardWrongShipException(f"Не удалось расставить флот {self.lens} на поле {self.size} x {self.size}")
+
+        k = len(self.lens)
+        layout = self.data[self.head * k:(self.head + 1) * k]
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+        self.stats["taken"] += 1
+        return layout
+
+    def board(self, board_cls=Board, quiet=False):
+        """
+        Создаёт игровую доску по следующей расстановке из запаса.
 
-            cords = input("Ваш ход: ").split()
+        :param board_cls: Класс игровой доски (Board или BitBoard).
+        :param quiet: bool Отключает вывод сообщений о результатах выстрелов.
+        :return: Board
+        """
 
-            if len(cords) != 2:
-                print(" Введите 2 координаты! ")
-                continue
+        board = board_cls(size=self.size, quiet=quiet)
+        board.place([Ship(table[i][0], len_, table[i][1]) for len_, table, i in zip(self.lens, self.tables, self.take())])
+        return board
 
-            x, y = cords
-            x = x.upper()
+    def uniformity(self, n, max_layouts=200_000):
+        """
+        Проверяет равновероятность расстановок критерием хи-квадрат:
+        берёт n расстановок из запаса и сравнивает частоту каждой
+        с ожидаемой n / L, где L - количество всех допустимых расстановок
+        (их перебирает Solver, поэтому проверка возможна для маленьких полей).
+
+        :param n: int Количество проверяемых расстановок.
+        :param max_layouts: int Наибольшее количество перебираемых расстановок.
+        :return: tuple(chi2, dof, z) - статистика, число степеней свободы
+                 и её нормальное приближение (Уилсона - Хилферти): при
+                 равновероятных расстановках |z| обычно меньше 3.
+        """
 
-            # проверка: является ли x буквой, только одна буква, буква из латинского алфавита.
-            if not x.isalpha() or len(x) > 1 or x not in L_R:
-                print(" Первой координатой введите \n соответствующую латинскую букву! ")
-                continue
+        from strategies import Solver
 
-            if not (y.isdigit()):
-                print(" Второй координатой введите цифру! ")
-                continue
+        total = Solver(self.size, self.lens, max_layouts=max_layouts).layouts
+        seen = Counter()
+        for _ in range(n):
+            layout = self.take()
+            # одинаковые корабли в расстановке не различаются.
+            seen[tuple(sorted(zip(self.lens, layout)))] += 1
+
+        expected = n / total
+        chi2 = sum((k - expected) ** 2 for k in seen.values()) / expected + (total - len(seen)) * expected
+        dof = max(total - 1, 1)
+        z = ((chi2 / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / (2 / (9 * dof)) ** 0.5
+        return chi2, dof, z
 
-            x = L_R.index(x)
-            x, y = int(x), int(y)
+    def close(self):
+        """
+        Останавливает процессы, если они были запущены.
+        """
 
-            return Dot(x - 1, y - 1)
+        self.pending = []
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
 
 
 class Game:
@@ -620,6 +2692,21 @@ class Game:
     lens : list
         Список с размерами кораблей - длина в клетках.
 
+    pool : LayoutPool
+        Запас готовых расстановок (None - корабли расставляются из rng).
+
+    turn : int
+        Чей ход в игровом цикле: 0 - пользователя, 1 - компьютера.
+
+    greet_delay : float
+        Пауза после приветствия в секундах (0 - без паузы).
+
+    events : GameEvents
+        События и счётчики партии (None - пока не вызван attach()).
+
+    move_delay : float
+        Пауза до и после хода компьютера в секундах (0 - без паузы).
+
     pl : Board
         Игровая доска - поле пользователя.
 
@@ -638,8 +2725,8 @@ class Game:
         Создаёт случайную игровую доску.
 
     random_place()
-        В цикле до 2000 раз пытается расставить корабли на игровой доске
-        в случайном порядке, после 2000 неудачных попыток вызывает исключение.
+        Расставляет корабли на игровой доске в случайном порядке
+        функцией place_fleet().
 
     print_board()
         Метод служит для вывода в консоль игровых полей.
@@ -654,15 +2741,54 @@ class Game:
     start()
         Метод запуска игры.
 
-    """
+    simulate()
+        Проигрывает партию компьютер против компьютера без ввода-вывода.
 
-    def __init__(self, size=10):
-        """
-        Устанавливает все необходимые атрибуты для объекта Game.
+    player_rng()
+        Создаёт генератор случайных чисел для игрока.
+
+    new_ai()
+        Создаёт игрока - компьютер по классу или стратегии.
+
+    attach()
+        Подключает события партии и подписчика.
+
+    snapshot()
+        Запоминает состояние обеих досок.
+
+    restore()
+        Возвращает обе доски к запомненному состоянию.
+
+    save()
+        Сохраняет партию в компактном двоичном виде.
 
-        :param size: int Размер игрового поля
+    load()
+        Восстанавливает сохранённую партию.
 
-        lens : list Список с размерами кораблей - длина в клетках.
+    """
+
+    def __init__(self, size=10, quiet=False, board_cls=Board, rng=None, renderer=None, lens=None,
+                 greet_delay=2.0, move_delay=1.0, pool=None, boards=None):
+        """
+        Устанавливает все необходимые атрибуты для объекта Game. Если флот
+        нельзя расставить на поле заданного размера, вызывает исключение
+        BoardWrongShipException().
+
+        :param size: int Размер игрового поля (от 1 до len(L_R) - 1).
+        :param quiet: bool Отключает вывод сообщений на игровых досках.
+        :param board_cls: Класс игровой доски (Board или BitBoard).
+        :param rng: random.Random Генератор случайных чисел партии. Из него
+                    расставляются корабли и берутся зёрна генераторов игроков.
+        :param renderer: TerminalRenderer Отрисовка досок с обновлением только
+                         изменившихся клеток (None - полный вывод каждый ход).
+        :param lens: list Список с размерами кораблей - длина в клетках
+                     (None - флот FLEET).
+        :param greet_delay: float Пауза после приветствия в секундах.
+        :param move_delay: float Пауза до и после хода компьютера в секундах.
+        :param pool: LayoutPool Запас расстановок для того же поля и флота
+                     (None - корабли расставляются из rng).
+        :param boards: tuple Готовые доски пользователя и компьютера (например,
+                       из сохранённой партии, см. load()); None - случайные доски.
 
         pl : Board Игровая доска - поле пользователя.
 
@@ -674,49 +2800,131 @@ class Game:
 
         """
 
-        self.lens = [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]
+        if not 1 <= size < len(L_R):
+            raise ValueError(f"размер поля должен быть от 1 до {len(L_R) - 1}")
+
+        self.lens = list(lens) if lens is not None else list(FLEET)
         self.size = size
-        pl = self.random_board()
-        co = self.random_board()
+        self.quiet = quiet
+        self.board_cls = board_cls
+        self.rng = rng if rng is not None else random.Random()
+        self.renderer = renderer
+        self.greet_delay = greet_delay
+        self.move_delay = move_delay
+        self.events = None
+        self.pool = pool
+        if pool is not None and (pool.size != size or pool.lens != sorted(self.lens, reverse=True)):
+            raise ValueError(f"Запас расстановок для поля {pool.size} x {pool.size} и флота {pool.lens}")
+        if fleet_layout(size, self.lens) is None:
+            raise BoardWrongShipException(f"Флот {self.lens} нельзя расставить на поле {size} x {size}")
+        if boards is not None:
+            pl, co = boards
+        else:
+            pl = self.random_board()
+            co = self.random_board()
         co.hid = True
+        self.turn = 0
 
-        self.ai = AI(co, pl)
+        self.ai = AI(co, pl, rng=self.player_rng())
         self.us = User(pl, co)
 
     def random_board(self):
         """
         Создаёт игровую доску со случайным расположением кораблей.
+        Если задан запас pool, расстановка берётся из него, иначе
+        из random_fleet().
 
         :return: Board возвращает случайную игровую доску.
         """
 
-        board = None
-        while board is None:
-            board = self.random_place()
+        if self.pool is not None:
+            return self.pool.board(self.board_cls, self.quiet)
+
+        board = self.board_cls(size=self.size, quiet=self.quiet)
+        board.place(random_fleet(self.size, self.lens, self.rng))
         return board
 
+    def attach(self, listener=None, events=None):
+        """
+        Подключает к обеим доскам объект событий (один на партию)
+        и добавляет в него подписчика.
+
+        :param listener: Подписчик с методами on_shot(), on_turn() и т. д.
+        :param events: GameEvents Общий объект событий для нескольких партий
+                       (None - создать новый, если партия ещё без событий).
+        :return: GameEvents
+        """
+
+        if events is not None or self.events is None:
+            self.events = events if events is not None else GameEvents()
+            self.us.board.events = self.events
+            self.ai.board.events = self.events
+        if listener is not None:
+            self.events.subscribe(listener)
+        return self.events
+
+    def player_rng(self):
+        """
+        Создаёт генератор случайных чисел для игрока с зерном из генератора партии.
+
+        :return: random.Random
+        """
+
+        return random.Random(self.rng.getrandbits(64))
+
+    def snapshot(self):
+        """
+        Запоминает состояние партии для перебора вариантов: выстрелы
+        можно делать прямо на досках, а затем отменить их методом restore().
+
+        :return: tuple Снимок для restore().
+        """
+
+        return self.us.board.snapshot(), self.ai.board.snapshot()
+
+    def restore(self, snap):
+        """
+        Возвращает обе доски к состоянию снимка.
+
+        :param snap: tuple Снимок, полученный из snapshot().
+        """
+
+        self.us.board.restore(snap[0])
+        self.ai.board.restore(snap[1])
+
+    def new_ai(self, player, board, enemy):
+        """
+        Создаёт игрока - компьютер со своим генератором случайных чисел.
+
+        :param player: Класс AI (или функция с параметрами board, enemy, rng)
+                       либо объект Strategy, который будет передан AI.
+        :param board: класс Board Игровая доска игрока.
+        :param enemy: класс Board Игровая доска противника.
+        :return: AI
+        """
+
+        if isinstance(player, Strategy):
+            return AI(board, enemy, player, rng=self.player_rng())
+        return player(board, enemy, rng=self.player_rng())
+
     def random_place(self):
         """
-        В цикле до 2000 раз пытается расставить корабли на игровой доске
-        в случайном порядке, после 2000 неудачных попыток вызывает исключение.
+        Расставляет корабли на игровой доске в случайном порядке.
+        Положения выбираются только среди допустимых (см. place_fleet()),
+        поэтому попытка занимает ограниченное время.
 
-        :return: Board С кораблями расставленными в случайном порядке.
+        :return: Board С кораблями расставленными в случайном порядке
+                 или None, если расстановка зашла в тупик.
 
         """
 
-        board = Board(size=self.size)
-        attempts = 0
-        for len_ in self.lens:
-            while True:
-                attempts += 1
-                if attempts > 2000:
-                    return None
-                ship = Ship(Dot(randint(0, self.size), randint(0, self.size)), len_, randint(0, 3))
-                try:
-                    board.add_ship(ship)
-                    break
-                except BoardWrongShipException:
-                    pass
+        ships = place_fleet(self.size, self.lens, self.rng)
+        if ships is None:
+            return None
+
+        board = self.board_cls(size=self.size, quiet=self.quiet)
+        for ship in ships:
+            board.add_ship(ship)
         board.begin()
         return board
 
@@ -725,19 +2933,16 @@ class Game:
         Метод служит для вывода в консоль игровых полей.
         """
 
-        pl = self.us.board.__str__().splitlines()
-        ai = self.ai.board.__str__().splitlines()
-        pl_inf = 'Доска пользователя:'
-        ai_inf = 'Доска компьютера:'
-        width = len(pl[0])
-        pl.insert(0, pl_inf.ljust(width))
-        ai.insert(0, ai_inf.ljust(width))
-        print('-' * 95)
-        for i in range(len(pl)):
-            print(pl[i] + '    *    ' + ai[i])
+        boards = [self.us.board, self.ai.board]
+        titles = ['Доска пользователя:', 'Доска компьютера:']
+        if self.renderer is not None:
+            self.renderer.draw(boards, titles)
+            return
+
+        for line in board_lines(boards, titles):
+            print(line)
 
-    @staticmethod
-    def greet():
+    def greet(self):
         """
         Приветственное сообщение игроку с объяснением правил
         ввода координат хода.
@@ -752,45 +2957,606 @@ class Game:
         print("|        x - латинская буква строки       |")
         print("|        y - номер столбца                |")
         print("|*****************************************|")
-        time.sleep(2)
+        if self.greet_delay:
+            time.sleep(self.greet_delay)
 
     def loop(self):
         """
-        Игровой цикл.
+        Игровой цикл. Начинается с хода turn, поэтому восстановленная
+        партия (см. load()) продолжается с того же места.
         """
-        num = 0
+        num = self.turn
         while True:
+            self.turn = num % 2
             self.print_board()
+            if self.events is not None:
+                self.events.turn(self, num % 2)
 
             if num % 2 == 0:
                 print(set_color("Ходит пользователь!", Color.green))
                 repeat = self.us.move()
             else:
                 print(set_color("Ходит компьютер!", Color.blue))
-                time.sleep(1)
+                if self.move_delay:
+                    time.sleep(self.move_delay)
                 repeat = self.ai.move()
-                time.sleep(1)
+                if self.move_delay:
+                    time.sleep(self.move_delay)
             if repeat:
                 num -= 1
 
             if self.ai.board.defeat():
                 self.print_board()
                 print(set_color("Пользователь выиграл!!!", Color.green))
+                if self.events is not None:
+                    self.events.game_over(self, 0)
                 break
 
             if self.us.board.defeat():
                 self.print_board()
                 print(set_color("Компьютер выиграл!!!", Color.red_1))
+                if self.events is not None:
+                    self.events.game_over(self, 1)
                 break
             num += 1
 
+    def save(self):
+        """
+        Сохраняет партию в компактном двоичном формате (см. records.SAVE_MAGIC):
+        корабли и выстрелы обеих досок в кодировке записей партий, чей ход
+        и зерно генератора компьютера. Зерно берётся из генератора, и генератор
+        засевается им заново, поэтому каждое сохранение меняет дальнейшие
+        случайные числа партии, но сохранённая партия продолжается так же,
+        как исходная. Контуры не сохраняются: они следуют из выстрелов
+        по правилам игры.
+
+        :return: bytes
+        """
+
+        from records import RECORD_BOARD, RECORD_EVENT, RECORD_SHIP, SAVE_HEADER, SAVE_MAGIC, SAVE_RNG
+
+        events = bytearray()
+        for i, board in enumerate((self.us.board, self.ai.board)):
+            flag = RECORD_BOARD if i else 0
+            for ship in board.ships:
+                events += RECORD_EVENT.pack(flag | RECORD_SHIP | ship.bow.x << 5 | ship.bow.y, ship.len_ << 2 | ship.ori)
+        for i, board in enumerate((self.us.board, self.ai.board)):
+            flag = RECORD_BOARD if i else 0
+            lives = {}
+            for d in board.shot_order():
+                ship = board.ship_at.get(d)
+                if ship is None:
+                    result = Shot.miss
+                else:
+                    lives[ship] = lives.get(ship, ship.len_) - 1
+                    result = Shot.sunk if lives[ship] == 0 else Shot.hit
+                events += RECORD_EVENT.pack(flag | d.x << 5 | d.y, result)
+
+        # вместо состояния Mersenne Twister (2.5 КБ) сохраняется зерно, которым
+        # генератор компьютера засевается заново.
+        seed = self.ai.rng.getrandbits(64)
+        self.ai.rng.seed(seed)
+        return b"".join((
+            SAVE_MAGIC,
+            SAVE_HEADER.pack(self.size, self.turn, len(events) // RECORD_EVENT.size),
+            events,
+            SAVE_RNG.pack(seed),
+        ))
+
+    @classmethod
+    def load(cls, data, board_cls=Board, quiet=False, renderer=None, greet_delay=2.0, move_delay=1.0):
+        """
+        Восстанавливает партию, сохранённую методом save(): корабли
+        расставляются без проверок (Board.place()), выстрелы повторяются
+        на досках и сверяются с сохранёнными результатами. Партию можно
+        продолжить методом loop().
+
+        :param data: bytes Сохранённая партия (bytes, memoryview или срез mmap).
+        :param board_cls: Класс игровой доски.
+        :return: Game
+        """
+
+        from records import RECORD_EVENT, RECORD_SHIP, SAVE_HEADER, SAVE_MAGIC, SAVE_RNG
+
+        data = memoryview(data)
+        if data[:len(SAVE_MAGIC)] != SAVE_MAGIC:
+            raise ValueError("Неизвестный формат сохранённой партии")
+        pos = len(SAVE_MAGIC)
+        size, turn, count = SAVE_HEADER.unpack_from(data, pos)
+        pos += SAVE_HEADER.size
+
+        boards = (board_cls(size=size, quiet=True), board_cls(size=size, quiet=True))
+        fleets = ([], [])
+        shots = []
+        for cell, value in RECORD_EVENT.iter_unpack(data[pos:pos + count * RECORD_EVENT.size]):
+            d = Dot(cell >> 5 & 31, cell & 31)
+            if cell & RECORD_SHIP:
+                fleets[cell >> 15].append(Ship(d, value >> 2, value & 3))
+            else:
+                shots.append((boards[cell >> 15], d, value))
+        pos += count * RECORD_EVENT.size
+
+        for board, fleet in zip(boards, fleets):
+            board.place(fleet)
+        for board, d, value in shots:
+            number = board.count
+            hit = board.shot(d)
+            if value != (Shot.sunk if board.count != number else Shot.hit if hit else Shot.miss):
+                raise ValueError("Сохранённая партия не совпадает с правилами игры")
+        for board in boards:
+            board.quiet = quiet
+
+        game = cls(size=size, quiet=quiet, board_cls=board_cls, renderer=renderer,
+                   lens=[ship.len_ for ship in fleets[0]], greet_delay=greet_delay, move_delay=move_delay,
+                   boards=boards)
+        game.turn = turn
+        game.ai.rng.seed(SAVE_RNG.unpack_from(data, pos)[0])
+        return game
+
     def start(self):
         """
         Метод запуска игры.
         """
         self.greet()
-        self.loop()
+        try:
+            self.loop()
+        finally:
+            if self.renderer is not None:
+                self.renderer.close()
+
+    def simulate(self, first=AI, second=AI, writer=None):
+        """
+        Проигрывает партию компьютер против компьютера без ввода-вывода
+        и пауз. Место пользователя занимает ещё один AI, он ходит первым.
+
+        :param first: Класс AI или стратегия игрока, который ходит первым.
+        :param second: Класс AI или стратегия игрока, который ходит вторым.
+        :param writer: GameWriter Запись партии (доска пользователя
+                       получает номер 0, доска компьютера - 1).
+        :return: GameResult Итог партии.
+        """
+
+        if writer is not None:
+            writer.attach(self.us.board)
+            writer.attach(self.ai.board)
+
+        players = [
+            self.new_ai(first, self.us.board, self.ai.board),
+            self.new_ai(second, self.ai.board, self.us.board),
+        ]
+        result = GameResult()
+        events = self.events
+        num = 0
+        while True:
+            i = num % 2
+            if events is not None:
+                events.turn(self, i)
+            enemy = players[i].enemy
+            d = players[i].ask()
+            count = enemy.count
+            repeat = enemy.shot(d)
+            result.shots[i] += 1
+
+            if enemy.count != count:
+                ship = enemy.ship_at[d]
+                result.sunk[i].append((ship.len_, result.shots[i]))
+
+                if enemy.defeat():
+                    result.winner = i
+                    if writer is not None:
+                        writer.end_game(i)
+                    if events is not None:
+                        events.game_over(self, i)
+                    return result
+
+            if not repeat:
+                num += 1
+
+
+class GameEvents:
+    """
+    События партии для подписчиков и встроенные счётчики. Объект
+    подключается к доскам (атрибут events, см. Game.attach()), после чего
+    Board.shot(), AI.ask(), aim(), not_aim(), Game.loop() и Game.simulate()
+    сами сообщают о событиях. Пока events равен None, доски и игроки
+    только проверяют этот атрибут.
+
+    Подписчик - объект с любыми из методов:
+    on_shot(board, d, result) - выстрел по доске board, result - код Shot;
+    on_hit(board, d, ship) - корабль ранен;
+    on_sink(board, d, ship) - корабль уничтожен;
+    on_turn(game, player) - ход игрока (0 - пользователь или первый AI);
+    on_game_over(game, winner) - конец партии.
+
+    Attributes
+    ----------
+    listeners : dict
+        Имя события -> список функций подписчиков.
+
+    games : int
+        Количество законченных партий.
+
+    shots, hits, sunk, turns : int
+        Количество выстрелов, попаданий, уничтоженных кораблей и ходов.
+
+    game_shots : list
+        Количество выстрелов в каждой законченной партии.
+
+    timings : dict
+        Имя замера ("ask", "aim", "not_aim") -> [вызовы, общее время, максимум]
+        в секундах. BitBoard замеряет вызовы aim() и not_aim(), а Board, у которого
+        оба набора готовы заранее, - их обновление в shot(): "not_aim" - свободные
+        клетки (и контур уничтоженного корабля), "aim" - update_targets().
+
+    Methods
+    -------
+    subscribe()
+        Подключает подписчика.
+
+    on()
+        Подключает одну функцию к событию.
+
+    summary()
+        Сводка счётчиков в виде словаря.
+
+    """
+
+    NAMES = ("on_shot", "on_hit", "on_sink", "on_turn", "on_game_over")
+
+    def __init__(self):
+        self.listeners = {name: [] for name in self.NAMES}
+        self.games = 0
+        self.shots = 0
+        self.hits = 0
+        self.sunk = 0
+        self.turns = 0
+        self.game_shots = []
+        self.timings = {name: [0, 0.0, 0.0] for name in ("ask", "aim", "not_aim")}
+        self._shots = 0
+
+    def subscribe(self, listener):
+        """
+        Подключает методы подписчика с именами из NAMES.
+
+        :param listener: Объект с методами on_shot(), on_hit() и т. д.
+        :return: listener
+        """
+
+        for name in self.NAMES:
+            fn = getattr(listener, name, None)
+            if fn is not None:
+                self.listeners[name].append(fn)
+        return listener
+
+    def on(self, name, fn):
+        """
+        Подключает функцию к событию.
+
+        :param name: str Имя события из NAMES.
+        :param fn: Функция с параметрами события.
+        :return: fn
+        """
+
+        if name not in self.listeners:
+            raise ValueError(f"Неизвестное событие: {name}")
+        self.listeners[name].append(fn)
+        return fn
+
+    def shot(self, board, d, result, ship=None):
+        self.shots += 1
+        self._shots += 1
+        for fn in self.listeners["on_shot"]:
+            fn(board, d, result)
+        if result == Shot.hit:
+            self.hits += 1
+            for fn in self.listeners["on_hit"]:
+                fn(board, d, ship)
+        elif result == Shot.sunk:
+            self.hits += 1
+            self.sunk += 1
+            for fn in self.listeners["on_sink"]:
+                fn(board, d, ship)
+
+    def turn(self, game, player):
+        self.turns += 1
+        for fn in self.listeners["on_turn"]:
+            fn(game, player)
+
+    def game_over(self, game, winner):
+        self.games += 1
+        self.game_shots.append(self._shots)
+        self._shots = 0
+        for fn in self.listeners["on_game_over"]:
+            fn(game, winner)
+
+    def timed(self, name, start):
+        """
+        Учитывает время вызова, начавшегося в момент start (time.perf_counter()).
+        """
+
+        spent = time.perf_counter() - start
+        timing = self.timings[name]
+        timing[0] += 1
+        timing[1] += spent
+        if spent > timing[2]:
+            timing[2] = spent
+
+    def summary(self):
+        """
+        :return: dict Счётчики и среднее/максимальное время замеров в микросекундах.
+        """
+
+        return {
+            "games": self.games,
+            "shots": self.shots,
+            "hits": self.hits,
+            "sunk": self.sunk,
+            "turns": self.turns,
+            "mean_game_shots": sum(self.game_shots) / len(self.game_shots) if self.game_shots else 0.0,
+            "timings": {
+                name: {
+                    "calls": calls,
+                    "mean_us": total / calls * 1e6 if calls else 0.0,
+                    "max_us": top * 1e6,
+                }
+                for name, (calls, total, top) in self.timings.items()
+            },
+        }
+
+
+class GameResult:
+    """
+    Итог партии, сыгранной без участия пользователя.
+
+    Attributes
+    ----------
+    winner : int
+        Номер победившего игрока (0 - ходил первым, 1 - вторым).
+
+    shots : list
+        Количество выстрелов, сделанных каждым игроком.
+
+    sunk : list
+        Для каждого игрока список пар (длина корабля, номер выстрела),
+        на котором был уничтожен очередной корабль противника.
+    """
+
+    def __init__(self):
+        self.winner = None
+        self.shots = [0, 0]
+        self.sunk = [[], []]
+
+    def __repr__(self):
+        return f"GameResult(winner={self.winner}, shots={self.shots})"
+
+
+def simulate(n, size=10, board_cls=Board, first=AI, second=AI, writer=None, lens=None):
+    """
+    Проигрывает n партий компьютер против компьютера без ввода-вывода.
+    Результаты выдаются по одному, поэтому генератор подходит и для
+    очень длинных серий.
+
+    :param n: int Количество партий.
+    :param size: int Размер игрового поля.
+    :param board_cls: Класс игровой доски (Board или BitBoard).
+    :param first: Класс AI или стратегия игрока, который ходит первым.
+    :param second: Класс AI или стратегия игрока, который ходит вторым.
+    :param writer: GameWriter Запись партий.
+    :param lens: list Состав флота (None - FLEET).
+    :return: generator[GameResult]
+    """
+
+    for _ in range(n):
+        yield Game(size=size, quiet=True, board_cls=board_cls, lens=lens).simulate(first, second, writer)
+
+
+def game_seed(seed, i):
+    """
+    Зерно генератора случайных чисел для i-й партии турнира. Зависит только
+    от общего зерна и номера партии, поэтому любую партию можно повторить
+    независимо от количества процессов и порядка их выполнения.
+
+    :param seed: int Зерно турнира.
+    :param i: int Номер партии.
+    :return: int Зерно партии.
+    """
+
+    return random.Random(f"{seed}:{i}").getrandbits(64)
+
+
+def seeded_game(seed, i, size=10, board_cls=Board, first=AI, second=AI, lens=None):
+    """
+    Проигрывает i-ю партию турнира с зерном seed.
+
+    :return: GameResult Итог партии.
+    """
+
+    rng = random.Random(game_seed(seed, i))
+    return Game(size=size, quiet=True, board_cls=board_cls, rng=rng, lens=lens).simulate(first, second)
+
+
+class TournamentStats:
+    """
+    Сводная статистика серии партий. Статистики отдельных процессов
+    объединяются методом merge(), результат не зависит от порядка объединения.
+
+    Attributes
+    ----------
+    games : int
+        Количество сыгранных партий.
+
+    wins : list
+        Количество побед каждого игрока.
+
+    shots : list
+        Для каждого игрока распределение Counter: количество выстрелов
+        за партию -> количество партий.
+
+    winning_shots : Counter
+        Распределение количества выстрелов победителя.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = [0, 0]
+        self.shots = [Counter(), Counter()]
+        self.winning_shots = Counter()
+
+    def add(self, result):
+        """
+        Учитывает итог одной партии.
+
+        :param result: GameResult Итог партии.
+        """
+
+        self.games += 1
+        self.wins[result.winner] += 1
+        for i in range(2):
+            self.shots[i][result.shots[i]] += 1
+        self.winning_shots[result.shots[result.winner]] += 1
+
+    def merge(self, other):
+        """
+        Добавляет к статистике статистику другой серии партий.
+
+        :param other: TournamentStats
+        """
+
+        self.games += other.games
+        for i in range(2):
+            self.wins[i] += other.wins[i]
+            self.shots[i].update(other.shots[i])
+        self.winning_shots.update(other.winning_shots)
+
+    def win_rate(self, i):
+        """
+        :param i: int Номер игрока.
+        :return: float Доля побед игрока.
+        """
+
+        return self.wins[i] / self.games if self.games else 0.0
+
+    def mean_shots(self, i):
+        """
+        :param i: int Номер игрока.
+        :return: float Среднее количество выстрелов игрока за партию.
+        """
+
+        return sum(k * v for k, v in self.shots[i].items()) / self.games if self.games else 0.0
+
+    def __repr__(self):
+        return (f"TournamentStats(games={self.games}, wins={self.wins}, "
+                f"win_rate=[{self.win_rate(0):.3f}, {self.win_rate(1):.3f}])")
+
+
+# функция, которая проигрывает партии с номерами из диапазона в одном процессе.
+def play_chunk(seed, start, stop, size, board_cls, first, second, lens=None):
+    stats = TournamentStats()
+    for i in range(start, stop):
+        stats.add(seeded_game(seed, i, size, board_cls, first, second, lens))
+    return stats
+
+
+def tournament(n, seed=0, workers=None, chunk=None, size=10, board_cls=Board, first=AI, second=AI, lens=None):
+    """
+    Турнир из n партий компьютер против компьютера, распределённый
+    по процессам ProcessPoolExecutor. Каждая партия получает своё зерно
+    game_seed(seed, i), поэтому итог турнира одинаков при любом количестве
+    процессов, а любая партия воспроизводится функцией seeded_game().
+    Процессы возвращают только сводную статистику, а не итоги партий.
+
+    :param n: int Количество партий.
+    :param seed: int Зерно турнира.
+    :param workers: int Количество процессов (None - по числу ядер,
+                    1 - все партии в текущем процессе).
+    :param chunk: int Количество партий в одном задании процесса.
+    :param size: int Размер игрового поля.
+    :param board_cls: Класс игровой доски (Board или BitBoard).
+    :param first: Класс AI или стратегия игрока, который ходит первым.
+    :param second: Класс AI или стратегия игрока, который ходит вторым.
+    :param lens: list Состав флота (None - FLEET).
+    :return: TournamentStats Сводная статистика турнира.
+    """
+
+    if workers == 1:
+        return play_chunk(seed, 0, n, size, board_cls, first, second, lens)
 
+    if chunk is None:
+        chunk = max(1, min(1000, n // 64))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    stats = TournamentStats()
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(play_chunk, seed, start, min(start + chunk, n), size, board_cls, first, second, lens)
+            for start in range(0, n, chunk)
+        ]
+        for future in futures:
+            stats.merge(future.result())
+    return stats
+
+
+def main(argv=None):
+    """
+    Точка входа: python -m Sea_Battle или python Sea_Battle.py. Без параметров
+    запускает игру пользователя против компьютера на поле 10 x 10,
+    с ключом --serve - TCP-сервер (см. server.serve()).
+
+    :param argv: list Аргументы командной строки (None - sys.argv).
+    """
 
-g = Game()
-g.start()
+    import argparse
+
+    from strategies import STRATEGIES
+
+    parser = argparse.ArgumentParser(prog="python -m Sea_Battle", description="Морской бой против компьютера.")
+    parser.add_argument("--size", type=int, default=10, help="размер поля (от 1 до %d)" % (len(L_R) - 1))
+    parser.add_argument("--fleet", type=int, nargs="+", help="длины кораблей (по умолчанию %s)" % " ".join(map(str, FLEET)))
+    parser.add_argument("--board", choices=["Board", "BitBoard"], default="Board", help="класс игровой доски")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="hunt", help="стратегия компьютера")
+    parser.add_argument("--seed", type=int, help="зерно генератора случайных чисел")
+    parser.add_argument("--greet-delay", type=float, default=2.0, help="пауза после приветствия, с")
+    parser.add_argument("--move-delay", type=float, default=1.0, help="пауза вокруг хода компьютера, с")
+    parser.add_argument("--plain", action="store_true", help="выводить доски целиком каждый ход")
+    parser.add_argument("--serve", action="store_true", help="запустить TCP-сервер вместо игры в консоли")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес сервера")
+    parser.add_argument("--port", type=int, default=8765, help="порт сервера")
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.size < len(L_R):
+        parser.error(f"размер поля должен быть от 1 до {len(L_R) - 1}")
+    try:
+        layout = fleet_layout(args.size, args.fleet or FLEET)
+    except FleetSearchException as e:
+        parser.error(str(e))
+    if layout is None:
+        parser.error(f"флот нельзя расставить на поле {args.size} x {args.size}")
+
+    if args.serve:
+        import asyncio
+
+        from server import serve
+        try:
+            asyncio.run(serve(args.host, args.port, size=args.size, strategy=STRATEGIES[args.strategy],
+                              lens=args.fleet))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    rng = random.Random(args.seed) if args.seed is not None else None
+    renderer = TerminalRenderer() if sys.stdout.isatty() and not args.plain else None
+    g = Game(size=args.size, board_cls=globals()[args.board], rng=rng, renderer=renderer, lens=args.fleet,
+             greet_delay=args.greet_delay, move_delay=args.move_delay)
+    g.ai.strategy = STRATEGIES[args.strategy]()
+    try:
+        g.start()
+    except (KeyboardInterrupt, EOFError):
+        print()
+
+
+if __name__ == "__main__":
+    # модули strategies, server и env импортируют Sea_Battle, поэтому игра запускается
+    # из импортированного модуля: иначе классы __main__ и Sea_Battle были бы разными.
+    import Sea_Battle
+    Sea_Battle.main()
@@ -0,0 +1,364 @@
+"""
+Микробенчмарки горячих участков игрового движка Sea_Battle.
+
+Запуск:
+    python benchmark.py                       # все замеры для поля 10 x 10
+    python benchmark.py --sizes 10 16 26      # несколько размеров поля
+    python benchmark.py --fleet 5 4 3 3 2     # другой состав флота
+    python benchmark.py --only pool_board     # доски из запаса расстановок LayoutPool
+    python benchmark.py --only game_memory --budget  # память на партию, код 1 при превышении MEMORY_BUDGET
+    python benchmark.py --out bench.json      # результаты в файл JSON
+    python benchmark.py --profile cprofile    # топ функций cProfile по каждому замеру
+    python benchmark.py --profile tracemalloc # топ строк по выделенной памяти
+
+Результаты выводятся в формате JSON, чтобы их можно было сравнивать
+между версиями.
+"""
+
+import argparse
+import cProfile
+import gc
+import json
+import platform
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+
+import Sea_Battle as sb
+
+# Доли занятых клеток поля, при которых замеряются aim() и not_aim().
+# Board пересчитывает оба набора в shot(), и замер aim/not_aim для него
+# показывает только стоимость обращения к готовому набору; полную цену
+# хода вместе с пересчётом даёт замер shot_aim.
+FILLS = (0.0, 0.25, 0.5, 0.75)
+
+# Допустимая память одной незаконченной партии: (байт на партию, байт на клетку поля).
+# Учитываются обе доски, оба игрока и их генераторы случайных чисел, но не общие
+# для размера поля таблицы: game_memory() строит их до замера.
+MEMORY_BUDGET = {"Board": (40000, 56), "BitBoard": (31000, 24)}
+
+# Количество одновременно хранимых партий и ходов каждой стороны в замере game_memory.
+MEMORY_GAMES = 100
+MEMORY_MOVES = 40
+
+
+def timed(fn, repeat, number):
+    """
+    Замеряет время вызова fn: repeat серий по number вызовов.
+
+    :return: dict лучшее и среднее время одного вызова в микросекундах.
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+
+    best = min(times)
+    return {
+        "best_us": best * 1e6,
+        "mean_us": sum(times) / len(times) * 1e6,
+        "ops_per_s": 1 / best if best else None,
+    }
+
+
+def profiled(fn, mode, top):
+    """
+    Выполняет fn под cProfile или tracemalloc.
+
+    :return: list топ top самых затратных функций или строк кода.
+    """
+
+    if mode == "cprofile":
+        prof = cProfile.Profile()
+        prof.runcall(fn)
+        stats = pstats.Stats(prof)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+        return [
+            {
+                "function": f"{path}:{line}({name})",
+                "calls": calls,
+                "tottime_s": tottime,
+                "cumtime_s": cumtime,
+            }
+            for (path, line, name), (_, calls, tottime, cumtime, _) in rows
+        ]
+
+    tracemalloc.start()
+    try:
+        fn()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    return [
+        {"line": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+
+
+def filled_board(board_cls, size, fill, rng, args):
+    """
+    Создаёт доску с кораблями и обстреливает её, пока доля занятых
+    клеток не достигнет fill (останавливается, если корабли кончились).
+    """
+
+    game = sb.Game(size=size, quiet=True, board_cls=board_cls, rng=rng, lens=args.fleet)
+    board = game.us.board
+    cells = [d for row in sb.dot_table(size) for d in row]
+    rng.shuffle(cells)
+
+    need = fill * size * size
+    for d in cells:
+        if len(board.busy) >= need or board.defeat():
+            break
+        try:
+            board.shot(d)
+        except sb.BoardException:
+            pass
+    return board
+
+
+def shoot_all(board_cls, size, rng, args, query=False):
+    """
+    Готовит функцию, которая обстреливает свежую доску во всех клетках
+    в случайном порядке, и возвращает количество удачных выстрелов.
+    Если query=True, после каждого выстрела вызываются aim() и not_aim(),
+    как при выборе следующего хода.
+    """
+
+    cells = [d for row in sb.dot_table(size) for d in row]
+
+    def run():
+        game = sb.Game(size=size, quiet=True, board_cls=board_cls, rng=rng, lens=args.fleet)
+        board = game.us.board
+        rng.shuffle(cells)
+        shots = 0
+        start = time.perf_counter()
+        for d in cells:
+            try:
+                board.shot(d)
+                shots += 1
+            except sb.BoardException:
+                continue
+            if query:
+                board.aim()
+                board.not_aim()
+        return time.perf_counter() - start, shots
+
+    return run
+
+
+def game_memory(board_cls, size, args):
+    """
+    Замеряет через tracemalloc, сколько памяти занимает одна партия
+    AI против AI после MEMORY_MOVES ходов каждой стороны, пока
+    в памяти одновременно хранятся MEMORY_GAMES таких партий. Перед
+    замером играется одна такая же партия, чтобы общие для размера
+    поля таблицы (точки, положения и контуры кораблей всех длин) уже были
+    построены и не делились на партии замера; она доигрывается до конца,
+    чтобы был уничтожен хотя бы один корабль каждой длины.
+
+    :return: dict память на партию в байтах и время на партию.
+    """
+
+    def play(seed, moves=MEMORY_MOVES):
+        game = sb.Game(size=size, quiet=True, board_cls=board_cls, rng=random.Random(seed), lens=args.fleet)
+        first = game.new_ai(sb.AI, game.us.board, game.ai.board)
+        for _ in range(moves):
+            for player in (first, game.ai):
+                if not player.enemy.defeat():
+                    player.enemy.shot(player.ask())
+        return game, first
+
+    play(args.seed - 1, size * size)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        games = [play(args.seed + i) for i in range(MEMORY_GAMES)]
+        spent = time.perf_counter() - start
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    per_game = (current - base) / len(games)
+    return {
+        "best_us": None,
+        "mean_us": spent / len(games) * 1e6,
+        "ops_per_s": len(games) / spent,
+        "bytes_per_game": per_game,
+        "peak_bytes_per_game": (peak - base) / len(games),
+        "budget_bytes": memory_budget(board_cls, size),
+    }
+
+
+def memory_budget(board_cls, size):
+    """
+    :return: int допустимая память одной партии в байтах (None - бюджет не задан).
+    """
+
+    budget = MEMORY_BUDGET.get(board_cls.__name__)
+    if budget is None:
+        return None
+    base, per_cell = budget
+    return base + per_cell * size * size
+
+
+def benchmarks(board_cls, size, args):
+    """
+    Перечисляет замеры для одного класса доски и размера поля. Подготовка
+    замера (партии, запас расстановок, обстрелянные доски) выполняется
+    только для замеров, выбранных ключом --only, и у каждого замера свой
+    генератор из зерна --seed, поэтому результат замера не зависит от того,
+    какие ещё замеры выполняются.
+
+    :return: generator[(name, params, fn, measure)] - fn используется
+             для профилирования, measure() выполняет замер.
+    """
+
+    repeat, number = args.repeat, args.number
+
+    def wanted(*names):
+        return not args.only or any(name in args.only for name in names)
+
+    if wanted("random_board", "random_place"):
+        game = sb.Game(size=size, quiet=True, board_cls=board_cls, rng=random.Random(args.seed), lens=args.fleet)
+        yield "random_board", {}, game.random_board, lambda: timed(game.random_board, repeat, number)
+        yield "random_place", {}, game.random_place, lambda: timed(game.random_place, repeat, number)
+
+    if wanted("pool_board"):
+        pool = sb.LayoutPool(size, args.fleet, capacity=repeat * number + 1, low=0, seed=args.seed)
+
+        def pool_board():
+            return pool.board(board_cls, True)
+
+        def pool_measure():
+            # запас заполняется заранее, чтобы замерялось только создание доски.
+            pool.refill()
+            return timed(pool_board, repeat, number)
+
+        yield "pool_board", {}, pool_board, pool_measure
+
+    def per_shot(run):
+        total = done = 0
+        for _ in range(repeat):
+            spent, n = run()
+            total += spent
+            done += n
+        per_shot = total / done
+        return {"best_us": None, "mean_us": per_shot * 1e6, "ops_per_s": 1 / per_shot}
+
+    if wanted("shot"):
+        run = shoot_all(board_cls, size, random.Random(args.seed), args)
+        yield "shot", {}, run, lambda: per_shot(run)
+
+    if wanted("shot_aim"):
+        # выстрел вместе с aim() и not_aim(): для Board сюда входит пересчёт наборов.
+        run_aim = shoot_all(board_cls, size, random.Random(args.seed), args, query=True)
+        yield "shot_aim", {}, run_aim, lambda: per_shot(run_aim)
+
+    if wanted("aim", "not_aim"):
+        for fill in FILLS:
+            board = filled_board(board_cls, size, fill, random.Random(args.seed), args)
+            params = {"fill": fill, "busy": len(board.busy)}
+            yield "aim", params, board.aim, lambda b=board: timed(b.aim, repeat, number * 10)
+            yield "not_aim", params, board.not_aim, lambda b=board: timed(b.not_aim, repeat, number * 10)
+
+    ship = sb.Ship(sb.Dot(0, 0), 4, 2)
+
+    def dots():
+        return ship.dots
+
+    def build():
+        return sb.Ship(sb.Dot(0, 0), 4, 2)
+
+    yield "ship_dots", {"len": 4}, dots, lambda: timed(dots, repeat, number * 10)
+    yield "ship_new", {"len": 4}, build, lambda: timed(build, repeat, number * 10)
+
+    if wanted("game"):
+        rng = random.Random(args.seed)
+
+        def play():
+            return sb.Game(size=size, quiet=True, board_cls=board_cls, rng=rng, lens=args.fleet).simulate()
+
+        yield "game", {}, play, lambda: timed(play, repeat, max(1, number // 10))
+
+    params = {"games": MEMORY_GAMES, "moves": MEMORY_MOVES}
+    yield "game_memory", params, lambda: game_memory(board_cls, size, args), lambda: game_memory(board_cls, size, args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Микробенчмарки движка Sea_Battle.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10],
+                        help="размеры поля (от 1 до %d)" % (len(sb.L_R) - 1))
+    parser.add_argument("--fleet", type=int, nargs="+", help="длины кораблей (по умолчанию Sea_Battle.FLEET)")
+    parser.add_argument("--boards", nargs="+", default=["Board", "BitBoard"],
+                        help="классы досок для замеров")
+    parser.add_argument("--only", nargs="+", help="выполнить только замеры с этими именами")
+    parser.add_argument("--repeat", type=int, default=5, help="количество серий замера")
+    parser.add_argument("--number", type=int, default=100, help="вызовов в одной серии")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора случайных чисел")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"],
+                        help="добавить к каждому замеру топ затратных мест")
+    parser.add_argument("--top", type=int, default=10, help="длина топа при профилировании")
+    parser.add_argument("--out", help="файл для результатов (по умолчанию stdout)")
+    parser.add_argument("--budget", action="store_true",
+                        help="завершиться с кодом 1, если game_memory превышает MEMORY_BUDGET")
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        if not 1 <= size < len(sb.L_R):
+            parser.error(f"размер поля должен быть от 1 до {len(sb.L_R) - 1}")
+        try:
+            layout = sb.fleet_layout(size, args.fleet or sb.FLEET)
+        except sb.FleetSearchException as e:
+            parser.error(str(e))
+        if layout is None:
+            parser.error(f"флот нельзя расставить на поле {size} x {size}")
+
+    results = []
+    over = []
+    for name in args.boards:
+        board_cls = getattr(sb, name)
+        for size in args.sizes:
+            for bench, params, fn, measure in benchmarks(board_cls, size, args):
+                if args.only and bench not in args.only:
+                    continue
+                res = {"name": bench, "board": name, "size": size, "params": params, **measure()}
+                if args.profile:
+                    res["profile"] = profiled(fn, args.profile, args.top)
+                results.append(res)
+                print(f"{name:9} {size:3} {bench:13} {params} {res['mean_us']:.2f} us", file=sys.stderr)
+                if args.budget and res.get("budget_bytes") and res["bytes_per_game"] > res["budget_bytes"]:
+                    over.append(res)
+                    print(f"{name:9} {size:3} {bench:13} {res['bytes_per_game']:.0f} B > "
+                          f"{res['budget_bytes']} B", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": sb.load_numpy().__version__ if sb.load_numpy() is not None else None,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "args": vars(args),
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+"""
+Векторные движки и среды для обучения: BatchGame (обстрел тысяч досок
+массивами numpy), SeaBattleEnv и SeaBattleVecEnv.
+"""
+
+import random
+from array import array
+
+import Sea_Battle
+from Sea_Battle import (
+    FLEET, L_R, Board, BoardOutException, BoardWrongShipException, Cell, Shot, dot_table, fleet_layout,
+    random_fleet, sample_layouts, ship_slots, slot_contours,
+)
+
+# numpy импортируется при первом использовании, как и в Sea_Battle (см. load_numpy()).
+np = None
+
+
+def load_numpy():
+    """
+    Импортирует numpy через Sea_Battle.load_numpy() и сохраняет модуль
+    в глобальной переменной np этого модуля.
+
+    :return: модуль numpy или None, если пакет не установлен.
+    """
+
+    global np
+    if np is None:
+        np = Sea_Battle.load_numpy()
+    return np
+
+
+# Таблицы клеток положений кораблей для BatchGame, ключ - (размер поля, длины кораблей).
+_batch_tables = {}
+
+
+def batch_tables(size, kinds):
+    """
+    Клетки всех положений кораблей заданных длин в виде массивов numpy:
+    положения длины kinds[0] идут первыми, затем kinds[1] и т. д.
+
+    :param size: int Размер игрового поля.
+    :param kinds: tuple Разные длины кораблей флота.
+    :return: tuple(offsets, ship, near, horiz) - dict длина -> номер первого
+             положения этой длины, булевы массивы (положения x клетки) клеток
+             корабля и корабля с контуром, горизонтален ли корабль.
+    """
+
+    key = (size, kinds)
+    if key not in _batch_tables:
+        n = size * size
+        nbytes = (n + 7) // 8
+        offsets, ship, near, horiz = {}, [], [], []
+
+        def unpack(mask):
+            return np.unpackbits(np.frombuffer(mask.to_bytes(nbytes, "little"), dtype=np.uint8), bitorder="little")[:n]
+
+        for len_ in kinds:
+            offsets[len_] = len(ship)
+            for (bow, ori, dots), (ship_mask, near_mask) in zip(ship_slots(size, len_)[0], slot_contours(size, len_)):
+                ship.append(unpack(ship_mask))
+                near.append(unpack(near_mask))
+                horiz.append(ori == 2)
+        _batch_tables[key] = (offsets, np.array(ship, dtype=bool), np.array(near, dtype=bool), np.array(horiz))
+    return _batch_tables[key]
+
+
+class BatchGame:
+    """
+    Пакет из n партий, в которых компьютер стреляет по полю противника,
+    для оценки стратегий на большом количестве расстановок. Доски хранятся
+    массивами numpy (строка - доска, столбец - клетка x * size + y), и один
+    вызов step() делает по выстрелу на каждой неоконченной доске сразу:
+    попадания, уничтожение кораблей (жизни как у Ship.lives) и контуры
+    (как в Board.contour()) обрабатываются операциями над массивами,
+    без объектов Board, Ship и Dot.
+
+    Стратегии choose() - векторные версии RandomStrategy и HuntTargetStrategy.
+    Прицельные клетки строятся как в Board.update_targets(): соседи раненого
+    корабля с одним попаданием и продолжения линии попаданий, если их
+    несколько (совпадает с Board, пока попадания идут подряд - так стреляет
+    сама стратегия).
+
+    Attributes
+    ----------
+    n : int
+        Количество досок.
+
+    size : int
+        Размер игрового поля.
+
+    lens : list
+        Длины кораблей флота (от длинных к коротким).
+
+    cells : numpy.ndarray uint8
+        Состояние клеток (коды Cell), массив n x (size * size).
+
+    ship_id : numpy.ndarray int8
+        Номер корабля в клетке (в порядке lens) или -1.
+
+    slots : numpy.ndarray int
+        Номера положений кораблей в таблицах batch_tables(), массив n x len(lens).
+
+    lives : numpy.ndarray int8
+        Количество жизней кораблей, массив n x len(lens).
+
+    count : numpy.ndarray int
+        Количество уничтоженных кораблей на каждой доске.
+
+    shots : numpy.ndarray int
+        Количество выстрелов по каждой доске.
+
+    done : numpy.ndarray bool
+        Уничтожен ли весь флот на доске.
+
+    across, along : numpy.ndarray bool
+        Попадания по раненым кораблям, от которых прицельные выстрелы
+        идут по горизонтали (across) и по вертикали (along).
+
+    Methods
+    -------
+    free()
+        Клетки, по которым ещё можно стрелять.
+
+    targets()
+        Клетки для прицельных выстрелов.
+
+    choose()
+        Выбирает по выстрелу для каждой доски.
+
+    step()
+        Делает по выстрелу на каждой неоконченной доске.
+
+    run()
+        Доигрывает все партии.
+
+    """
+
+    # Стратегии, которые есть в векторном виде.
+    POLICIES = ("random", "hunt")
+
+    def __init__(self, n, size=10, lens=None, seed=None, uniform=True, pool=None):
+        """
+        Если numpy не установлен, вызывает исключение ImportError.
+
+        :param n: int Количество досок.
+        :param size: int Размер игрового поля.
+        :param lens: list Список длин кораблей (None - флот FLEET).
+        :param seed: int Зерно генератора случайных чисел (расстановки и выстрелы).
+        :param uniform: bool Равновероятный выбор среди допустимых расстановок
+                        (см. sample_layouts()).
+        :param pool: LayoutPool Запас расстановок для того же поля и флота
+                     (None - расстановки строятся sample_layouts()).
+        """
+
+        if load_numpy() is None:
+            raise ImportError("Для BatchGame требуется пакет numpy")
+
+        self.n = n
+        self.size = size
+        self.lens = sorted(lens if lens is not None else FLEET, reverse=True)
+        self.rng = np.random.default_rng(seed)
+        k = len(self.lens)
+
+        if pool is not None:
+            if pool.size != size or pool.lens != self.lens:
+                raise ValueError(f"Запас расстановок для поля {pool.size} x {pool.size} и флота {pool.lens}")
+            layouts = array("H")
+            for _ in range(n):
+                layouts.extend(pool.take())
+        else:
+            if fleet_layout(size, self.lens) is None:
+                raise BoardWrongShipException(f"Флот {self.lens} нельзя расставить на поле {size} x {size}")
+            layouts = sample_layouts(size, self.lens, n, int(self.rng.integers(1 << 63)), uniform)
+            if len(layouts) < n * k:
+                raise BoardWrongShipException(f"Не удалось расставить флот {self.lens} на поле {size} x {size}")
+
+        offsets, self.ship_cells, self.near_cells, horiz = batch_tables(size, tuple(sorted(set(self.lens), reverse=True)))
+        first = np.array([offsets[len_] for len_ in self.lens])
+        self.slots = np.frombuffer(layouts, dtype=np.uint16).reshape(n, k).astype(np.intp) + first
+
+        self.ship_id = np.full((n, size * size), -1, dtype=np.int8)
+        for i in range(k):
+            self.ship_id[self.ship_cells[self.slots[:, i]]] = i
+        self.cells = np.where(self.ship_id >= 0, Cell.ship, Cell.empty).astype(np.uint8)
+        self.lens_array = np.array(self.lens, dtype=np.int8)
+        self.lives = np.tile(self.lens_array, (n, 1))
+        self.horiz = horiz[self.slots]
+        self.across = np.zeros((n, size * size), dtype=bool)
+        self.along = np.zeros((n, size * size), dtype=bool)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.shots = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+
+    def free(self):
+        """
+        :return: numpy.ndarray bool Клетки, по которым ещё можно стрелять
+                 (как Board.not_aim()).
+        """
+
+        return self.cells <= Cell.ship
+
+    def targets(self, rows=None):
+        """
+        Клетки для прицельных выстрелов по раненым кораблям (как Board.aim()).
+
+        :param rows: numpy.ndarray int Номера досок (None - все доски).
+        :return: numpy.ndarray bool
+        """
+
+        size = self.size
+        if rows is None:
+            rows = slice(None)
+        across, along = self.across[rows], self.along[rows]
+        n = len(across)
+
+        row = across.reshape(n, size, size)
+        col = along.reshape(n, size, size)
+        res = np.zeros((n, size, size), dtype=bool)
+        res[:, :, 1:] |= row[:, :, :-1]
+        res[:, :, :-1] |= row[:, :, 1:]
+        res[:, 1:, :] |= col[:, :-1, :]
+        res[:, :-1, :] |= col[:, 1:, :]
+        return res.reshape(n, size * size) & (self.cells[rows] <= Cell.ship)
+
+    def choose(self, policy="hunt"):
+        """
+        Выбирает по выстрелу для каждой неоконченной доски: случайную клетку
+        среди прицельных (для policy="hunt"), а если их нет - среди свободных.
+
+        :param policy: str "random" или "hunt".
+        :return: numpy.ndarray int Номера клеток (для оконченных досок - 0).
+        """
+
+        if policy not in self.POLICIES:
+            raise ValueError(f"Неизвестная стратегия {policy!r}, есть: {', '.join(self.POLICIES)}")
+
+        rows = np.flatnonzero(~self.done)
+        pick = self.cells[rows] <= Cell.ship
+        if policy == "hunt":
+            targets = self.targets(rows)
+            pick = np.where(targets.any(axis=1, keepdims=True), targets, pick)
+
+        # равновероятный выбор: клетка с наибольшим случайным ключом.
+        keys = self.rng.random(pick.shape, dtype=np.float32)
+        keys[~pick] = -1.0
+        res = np.zeros(self.n, dtype=np.intp)
+        res[rows] = keys.argmax(axis=1)
+        return res
+
+    def step(self, shots):
+        """
+        Делает по выстрелу на каждой неоконченной доске. Если какая-то
+        клетка вне поля (в том числе отрицательный номер), уже обстреляна
+        или помечена контуром, вызывает исключение BoardOutException(),
+        как Board.shot(), и ничего не меняет. Номера для оконченных досок
+        не проверяются.
+
+        :param shots: numpy.ndarray int Номера клеток (x * size + y) для всех n досок.
+        :return: numpy.ndarray int Результаты (коды Shot), -1 для оконченных досок.
+        """
+
+        shots = np.asarray(shots)
+        if shots.shape != (self.n,) or not np.issubdtype(shots.dtype, np.integer):
+            raise ValueError(f"Нужно {self.n} целых номеров клеток, получено {shots.dtype} {shots.shape}")
+        rows = np.flatnonzero(~self.done)
+        cells = shots[rows].astype(np.intp)
+        if ((cells < 0) | (cells >= self.size * self.size)).any():
+            raise BoardOutException()
+        if (self.cells[rows, cells] > Cell.ship).any():
+            raise BoardOutException()
+
+        sid = self.ship_id[rows, cells]
+        hit = sid >= 0
+        self.cells[rows, cells] = np.where(hit, Cell.hit, Cell.miss)
+        self.shots[rows] += 1
+
+        hit_rows, hit_ships = rows[hit], sid[hit].astype(np.intp)
+        self.lives[hit_rows, hit_ships] -= 1
+        lives = self.lives[hit_rows, hit_ships]
+        sunk = lives == 0
+
+        # попадания раненых кораблей, от которых ищутся следующие клетки: пока
+        # попадание одно - во все стороны, потом - только вдоль корабля.
+        ship = self.ship_cells[self.slots[hit_rows, hit_ships]]
+        hits = ship & (self.cells[hit_rows] == Cell.hit) & ~sunk[:, None]
+        single = (self.lens_array[hit_ships] - lives == 1)[:, None]
+        horiz = self.horiz[hit_rows, hit_ships][:, None]
+        self.across[hit_rows] = self.across[hit_rows] & ~ship | hits & (horiz | single)
+        self.along[hit_rows] = self.along[hit_rows] & ~ship | hits & (~horiz | single)
+
+        sunk_rows = hit_rows[sunk]
+        if len(sunk_rows):
+            block = self.cells[sunk_rows]
+            near = self.near_cells[self.slots[sunk_rows, hit_ships[sunk]]]
+            block[near & (block == Cell.empty)] = Cell.contour
+            self.cells[sunk_rows] = block
+            self.count[sunk_rows] += 1
+            self.done[sunk_rows] = self.count[sunk_rows] == len(self.lens)
+
+        res = np.full(self.n, -1, dtype=np.int8)
+        res[rows] = Shot.miss
+        res[hit_rows] = Shot.hit
+        res[sunk_rows] = Shot.sunk
+        return res
+
+    def run(self, policy="hunt"):
+        """
+        Доигрывает все партии стратегией policy.
+
+        :return: numpy.ndarray int Количество выстрелов до уничтожения флота на каждой доске.
+        """
+
+        while not self.done.all():
+            self.step(self.choose(policy))
+        return self.shots.copy()
+
+
+class SeaBattleEnv:
+    """
+    Среда для обучения стратегий стрельбы в стиле Gym: reset() начинает
+    эпизод на новой доске противника, step() делает выстрел. Эпизод
+    заканчивается, когда весь флот уничтожен.
+
+    Наблюдение - заранее выделенный буфер кодов Seen размером size x size:
+    доска пишет в него сама при каждом выстреле (Board.view), поэтому
+    между шагами ничего не копируется и не разбирается. С numpy observation -
+    массив numpy поверх того же буфера, без numpy - memoryview.
+
+    Доски создаются без партии Game: расстановка берётся из запаса pool
+    (LayoutPool.board()) или из random_fleet() и ставится на пустую доску
+    методом place().
+
+    Attributes
+    ----------
+    size : int
+        Размер игрового поля.
+
+    lens : list
+        Длины кораблей флота.
+
+    board_cls : type
+        Класс игровой доски.
+
+    pool : LayoutPool
+        Запас расстановок или None.
+
+    rng : random.Random
+        Генератор расстановок.
+
+    board : Board
+        Доска противника текущего эпизода.
+
+    observation : numpy.ndarray или memoryview
+        Наблюдение (коды Seen), обновляется на месте.
+
+    rewards : tuple
+        Награды за промах, попадание и уничтожение корабля (по кодам Shot).
+
+    shots : int
+        Количество выстрелов в текущем эпизоде.
+
+    done : bool
+        Закончен ли эпизод.
+
+    Methods
+    -------
+    reset()
+        Начинает новый эпизод.
+
+    step()
+        Делает выстрел.
+
+    """
+
+    def __init__(self, size=10, lens=None, board_cls=Board, seed=None, pool=None, rewards=(-1.0, -1.0, -1.0),
+                 buffer=None):
+        """
+        :param size: int Размер игрового поля.
+        :param lens: list Список длин кораблей (None - флот FLEET).
+        :param board_cls: Класс игровой доски (Board или BitBoard).
+        :param seed: int Зерно генератора расстановок.
+        :param pool: LayoutPool Запас расстановок для того же поля и флота.
+        :param rewards: tuple Награды за промах, попадание и уничтожение корабля;
+                        по умолчанию -1 за каждый выстрел, и сумма наград
+                        эпизода - минус количество выстрелов.
+        :param buffer: Записываемый буфер из size * size байт (например, часть
+                       общего буфера SeaBattleVecEnv); None - выделить свой.
+        """
+
+        if not 1 <= size < len(L_R):
+            raise ValueError(f"размер поля должен быть от 1 до {len(L_R) - 1}")
+        self.size = size
+        self.lens = list(lens) if lens is not None else list(FLEET)
+        if pool is not None and (pool.size != size or pool.lens != sorted(self.lens, reverse=True)):
+            raise ValueError(f"Запас расстановок для поля {pool.size} x {pool.size} и флота {pool.lens}")
+        if pool is None and fleet_layout(size, self.lens) is None:
+            raise BoardWrongShipException(f"Флот {self.lens} нельзя расставить на поле {size} x {size}")
+        self.board_cls = board_cls
+        self.pool = pool
+        self.rng = random.Random(seed)
+        self.rewards = rewards
+        self.buffer = memoryview(buffer if buffer is not None else bytearray(size * size)).cast("B")
+        if load_numpy() is not None:
+            self.observation = np.frombuffer(self.buffer, dtype=np.uint8).reshape(size, size)
+        else:
+            self.observation = self.buffer.cast("B", (size, size))
+        self.board = None
+        self.shots = 0
+        self.done = True
+
+    def reset(self):
+        """
+        Начинает новый эпизод: расставляет флот противника и очищает наблюдение.
+
+        :return: Наблюдение.
+        """
+
+        if self.pool is not None:
+            board = self.pool.board(self.board_cls, True)
+        else:
+            board = self.board_cls(size=self.size, quiet=True)
+            board.place(random_fleet(self.size, self.lens, self.rng))
+        board.hid = True
+        self.board = board
+        self.buffer[:] = bytes(len(self.buffer))
+        self.board.view = self.buffer
+        self.shots = 0
+        self.done = False
+        return self.observation
+
+    def step(self, action):
+        """
+        Делает выстрел. Если клетка вне поля или уже известна (не Seen.unknown),
+        вызывает исключение BoardOutException(), как Board.shot(), и ничего
+        не меняет.
+
+        :param action: int Номер клетки x * size + y.
+        :return: tuple(observation, reward, done, info) - info содержит result
+                 (код Shot) и shots (выстрелов в эпизоде).
+        """
+
+        if self.done:
+            raise RuntimeError("Эпизод закончен, нужен reset()")
+        if not 0 <= action < len(self.buffer):
+            raise BoardOutException()
+
+        board = self.board
+        count = board.count
+        hit = board.shot(dot_table(self.size)[action // self.size][action % self.size])
+        result = Shot.sunk if board.count != count else Shot.hit if hit else Shot.miss
+        self.shots += 1
+        self.done = board.defeat()
+        return self.observation, self.rewards[result], self.done, {"result": result, "shots": self.shots}
+
+
+class SeaBattleVecEnv:
+    """
+    Несколько сред SeaBattleEnv для пакетных прогонов. Наблюдения всех сред
+    лежат в одном общем буфере n x size x size, и каждая доска пишет
+    в свою часть на месте. Закончившаяся среда сразу начинает новый эпизод
+    (в info остаются количество выстрелов законченного эпизода и копия его
+    последнего наблюдения final_observation).
+
+    Attributes
+    ----------
+    envs : list
+        Среды SeaBattleEnv.
+
+    observations : numpy.ndarray или memoryview
+        Наблюдения всех сред (n x size x size).
+
+    Methods
+    -------
+    reset()
+        Начинает новые эпизоды во всех средах.
+
+    step()
+        Делает по выстрелу в каждой среде.
+
+    """
+
+    def __init__(self, n, size=10, lens=None, board_cls=Board, seed=None, pool=None, rewards=(-1.0, -1.0, -1.0)):
+        """
+        :param n: int Количество сред.
+        :param seed: int Зерно, из которого берутся зёрна сред.
+
+        Остальные параметры те же, что у SeaBattleEnv.
+        """
+
+        area = size * size
+        self.buffer = memoryview(bytearray(n * area))
+        rng = random.Random(seed)
+        self.envs = [
+            SeaBattleEnv(size, lens, board_cls, rng.getrandbits(64), pool, rewards, self.buffer[i * area:(i + 1) * area])
+            for i in range(n)
+        ]
+        if load_numpy() is not None:
+            self.observations = np.frombuffer(self.buffer, dtype=np.uint8).reshape(n, size, size)
+        else:
+            self.observations = self.buffer.cast("B", (n, size, size))
+
+    def __len__(self):
+        return len(self.envs)
+
+    def reset(self):
+        """
+        :return: Наблюдения всех сред.
+        """
+
+        for env in self.envs:
+            env.reset()
+        return self.observations
+
+    def step(self, actions):
+        """
+        Делает по выстрелу в каждой среде.
+
+        :param actions: Номера клеток для каждой среды.
+        :return: tuple(observations, rewards, dones, infos) - списки по средам.
+                 Для законченных эпизодов observations уже содержит начало
+                 нового, а последнее наблюдение лежит в info["final_observation"].
+        """
+
+        if len(actions) != len(self.envs):
+            raise ValueError(f"Нужно {len(self.envs)} действий, получено {len(actions)}")
+        rewards, dones, infos = [], [], []
+        for env, action in zip(self.envs, actions):
+            obs, reward, done, info = env.step(int(action))
+            if done:
+                final = bytearray(env.buffer)
+                if load_numpy() is not None:
+                    info["final_observation"] = np.frombuffer(final, dtype=np.uint8).reshape(env.size, env.size)
+                else:
+                    info["final_observation"] = memoryview(final).cast("B", (env.size, env.size))
+                env.reset()
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+        return self.observations, rewards, dones, infos
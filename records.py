@@ -0,0 +1,483 @@
+"""
+Двоичные форматы партий: потоковая запись и чтение записей партий
+(GameWriter, GameReader), формат сохранённой партии (Game.save())
+и архив отложенных партий GameArchive.
+"""
+
+import mmap
+import os
+import struct
+
+from Sea_Battle import Board, Dot, Game, Ship, Shot
+
+
+# Формат файла записей партий: заголовок RECORD_MAGIC, затем блоки партий.
+# Блок партии: RECORD_BLOCK (длина событий в байтах, размер поля, победитель)
+# и события по RECORD_EVENT.itemsize байт. Событие - упакованная клетка
+# (бит 15 - номер доски, бит 14 - корабль/выстрел, биты 5-9 - x, 0-4 - y)
+# и один байт: результат выстрела (Shot) или длина и направление корабля.
+RECORD_MAGIC = b"SBR\x01"
+RECORD_BLOCK = struct.Struct("<IBB")
+RECORD_EVENT = struct.Struct("<HB")
+RECORD_SHIP = 1 << 14
+RECORD_BOARD = 1 << 15
+
+# Формат сохранённой партии (Game.save()): SAVE_MAGIC (последний байт - версия),
+# SAVE_HEADER (размер поля, чей ход, количество событий), события в формате
+# RECORD_EVENT (сначала корабли обеих досок, затем выстрелы по каждой доске
+# по порядку) и SAVE_RNG - 64-битное зерно генератора компьютера: при сохранении
+# генератор заново засевается зерном, взятым из него же, поэтому сохранённая
+# и продолжающаяся партии выбирают одинаковые ходы.
+SAVE_MAGIC = b"SBG\x02"
+SAVE_HEADER = struct.Struct("<BBH")
+SAVE_RNG = struct.Struct("<Q")
+
+
+class GameWriter:
+    """
+    Потоковая запись партий в компактный двоичный файл (только дописывание).
+    Доски подключаются методом attach(), после чего Board.add_ship()
+    и Board.shot() сами передают записи события. Партия целиком
+    записывается в файл методом end_game().
+
+    Attributes
+    ----------
+    file : file
+        Файл, открытый на дописывание.
+
+    boards : list
+        Подключённые доски текущей партии (не больше двух).
+
+    buf : bytearray
+        События текущей партии.
+
+    games : int
+        Количество записанных партий.
+
+    Methods
+    -------
+    attach()
+        Подключает доску к записи.
+
+    ship()
+        Записывает корабль (вызывается из Board.add_ship()).
+
+    shot()
+        Записывает выстрел (вызывается из Board.shot()).
+
+    end_game()
+        Записывает партию в файл и отключает доски.
+
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str Путь к файлу записей. Если файл существует,
+                     партии дописываются в конец.
+        """
+
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(RECORD_MAGIC)
+        self.boards = []
+        self.buf = bytearray()
+        self.size = None
+        self.games = 0
+
+    def attach(self, board):
+        """
+        Подключает доску к записи текущей партии и записывает
+        уже расставленные на ней корабли.
+
+        :param board: Board Игровая доска.
+        :return: int Номер доски в записи.
+        """
+
+        if len(self.boards) == 2:
+            raise ValueError("В партии можно записать только две доски")
+        self.size = board.size
+        self.boards.append(board)
+        board.recorder = self
+        for ship in board.ships:
+            self.ship(board, ship)
+        return len(self.boards) - 1
+
+    def event(self, board, flags, d, value):
+        index = RECORD_BOARD if board is not self.boards[0] else 0
+        self.buf += RECORD_EVENT.pack(index | flags | d.x << 5 | d.y, value)
+
+    def ship(self, board, ship):
+        self.event(board, RECORD_SHIP, ship.bow, ship.len_ << 2 | ship.ori)
+
+    def shot(self, board, d, result):
+        self.event(board, 0, d, result)
+
+    def end_game(self, winner=None):
+        """
+        Записывает текущую партию в файл и отключает доски.
+
+        :param winner: int Номер победителя (None - не известен).
+        """
+
+        self.file.write(RECORD_BLOCK.pack(len(self.buf), self.size or 0, 255 if winner is None else winner))
+        self.file.write(self.buf)
+        for board in self.boards:
+            board.recorder = None
+        self.boards = []
+        self.buf = bytearray()
+        self.games += 1
+
+    def close(self):
+        if self.boards:
+            self.end_game()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecord:
+    """
+    Запись одной партии. События разбираются только при обращении.
+
+    Attributes
+    ----------
+    size : int
+        Размер игрового поля.
+
+    winner : int
+        Номер победителя (None - не известен).
+
+    data : bytes
+        События партии.
+
+    Methods
+    -------
+    events()
+        Перебирает события партии.
+
+    ships()
+        Корабли доски.
+
+    shots()
+        Выстрелы партии по порядку.
+
+    replay()
+        Воспроизводит партию на новых досках.
+
+    """
+
+    def __init__(self, size, winner, data):
+        self.size = size
+        self.winner = None if winner == 255 else winner
+        self.data = data
+
+    def events(self):
+        """
+        :return: generator[(board, is_ship, Dot, value)]
+        """
+
+        for cell, value in RECORD_EVENT.iter_unpack(self.data):
+            yield (cell >> 15, bool(cell & RECORD_SHIP), Dot(cell >> 5 & 31, cell & 31), value)
+
+    def ships(self, board):
+        """
+        :param board: int Номер доски.
+        :return: list[Ship] Корабли доски в порядке расстановки.
+        """
+
+        return [
+            Ship(d, value >> 2, value & 3)
+            for i, is_ship, d, value in self.events() if is_ship and i == board
+        ]
+
+    def shots(self):
+        """
+        :return: list[(board, Dot, result)] Выстрелы по порядку: номер доски,
+                 по которой стреляли, клетка и результат (Shot).
+        """
+
+        return [(i, d, value) for i, is_ship, d, value in self.events() if not is_ship]
+
+    def replay(self, board_cls=Board):
+        """
+        Воспроизводит партию: расставляет корабли на новых досках
+        и повторяет выстрелы, сверяя результаты с записью.
+
+        :param board_cls: Класс игровой доски.
+        :return: generator[(board, Dot, result)] выстрелы по мере воспроизведения,
+                 доски доступны в атрибуте boards.
+        """
+
+        self.boards = [board_cls(size=self.size, quiet=True) for _ in range(2)]
+        started = False
+        for i, is_ship, d, value in self.events():
+            board = self.boards[i]
+            if is_ship:
+                board.add_ship(Ship(d, value >> 2, value & 3))
+                continue
+
+            if not started:
+                for b in self.boards:
+                    b.begin()
+                started = True
+            hit = board.shot(d)
+            result = Shot.miss if not hit else Shot.sunk if board.ship_at[d].lives == 0 else Shot.hit
+            if result != value:
+                raise ValueError("Запись партии не совпадает с правилами игры")
+            yield i, d, result
+
+    def __repr__(self):
+        return f"GameRecord(size={self.size}, winner={self.winner}, events={len(self.data) // RECORD_EVENT.size})"
+
+
+class GameReader:
+    """
+    Чтение файла записей партий через mmap: файл не читается в память
+    целиком, из отображения копируются только байты очередной партии,
+    а события разбираются лишь при обращении к ним.
+
+    Methods
+    -------
+    __iter__()
+        Перебирает записи партий (GameRecord).
+
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str Путь к файлу записей.
+        """
+
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(RECORD_MAGIC)] != RECORD_MAGIC:
+            self.close()
+            raise ValueError("Неизвестный формат файла записей")
+
+    def __iter__(self):
+        data = self.map
+        pos = len(RECORD_MAGIC)
+        while pos + RECORD_BLOCK.size <= len(data):
+            length, size, winner = RECORD_BLOCK.unpack_from(data, pos)
+            pos += RECORD_BLOCK.size
+            yield GameRecord(size, winner, data[pos:pos + length])
+            pos += length
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Формат файла сохранённых партий GameArchive: заголовок ARCHIVE_MAGIC, затем
+# записи ARCHIVE_ENTRY (длина ключа, длина партии), ключ в UTF-8 и партия
+# в формате Game.save(). Запись с нулевой длиной партии удаляет ключ.
+ARCHIVE_MAGIC = b"SBA\x01"
+ARCHIVE_ENTRY = struct.Struct("<HI")
+
+# Архив переписывается методом compact(), когда устаревшие записи (заменённые
+# и удалённые партии) занимают больше ARCHIVE_GARBAGE файла размером не меньше
+# ARCHIVE_COMPACT_MIN байт.
+ARCHIVE_GARBAGE = 0.5
+ARCHIVE_COMPACT_MIN = 1 << 16
+
+
+class GameArchive:
+    """
+    Файл отложенных партий для сервера: партии дописываются в конец файла
+    под строковыми ключами, а в памяти хранится только словарь ключ ->
+    (смещение, длина). Восстановление одной партии читает через mmap лишь
+    её байты и вызывает Game.load(), поэтому тысячи партий на диске не
+    замедляют get(). Устаревшие записи остаются в файле, пока их доля
+    не превысит ARCHIVE_GARBAGE, после чего файл переписывается (compact()).
+
+    Attributes
+    ----------
+    path : str
+        Путь к файлу.
+
+    index : dict
+        Ключ -> (смещение, длина) последней записи партии.
+
+    garbage : int
+        Байты устаревших записей в файле.
+
+    Methods
+    -------
+    put()
+        Сохраняет партию под ключом.
+
+    get()
+        Восстанавливает партию.
+
+    pop()
+        Восстанавливает партию и удаляет её из архива.
+
+    compact()
+        Переписывает файл, оставляя только действующие записи.
+
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str Путь к файлу. Если файл существует, его записи
+                     читаются в индекс (сами партии не разбираются).
+        """
+
+        self.path = os.fspath(path)
+        self.file = open(self.path, "a+b")
+        self.map = None
+        self.index = {}
+        self.file.seek(0)
+        if self.file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            if self.file.tell():
+                self.file.close()
+                raise ValueError("Неизвестный формат файла сохранённых партий")
+            self.file.write(ARCHIVE_MAGIC)
+            self.file.flush()
+
+        data = self.mapped()
+        pos = len(ARCHIVE_MAGIC)
+        while pos + ARCHIVE_ENTRY.size <= len(data):
+            klen, dlen = ARCHIVE_ENTRY.unpack_from(data, pos)
+            pos += ARCHIVE_ENTRY.size
+            key = bytes(data[pos:pos + klen]).decode()
+            pos += klen
+            if dlen:
+                self.index[key] = (pos, dlen)
+            else:
+                self.index.pop(key, None)
+            pos += dlen
+        self.garbage = len(data) - len(ARCHIVE_MAGIC) - sum(
+            self.entry_size(key, length) for key, (_, length) in self.index.items())
+
+    def mapped(self):
+        """
+        :return: mmap Отображение файла (создаётся заново, если файл вырос).
+        """
+
+        size = self.file.seek(0, 2)
+        if self.map is None or len(self.map) < size:
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map
+
+    @staticmethod
+    def entry_size(key, length):
+        """
+        :return: int Размер записи партии длины length под ключом key в файле.
+        """
+
+        return ARCHIVE_ENTRY.size + len(key.encode()) + length
+
+    def write(self, key, data):
+        key = key.encode()
+        self.file.seek(0, 2)
+        pos = self.file.tell() + ARCHIVE_ENTRY.size + len(key)
+        self.file.write(ARCHIVE_ENTRY.pack(len(key), len(data)) + key + data)
+        self.file.flush()
+        return pos
+
+    def put(self, key, game):
+        """
+        Сохраняет партию под ключом (предыдущая партия с этим ключом заменяется).
+
+        :param key: str Ключ, например идентификатор игрока.
+        :param game: Game Партия.
+        """
+
+        data = game.save()
+        old = self.index.get(key)
+        if old is not None:
+            self.garbage += self.entry_size(key, old[1])
+        self.index[key] = (self.write(key, data), len(data))
+        self.collect()
+
+    def get(self, key, **kwargs):
+        """
+        Восстанавливает партию. Если ключа нет, вызывает исключение KeyError.
+
+        :param key: str Ключ.
+        :param kwargs: Параметры Game.load() (board_cls, quiet, renderer и т. д.).
+        :return: Game
+        """
+
+        pos, length = self.index[key]
+        data = self.mapped()
+        return Game.load(data[pos:pos + length], **kwargs)
+
+    def pop(self, key, **kwargs):
+        """
+        Восстанавливает партию и удаляет её из архива.
+
+        :return: Game
+        """
+
+        game = self.get(key, **kwargs)
+        self.write(key, b"")
+        self.garbage += self.entry_size(key, self.index.pop(key)[1]) + self.entry_size(key, 0)
+        self.collect()
+        return game
+
+    def collect(self):
+        """
+        Вызывает compact(), если устаревшие записи занимают больше ARCHIVE_GARBAGE файла.
+        """
+
+        size = self.file.seek(0, 2)
+        if size >= ARCHIVE_COMPACT_MIN and self.garbage > size * ARCHIVE_GARBAGE:
+            self.compact()
+
+    def compact(self):
+        """
+        Переписывает файл: действующие записи копируются во временный файл,
+        который затем атомарно заменяет архив (os.replace()), поэтому при сбое
+        остаётся либо старый, либо новый файл целиком.
+        """
+
+        data = self.mapped()
+        index = {}
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as out:
+            out.write(ARCHIVE_MAGIC)
+            for key, (pos, length) in self.index.items():
+                name = key.encode()
+                out.write(ARCHIVE_ENTRY.pack(len(name), length) + name)
+                index[key] = (out.tell(), length)
+                out.write(data[pos:pos + length])
+
+        self.map.close()
+        self.map = None
+        self.file.close()
+        os.replace(tmp, self.path)
+        self.file = open(self.path, "a+b")
+        self.index = index
+        self.garbage = 0
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
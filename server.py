@@ -0,0 +1,419 @@
+"""
+Асинхронный TCP-сервер морского боя (SeaBattleServer), удалённый игрок
+и простой клиент-бот для проверки сервера.
+"""
+
+import asyncio
+import json
+import random
+
+from Sea_Battle import BoardException, Dot, Game, dot_table, format_dot, parse_move, ship_contour
+
+
+class RemotePlayer:
+    """
+    Игрок, подключённый к серверу по TCP. Сообщения в обе стороны - строки
+    JSON, по одному объекту на строку. Ход игрока - сообщение {"move": "x y"}
+    в формате ввода пользователя, он проверяется функцией parse_move().
+
+    Attributes
+    ----------
+    reader : asyncio.StreamReader
+    writer : asyncio.StreamWriter
+
+    board : Board
+        Игровая доска игрока.
+
+    enemy : Board
+        Игровая доска противника.
+
+    Methods
+    -------
+    send()
+        Отправляет сообщение игроку.
+
+    ask()
+        Ждёт от игрока корректный ход.
+
+    """
+
+    def __init__(self, reader, writer, board=None, enemy=None):
+        self.reader = reader
+        self.writer = writer
+        self.board = board
+        self.enemy = enemy
+
+    async def send(self, msg):
+        """
+        :param msg: dict Сообщение игроку.
+        """
+
+        self.writer.write(json.dumps(msg, ensure_ascii=False).encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self):
+        """
+        Если игрок отключился или прислал строку длиннее предела потока
+        (64 КиБ), вызывает исключение ConnectionError.
+
+        :return: dict Сообщение от игрока.
+        """
+
+        try:
+            line = await self.reader.readline()
+        except (ValueError, asyncio.LimitOverrunError, asyncio.IncompleteReadError) as e:
+            raise ConnectionError("Некорректное сообщение игрока") from e
+        if not line:
+            raise ConnectionError("Игрок отключился")
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            msg = None
+        return msg if isinstance(msg, dict) else {}
+
+    async def ask(self):
+        """
+        Запрашивает ход, пока игрок не пришлёт корректные координаты.
+
+        :return: Dot(x, y) координаты выстрела.
+        """
+
+        await self.send({"type": "turn"})
+        while True:
+            d, error = parse_move(str((await self.receive()).get("move", "")))
+            if error:
+                await self.send({"type": "error", "message": error.strip()})
+                continue
+            return d
+
+
+class AsyncAI:
+    """
+    Обёртка над AI для игры на сервере. Выбор хода выполняется в пуле
+    потоков, поэтому не задерживает цикл событий. У каждой партии свой
+    объект стратегии (см. SeaBattleServer), поэтому потоки не изменяют
+    общих данных.
+
+    Attributes
+    ----------
+    ai : AI
+        Игрок - компьютер.
+
+    executor : concurrent.futures.Executor
+        Пул для вычисления ходов (None - пул цикла событий по умолчанию).
+    """
+
+    def __init__(self, ai, executor=None):
+        self.ai = ai
+        self.board = ai.board
+        self.enemy = ai.enemy
+        self.executor = executor
+
+    async def send(self, msg):
+        pass
+
+    async def ask(self):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.ai.choose)
+
+
+class SeaBattleServer:
+    """
+    Асинхронный TCP-сервер морского боя. Каждая партия - отдельная задача
+    asyncio, поэтому один процесс обслуживает тысячи партий одновременно.
+
+    Первое сообщение клиента выбирает режим: {"mode": "ai"} - игра против
+    компьютера сервера, {"mode": "pvp"} - игра против следующего клиента
+    с тем же режимом. Далее сервер присылает сообщения:
+
+    {"type": "start", "size": ..., "ships": [[...], ...], "first": bool}
+    {"type": "turn"} - ожидается ход {"move": "x y"}
+    {"type": "error", "message": ...} - ход не принят, нужно повторить
+    {"type": "shot", "cell": "x y", "result": "miss" | "hit" | "sunk", "contour": [...]}
+    {"type": "enemy_shot", ...} - то же для выстрела противника
+    {"type": "over", "win": bool, "reason": ...}
+
+    Attributes
+    ----------
+    host : str
+    port : int
+        Порт сервера (0 - выбрать свободный, номер появится после start()).
+
+    size : int
+        Размер игрового поля.
+
+    lens : list
+        Состав флота (None - FLEET).
+
+    strategy : callable
+        Класс стратегии компьютера сервера (или функция без параметров,
+        возвращающая стратегию), None - HuntTargetStrategy. Каждая партия
+        получает свой объект стратегии: стратегии хранят кэши (например,
+        решатели OptimalStrategy), которые нельзя изменять из нескольких
+        потоков пула одновременно.
+
+    executor : concurrent.futures.Executor
+        Пул потоков для ходов компьютера (None - пул цикла событий
+        по умолчанию). Пул процессов не подходит: генератор случайных
+        чисел и кэши стратегии должны оставаться в процессе сервера.
+        Векторные стратегии (density, montecarlo) проводят основное время
+        в numpy вне GIL, поэтому цикл событий почти не ждёт.
+
+    move_timeout : float
+        Время на ход игрока в секундах, после него засчитывается поражение.
+
+    active : int
+        Количество идущих партий.
+
+    played : int
+        Количество завершённых партий.
+
+    Methods
+    -------
+    start()
+        Запускает сервер.
+
+    close()
+        Останавливает сервер.
+
+    handle()
+        Обрабатывает подключение клиента.
+
+    watch()
+        Следит за отключением игрока, ожидающего противника.
+
+    play()
+        Проводит партию между двумя асинхронными игроками.
+
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, size=10, strategy=None, executor=None, move_timeout=300,
+                 lens=None):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.lens = lens
+        self.strategy = strategy
+        self.executor = executor
+        self.move_timeout = move_timeout
+        self.server = None
+        self.waiting = None
+        self.active = 0
+        self.played = 0
+
+    async def start(self):
+        """
+        Запускает сервер и запоминает номер порта.
+
+        :return: asyncio.Server
+        """
+
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        """
+        Обрабатывает подключение клиента: выбор режима и партия.
+        """
+
+        player = RemotePlayer(reader, writer)
+        try:
+            mode = (await player.receive()).get("mode", "ai")
+
+            while mode == "pvp":
+                entry = self.waiting
+                if entry is None:
+                    # ждём второго игрока, партию проведёт его обработчик. Пока игрок
+                    # ждёт, его соединение читает watch(): отключение видно сразу.
+                    finished = asyncio.get_running_loop().create_future()
+                    watch = asyncio.ensure_future(self.watch(player))
+                    entry = self.waiting = (player, watch, finished)
+                    try:
+                        await asyncio.wait({watch})
+                        if watch.cancelled():
+                            await finished
+                    finally:
+                        watch.cancel()
+                        if self.waiting is entry:
+                            self.waiting = None
+                    return
+
+                self.waiting = None
+                first, watch, finished = entry
+                watch.cancel()
+                await asyncio.wait({watch})
+                if not watch.cancelled():
+                    # ожидавший игрок успел отключиться: ждать будет этот игрок.
+                    continue
+                game = Game(size=self.size, quiet=True, lens=self.lens)
+                first.board, first.enemy = game.us.board, game.ai.board
+                player.board, player.enemy = game.ai.board, game.us.board
+                try:
+                    await self.play([first, player])
+                finally:
+                    finished.set_result(None)
+                return
+
+            game = Game(size=self.size, quiet=True, lens=self.lens)
+            player.board, player.enemy = game.us.board, game.ai.board
+            ai = game.ai if self.strategy is None else game.new_ai(self.strategy(), game.ai.board, game.us.board)
+            await self.play([player, AsyncAI(ai, self.executor)])
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch(self, player):
+        """
+        Читает сообщения игрока, ожидающего противника, до отключения.
+        Сообщения до начала партии не нужны и пропускаются. Задачу отменяет
+        обработчик второго игрока, когда начинает партию.
+
+        :param player: RemotePlayer
+        """
+
+        try:
+            while True:
+                await player.receive()
+        except ConnectionError:
+            pass
+
+    async def play(self, players):
+        """
+        Проводит партию между двумя асинхронными игроками по правилам Game.loop():
+        после попадания игрок ходит ещё раз, некорректный ход повторяется.
+
+        :param players: list Игроки с методами ask() и send().
+        :return: int Номер победившего игрока.
+        """
+
+        self.active += 1
+        try:
+            for i, player in enumerate(players):
+                await player.send({
+                    "type": "start",
+                    "size": self.size,
+                    "ships": [[format_dot(d) for d in ship.dots] for ship in player.board.ships],
+                    "first": i == 0,
+                })
+
+            num = 0
+            while True:
+                i = num % 2
+                player, other = players[i], players[1 - i]
+                try:
+                    msg = await asyncio.wait_for(self.move(player), self.move_timeout)
+                except (asyncio.TimeoutError, ConnectionError) as e:
+                    reason = "timeout" if isinstance(e, asyncio.TimeoutError) else "disconnect"
+                    await self.over(other, player, reason)
+                    return 1 - i
+
+                await player.send({"type": "shot", **msg})
+                await other.send({"type": "enemy_shot", **msg})
+
+                if player.enemy.defeat():
+                    await self.over(player, other, "fleet")
+                    return i
+
+                if msg["result"] == "miss":
+                    num += 1
+        finally:
+            self.active -= 1
+            self.played += 1
+
+    async def move(self, player):
+        """
+        Получает от игрока ход и выполняет выстрел, повторяя запрос
+        при исключениях доски.
+
+        :return: dict Описание выстрела для сообщения игрокам.
+        """
+
+        while True:
+            d = await player.ask()
+            try:
+                hit = player.enemy.shot(d)
+                break
+            except BoardException as e:
+                await player.send({"type": "error", "message": str(e)})
+
+        msg = {"cell": format_dot(d), "result": "hit" if hit else "miss"}
+        if hit and player.enemy.ship_at[d].lives == 0:
+            ship = player.enemy.ship_at[d]
+            near = ship_contour(player.enemy.size, ship)[0]
+            msg["result"] = "sunk"
+            msg["contour"] = sorted(format_dot(c) for c in near if c not in ship.dots)
+        return msg
+
+    @staticmethod
+    async def over(winner, loser, reason):
+        for player, win in ((winner, True), (loser, False)):
+            try:
+                await player.send({"type": "over", "win": win, "reason": reason})
+            except ConnectionError:
+                pass
+
+
+async def bot_client(host, port, mode="ai", rng=None):
+    """
+    Простой клиент-бот для проверки сервера: стреляет случайно по ещё
+    неизвестным клеткам, после попадания добивает корабль по соседним клеткам.
+
+    :param host: str Адрес сервера.
+    :param port: int Порт сервера.
+    :param mode: str Режим игры ("ai" или "pvp").
+    :param rng: random.Random Генератор случайных чисел.
+    :return: dict Последнее сообщение сервера ({"type": "over", ...}).
+    """
+
+    rng = rng if rng is not None else random.Random()
+    reader, writer = await asyncio.open_connection(host, port)
+    player = RemotePlayer(reader, writer)
+    try:
+        await player.send({"mode": mode})
+        size = None
+        unknown = targets = None
+        while True:
+            msg = await player.receive()
+            kind = msg.get("type")
+
+            if kind == "start":
+                size = msg["size"]
+                unknown = [d for row in dot_table(size) for d in row]
+                targets = []
+            elif kind == "turn":
+                while targets and targets[-1] not in unknown:
+                    targets.pop()
+                d = targets.pop() if targets else rng.choice(unknown)
+                await player.send({"move": format_dot(d)})
+            elif kind == "shot":
+                d = parse_move(msg["cell"])[0]
+                unknown.remove(d)
+                if msg["result"] == "hit":
+                    targets += [Dot(d.x + dx, d.y + dy) for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))]
+                for c in msg.get("contour", ()):
+                    c = parse_move(c)[0]
+                    if c in unknown:
+                        unknown.remove(c)
+            elif kind == "over":
+                return msg
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, **kwargs):
+    """
+    Запускает сервер SeaBattleServer и обслуживает клиентов до остановки.
+
+    :param host: str Адрес сервера.
+    :param port: int Порт сервера.
+    :param kwargs: Остальные параметры SeaBattleServer.
+    """
+
+    server = SeaBattleServer(host, port, **kwargs)
+    async with await server.start():
+        await server.server.serve_forever()
@@ -0,0 +1,916 @@
+"""
+Стратегии компьютера, которым нужны numpy, перебор расстановок или точный
+решатель: DensityStrategy, MonteCarloStrategy, OptimalStrategy (Solver).
+Простые стратегии (RandomStrategy, HuntTargetStrategy, ParityStrategy)
+остаются в Sea_Battle вместе с классом AI.
+"""
+
+import random
+import time
+from collections import Counter, OrderedDict
+
+import Sea_Battle
+from Sea_Battle import (
+    AI, Cell, HuntTargetStrategy, ParityStrategy, RandomStrategy, Strategy, bits, cell_slot_masks, dot_table,
+    nth_bit, ship_slots, slot_conflicts, slot_contours,
+)
+
+# numpy импортируется при первом использовании, как и в Sea_Battle (см. load_numpy()).
+np = None
+
+
+def load_numpy():
+    """
+    Импортирует numpy через Sea_Battle.load_numpy() и сохраняет модуль
+    в глобальной переменной np этого модуля.
+
+    :return: модуль numpy или None, если пакет не установлен.
+    """
+
+    global np
+    if np is None:
+        np = Sea_Battle.load_numpy()
+    return np
+
+
+# функция, которая считает префиксные суммы вдоль строк массива (с нулевым столбцом в начале).
+def prefix_sum(a):
+    c = np.zeros((a.shape[0], a.shape[1] + 1), dtype=np.int32)
+    np.cumsum(a, axis=1, out=c[:, 1:])
+    return c
+
+
+def placement_density(blocked, hits, lens):
+    """
+    Для каждой клетки считает, сколько допустимых расстановок оставшихся
+    кораблей её накрывают. Расстановка допустима, если не задевает
+    заблокированных клеток (промахи, уничтоженные корабли и их контуры).
+    Если есть попадания по подбитым кораблям, учитываются только расстановки,
+    проходящие через попадания, с весом по числу накрытых попаданий.
+
+    Суммы по окнам берутся из префиксных сумм, а вклад расстановок
+    в клетки накапливается в разностном массиве, поэтому на каждую длину
+    корабля приходится несколько векторных операций без циклов по клеткам.
+
+    :param blocked: numpy.ndarray bool Заблокированные клетки (size x size).
+    :param hits: numpy.ndarray bool Попадания по подбитым кораблям.
+    :param lens: list Длины оставшихся кораблей.
+    :return: numpy.ndarray int Количество расстановок для каждой клетки.
+    """
+
+    load_numpy()
+    size = blocked.shape[0]
+    target = hits.any()
+    score = np.zeros((size, size), dtype=np.int32)
+
+    for b, h, axis_t in ((blocked, hits, False), (blocked.T, hits.T, True)):
+        cb = prefix_sum(b)
+        ch = prefix_sum(h) if target else None
+        diff = np.zeros((size, size + 1), dtype=np.int32)
+
+        for len_, k in Counter(lens).items():
+            # однопалубный корабль в обоих направлениях - одна и та же расстановка.
+            if len_ > size or len_ == 1 and axis_t:
+                continue
+            weight = (cb[:, len_:] == cb[:, :-len_]) * k
+            if target:
+                weight *= ch[:, len_:] - ch[:, :-len_]
+            # расстановка с началом в j добавляет вес клеткам j ... j + len_ - 1.
+            n = size - len_ + 1
+            diff[:, :n] += weight
+            diff[:, len_:] -= weight
+
+        cover = np.cumsum(diff[:, :size], axis=1)
+        score += cover.T if axis_t else cover
+
+    return score
+
+
+class DensityStrategy(Strategy):
+    """
+    Стратегия выстрела в клетку, накрываемую наибольшим количеством
+    допустимых расстановок оставшихся кораблей (см. placement_density()).
+    Для подсчёта используется numpy.
+
+    Methods
+    -------
+    observe()
+        Собирает известную информацию о поле противника в массивы numpy.
+
+    """
+
+    def __init__(self):
+        if load_numpy() is None:
+            raise ImportError("Для DensityStrategy требуется пакет numpy")
+
+    @staticmethod
+    def observe(enemy):
+        """
+        Собирает известную информацию о поле противника.
+
+        :param enemy: класс Board Игровая доска - поле противника.
+        :return: tuple(blocked, hits) массивы bool размера size x size:
+                 заблокированные клетки (вместе с диагональными соседями
+                 попаданий) и попадания по подбитым кораблям.
+        """
+
+        size = enemy.size
+        blocked = np.zeros((size, size), dtype=bool)
+        hits = np.zeros((size, size), dtype=bool)
+
+        busy = enemy.busy
+        if busy:
+            blocked[[d.x for d in busy], [d.y for d in busy]] = True
+
+        wounded = [d for dots in enemy.wounded.values() for d in dots]
+        if wounded:
+            xs, ys = [d.x for d in wounded], [d.y for d in wounded]
+            hits[xs, ys] = True
+            # корабли прямые и не касаются друг друга, поэтому клетки по диагонали
+            # от попадания пустые.
+            near = np.zeros((size + 2, size + 2), dtype=bool)
+            for dx in (0, 2):
+                for dy in (0, 2):
+                    near[dx:dx + size, dy:dy + size] |= hits
+            blocked |= near[1:-1, 1:-1]
+            blocked[xs, ys] = False
+
+        return blocked, hits
+
+    def choose(self, enemy, rng):
+        """
+        Выбирает точку с максимальным количеством допустимых расстановок,
+        при равенстве - случайную из лучших.
+        """
+
+        blocked, hits = self.observe(enemy)
+        lens = [ship.len_ for ship in enemy.ships if ship.lives]
+
+        score = placement_density(blocked, hits, lens)
+        if hits.any() and not score.any():
+            score = placement_density(blocked, np.zeros_like(hits), lens)
+
+        score[blocked | hits] = -1
+        best = np.flatnonzero(score == score.max())
+        i = int(rng.choice(best))
+
+        return dot_table(enemy.size)[i // enemy.size][i % enemy.size]
+
+
+def sample_occupancy(size, blocked, hits, lens, budget=0.005, samples=None, seed=None):
+    """
+    Строит случайные расстановки оставшихся кораблей, согласованные
+    с известной информацией о поле, и считает, сколько раз каждая клетка
+    оказалась занята кораблём. Расстановка согласована, если не задевает
+    заблокированных клеток и накрывает все попадания по подбитым кораблям,
+    причём ни один корабль не состоит из одних попаданий (иначе он был бы
+    уже уничтожен).
+
+    Сначала корабли ставятся так, чтобы накрыть попадания, затем остальные
+    расставляются как в place_fleet(). Расстановки, зашедшие в тупик,
+    отбрасываются. Функция не зависит от объектов доски и может выполняться
+    в другом процессе.
+
+    :param size: int Размер игрового поля.
+    :param blocked: list[int] Индексы заблокированных клеток (x * size + y).
+    :param hits: list[int] Индексы попаданий по подбитым кораблям.
+    :param lens: list Длины оставшихся кораблей.
+    :param budget: float Время на построение расстановок в секундах.
+    :param samples: int Количество расстановок; если задано, budget не используется.
+    :param seed: Зерно генератора случайных чисел.
+    :return: tuple(counts, n) - список занятости клеток и количество расстановок.
+    """
+
+    rng = random.Random(seed)
+    lens = sorted(lens, reverse=True)
+    kinds = set(lens)
+    slots = {len_: ship_slots(size, len_)[0] for len_ in kinds}
+    cells = {len_: cell_slot_masks(size, len_) for len_ in kinds}
+    conflicts = {len_: [(other, slot_conflicts(size, len_, other)) for other in kinds] for len_ in kinds}
+    hit_set = set(hits)
+
+    start = {}
+    for len_ in kinds:
+        mask = (1 << len(slots[len_])) - 1
+        for i in blocked:
+            mask &= ~cells[len_][i]
+        start[len_] = mask
+
+    counts = [0] * (size * size)
+    n = 0
+    deadline = time.perf_counter() + budget
+    while (n < samples) if samples is not None else (time.perf_counter() < deadline):
+        free = dict(start)
+        left = list(lens)
+        uncovered = set(hits)
+        layout = []
+
+        while uncovered:
+            h = min(uncovered)
+            options = [(len_, free[len_] & cells[len_][h]) for len_ in set(left)]
+            total = sum(left.count(len_) * mask.bit_count() for len_, mask in options)
+            if not total:
+                break
+            r = rng.randrange(total)
+            for len_, mask in options:
+                weight = left.count(len_) * mask.bit_count()
+                if r < weight:
+                    break
+                r -= weight
+            i = nth_bit(mask, r % mask.bit_count())
+            dots = [d.x * size + d.y for d in slots[len_][i][2]]
+            if hit_set.issuperset(dots):
+                break
+            uncovered.difference_update(dots)
+            layout.append(dots)
+            left.remove(len_)
+            for other, masks in conflicts[len_]:
+                free[other] &= ~masks[i]
+
+        if uncovered:
+            continue
+
+        for len_ in left:
+            mask = free[len_]
+            if not mask:
+                break
+            i = nth_bit(mask, rng.randrange(mask.bit_count()))
+            layout.append([d.x * size + d.y for d in slots[len_][i][2]])
+            for other, masks in conflicts[len_]:
+                free[other] &= ~masks[i]
+        else:
+            n += 1
+            for dots in layout:
+                for c in dots:
+                    counts[c] += 1
+
+    return counts, n
+
+
+class MonteCarloStrategy(Strategy):
+    """
+    Стратегия выстрела в клетку, которая чаще всего занята кораблём
+    в случайных расстановках, согласованных с известной информацией о поле
+    противника (см. sample_occupancy()). В отличие от DensityStrategy
+    учитываются взаимные ограничения кораблей: расстановка строится
+    для всего оставшегося флота сразу. Если ни одной согласованной
+    расстановки за отведённое время не найдено, выстрел выбирается как
+    в HuntTargetStrategy.
+
+    Attributes
+    ----------
+    budget : float
+        Время на выбор одного выстрела в секундах.
+
+    samples : int
+        Количество расстановок на один выстрел; если задано, вместо budget
+        используется оно (результат воспроизводим при одинаковом rng).
+
+    workers : int
+        Количество процессов для построения расстановок; если не задано,
+        расстановки строятся в текущем процессе.
+
+    Methods
+    -------
+    observe()
+        Собирает известную информацию о поле противника в списки индексов клеток.
+
+    close()
+        Останавливает процессы, если они были запущены.
+
+    """
+
+    def __init__(self, budget=0.005, samples=None, workers=None):
+        self.budget = budget
+        self.samples = samples
+        self.workers = workers
+        self.fallback = HuntTargetStrategy()
+        self._executor = None
+
+    def __getstate__(self):
+        # пул процессов не передаётся в другие процессы (например, в tournament()).
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    @staticmethod
+    def observe(enemy):
+        """
+        Собирает известную информацию о поле противника.
+
+        :param enemy: класс Board Игровая доска - поле противника.
+        :return: tuple(blocked, hits) списки индексов (x * size + y):
+                 заблокированные клетки и попадания по подбитым кораблям.
+        """
+
+        size = enemy.size
+        hits = [d.x * size + d.y for dots in enemy.wounded.values() for d in dots]
+        wounded = set(hits)
+        blocked = [i for i in (d.x * size + d.y for d in enemy.busy) if i not in wounded]
+        return blocked, hits
+
+    def occupancy(self, size, blocked, hits, lens, rng):
+        """
+        Строит расстановки в текущем процессе или параллельно в нескольких.
+
+        :return: tuple(counts, n) - см. sample_occupancy().
+        """
+
+        if not self.workers or self.workers < 2:
+            return sample_occupancy(size, blocked, hits, lens, self.budget, self.samples, rng.getrandbits(64))
+
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(self.workers)
+        part = None if self.samples is None else -(-self.samples // self.workers)
+        futures = [
+            self._executor.submit(sample_occupancy, size, blocked, hits, lens, self.budget, part, rng.getrandbits(64))
+            for _ in range(self.workers)
+        ]
+
+        counts, n = [0] * (size * size), 0
+        for future in futures:
+            part_counts, part_n = future.result()
+            counts = [a + b for a, b in zip(counts, part_counts)]
+            n += part_n
+        return counts, n
+
+    def choose(self, enemy, rng):
+        """
+        Выбирает самую часто занятую клетку среди тех, по которым ещё
+        не стреляли, при равенстве - случайную из лучших.
+        """
+
+        size = enemy.size
+        blocked, hits = self.observe(enemy)
+        lens = [ship.len_ for ship in enemy.ships if ship.lives]
+
+        counts, n = self.occupancy(size, blocked, hits, lens, rng)
+        if not n:
+            return self.fallback.choose(enemy, rng)
+
+        for i in blocked:
+            counts[i] = -1
+        for i in hits:
+            counts[i] = -1
+        top = max(counts)
+        i = rng.choice([i for i, c in enumerate(counts) if c == top])
+
+        return dot_table(size)[i // size][i % size]
+
+    def close(self):
+        """
+        Останавливает процессы, если они были запущены.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+# функция, которая собирает маску из номеров битов (быстрее, чем | по одному биту для длинных масок).
+def index_mask(indices, n):
+    buf = bytearray((n + 7) // 8)
+    for j in indices:
+        buf[j >> 3] |= 1 << (j & 7)
+    return int.from_bytes(buf, "little")
+
+
+class Solver:
+    """
+    Точный решатель для маленьких полей: ожидаемое количество выстрелов
+    до уничтожения всего флота при оптимальной стрельбе, если расстановка
+    противника равновероятно выбрана из всех допустимых расстановок
+    (корабли не касаются друг друга, как в place_fleet()).
+
+    То, что видит стрелок (промахи, попадания, уничтоженные корабли и их
+    контуры по правилам Board.shot() и Board.contour(), маски контуров
+    берутся из slot_contours()), однозначно задаёт множество согласованных
+    расстановок - belief, битовую маску над списком всех расстановок.
+    Дальнейшая игра зависит только от belief и попаданий. Ключ состояния -
+    маски клеток (возможные клетки кораблей, попадания, уничтоженные
+    корабли): по ним belief восстанавливается однозначно, поэтому разные
+    порядки выстрелов, приводящие к одному состоянию, считаются один раз.
+
+    Значения состояний запоминаются в таблице с ограниченным числом записей
+    (при переполнении вытесняются давно не использованные), а ключ приводится
+    к каноническому виду по 8 симметриям квадрата: повёрнутые и отражённые
+    состояния тоже считаются один раз. Перебор выстрелов отсекается по нижней
+    оценке: каждая оставшаяся клетка кораблей требует выстрела.
+
+    Количество состояний растёт экспоненциально с числом расстановок,
+    поэтому решатель рассчитан на поля до 4 x 4 (флот [2, 1] - несколько
+    секунд). Уже на поле 5 x 5 один трёхпалубный корабль считается
+    десятки секунд, а один двухпалубный - больше 15 минут.
+
+    Attributes
+    ----------
+    size : int
+        Размер игрового поля.
+
+    lens : list
+        Длины кораблей флота.
+
+    layouts : int
+        Количество допустимых расстановок флота.
+
+    max_states : int
+        Наибольшее количество записей в таблице значений.
+
+    table : OrderedDict
+        Таблица значений: канонический ключ состояния -> ожидаемое
+        количество оставшихся выстрелов.
+
+    stats : Counter
+        Счётчики таблицы: lookups, hits, evictions.
+
+    Methods
+    -------
+    expected()
+        Ожидаемое количество выстрелов с начала партии.
+
+    value()
+        Ожидаемое количество оставшихся выстрелов в состоянии.
+
+    cost()
+        Ожидаемое количество выстрелов, если следующий выстрел - по клетке c.
+
+    belief()
+        Маска расстановок, согласованных с наблюдением.
+
+    best()
+        Лучшие клетки для выстрела по наблюдению.
+
+    """
+
+    def __init__(self, size, lens, max_states=1_000_000, max_layouts=200_000):
+        """
+        Перечисляет все допустимые расстановки флота.
+
+        :param size: int Размер игрового поля.
+        :param lens: list Длины кораблей флота.
+        :param max_states: int Наибольшее количество записей в таблице значений.
+        :param max_layouts: int Наибольшее количество расстановок; если их
+                            больше, вызывается исключение ValueError.
+        """
+
+        self.size = size
+        self.lens = sorted(lens, reverse=True)
+        self.total = sum(lens)
+        self.max_states = max_states
+        self.table = OrderedDict()
+        self.bounds = {}
+        self.orders = {}
+        self.stats = Counter()
+
+        # положения кораблей всех длин: маски клеток корабля и корабля с контуром.
+        ids = {}
+        self.slots = []
+        for len_ in sorted(set(self.lens), reverse=True):
+            ids[len_] = list(range(len(self.slots), len(self.slots) + len(ship_slots(size, len_)[0])))
+            self.slots.extend(slot_contours(size, len_))
+
+        members = [[] for _ in self.slots]
+        count = 0
+        lens = self.lens
+
+        def place(k, free, prev, chosen):
+            nonlocal count
+            if k == len(lens):
+                for sid in chosen:
+                    members[sid].append(count)
+                count += 1
+                if count > max_layouts:
+                    raise ValueError(f"Больше {max_layouts} расстановок флота {lens} на поле {size} x {size}")
+                return
+
+            len_ = lens[k]
+            mask = free[len_]
+            if k and lens[k - 1] == len_:
+                # одинаковые корабли перебираются по возрастанию номера положения.
+                mask &= ~((2 << prev) - 1)
+            for i in bits(mask):
+                rest = {other: free[other] & ~slot_conflicts(size, len_, other)[i] for other in free}
+                chosen.append(ids[len_][i])
+                place(k + 1, rest, i, chosen)
+                chosen.pop()
+
+        place(0, {len_: (1 << len(ids[len_])) - 1 for len_ in ids}, -1, [])
+
+        self.layouts = count
+        self.all = (1 << count) - 1
+        self.members = [index_mask(m, count) for m in members]
+
+        # клетки кораблей каждой расстановки: по ним scan() считает занятость,
+        # когда согласованных расстановок меньше, чем клеток поля.
+        self.cells = [[] for _ in range(count)]
+        for sid, layouts in enumerate(members):
+            ship_cells = list(bits(self.slots[sid][0]))
+            for i in layouts:
+                self.cells[i].extend(ship_cells)
+
+        self.by_cell = [[] for _ in range(size * size)]
+        self.occ = [0] * (size * size)
+        for sid, (ship, near) in enumerate(self.slots):
+            if self.members[sid]:
+                for c in bits(ship):
+                    self.by_cell[c].append(sid)
+                    self.occ[c] |= self.members[sid]
+
+        # симметрии квадрата (кроме тождественной) в виде таблиц по байтам маски клеток:
+        # perm[i][b] - образ байта b с номером i.
+        n = size - 1
+        maps = (
+            lambda x, y: (y, x), lambda x, y: (n - x, y), lambda x, y: (x, n - y),
+            lambda x, y: (n - x, n - y), lambda x, y: (y, n - x), lambda x, y: (n - y, x),
+            lambda x, y: (n - y, n - x),
+        )
+        self.symmetries = []
+        self.cell_maps = []
+        for f in maps:
+            cells = [fx * size + fy for fx, fy in (f(x, y) for x in range(size) for y in range(size))]
+            self.cell_maps.append(cells)
+            self.symmetries.append([
+                [sum(1 << cells[i * 8 + j] for j in range(8) if b >> j & 1 and i * 8 + j < len(cells)) for b in range(256)]
+                for i in range((len(cells) + 7) // 8)
+            ])
+
+    def transform(self, perm, mask):
+        """
+        Маска клеток после симметрии perm (таблицы по байтам маски из self.symmetries).
+        """
+
+        res = 0
+        i = 0
+        while mask:
+            res |= perm[i][mask & 255]
+            mask >>= 8
+            i += 1
+        return res
+
+    def canonical(self, *masks):
+        """
+        Канонический ключ состояния: наименьший из ключей всех симметричных
+        состояний, и симметрии, переводящие состояние в себя.
+
+        :param masks: Маски клеток, задающие состояние.
+        :return: tuple(key, same) - ключ и номера симметрий в self.symmetries.
+        """
+
+        best = masks
+        same = []
+        first = masks[0]
+        for s, perm in enumerate(self.symmetries):
+            # ключи сравниваются по первой маске, остальные нужны только при равенстве.
+            head = self.transform(perm, first)
+            if head > best[0] and head != first:
+                continue
+            key = (head,) + tuple(self.transform(perm, mask) for mask in masks[1:])
+            if key < best:
+                best = key
+            elif key == masks:
+                same.append(s)
+        return best, same
+
+    def scan(self, belief, hit):
+        """
+        Считает для каждой клетки без попадания количество согласованных
+        расстановок, в которых она занята кораблём.
+
+        :return: tuple(cells, union) - список пар (k, c), самые вероятные
+                 попадания первыми, и маска клеток, занятых хотя бы в одной
+                 расстановке. Если какая-то клетка занята во всех расстановках,
+                 выстрел по ней не хуже любого другого, и в списке остаётся
+                 только она.
+        """
+
+        n = belief.bit_count()
+        cells = []
+        union = hit
+        certain = None
+        if n * self.total < len(self.occ):
+            counts = {}
+            for i in bits(belief):
+                for c in self.cells[i]:
+                    counts[c] = counts.get(c, 0) + 1
+            occupied = counts.items()
+        else:
+            occupied = ((c, (belief & occ).bit_count()) for c, occ in enumerate(self.occ))
+        for c, k in occupied:
+            if not k or hit >> c & 1:
+                continue
+            union |= 1 << c
+            if k == n:
+                certain = c
+            cells.append((k, c))
+        if certain is not None:
+            cells = [(n, certain)]
+        else:
+            cells.sort(reverse=True)
+        return cells, union
+
+    def outcomes(self, c, belief, hit, sunk):
+        """
+        Исходы выстрела по клетке c: промах, ранение (корабль не уточняется)
+        и уничтожение каждого из возможных кораблей (контур показывает,
+        какого именно).
+
+        :return: list[(count, belief, hit, sunk)] - количество расстановок
+                 исхода и состояние после него.
+        """
+
+        bit = 1 << c
+        res = []
+        miss = belief & ~self.occ[c]
+        if miss:
+            res.append((miss.bit_count(), miss, hit, sunk))
+
+        wounded = 0
+        for sid in self.by_cell[c]:
+            part = belief & self.members[sid]
+            if not part:
+                continue
+            ship = self.slots[sid][0]
+            if ship & ~bit & ~hit:
+                wounded |= part
+            else:
+                res.append((part.bit_count(), part, hit | bit, sunk | ship))
+        if wounded:
+            res.append((wounded.bit_count(), wounded, hit | bit, sunk))
+        return res
+
+    def estimate(self, outcomes, n):
+        """
+        Нижняя оценка выстрела по исходам: выстрел плюс оценки bound() исходов.
+
+        :return: tuple(low, lows) - оценка выстрела и оценки исходов.
+        """
+
+        lows = [self.bound(b, h) for count, b, h, s in outcomes]
+        return 1.0 + sum(count * low for (count, b, h, s), low in zip(outcomes, lows)) / n, lows
+
+    def expand(self, outcomes, lows, n, low, bound=float("inf")):
+        """
+        Уточняет нижнюю оценку low выстрела, считая исходы по очереди.
+        Каждый исход считается с собственной границей: насколько его значение
+        может превысить свою оценку, пока оценка выстрела остаётся меньше bound.
+
+        :return: float Точное значение, если оно меньше bound, иначе нижняя
+                 оценка не меньше bound.
+        """
+
+        cost = low
+        for (count, b, h, s), low in zip(outcomes, lows):
+            p = count / n
+            cost += p * (self.value(b, h, s, low + (bound - cost) / p) - low)
+            if cost >= bound:
+                return cost
+        return cost
+
+    def cost(self, c, belief, hit, sunk, bound=float("inf")):
+        """
+        Ожидаемое количество выстрелов, если следующий выстрел - по клетке c.
+        Подсчёт прекращается, как только нижняя оценка достигает bound.
+
+        :return: float Точное значение, если оно меньше bound, иначе нижняя
+                 оценка не меньше bound.
+        """
+
+        n = belief.bit_count()
+        outcomes = self.outcomes(c, belief, hit, sunk)
+        low, lows = self.estimate(outcomes, n)
+        if low >= bound:
+            return low
+        return self.expand(outcomes, lows, n, low, bound)
+
+    def value(self, belief, hit, sunk, bound=float("inf")):
+        """
+        Ожидаемое количество оставшихся выстрелов при оптимальной стрельбе.
+        Клетки перебираются по возрастанию нижней оценки выстрела. Если
+        значение не меньше bound, перебор прекращается и возвращается
+        нижняя оценка не меньше bound; она запоминается вместе с оценками
+        bound() и ускоряет следующие проверки этого состояния.
+
+        :param belief: int Маска согласованных расстановок.
+        :param hit: int Маска попаданий.
+        :param sunk: int Маска клеток уничтоженных кораблей.
+        :param bound: float Граница перебора.
+        :return: float
+        """
+
+        left = self.total - hit.bit_count()
+        if not left:
+            return 0.0
+        if belief & (belief - 1) == 0:
+            # расстановка известна: остаётся добить её клетки.
+            return float(left)
+
+        self.stats["lookups"] += 1
+        table = self.table
+        # состояние ищется сначала как есть (belief, hit) и только потом в каноническом виде.
+        raw = (belief, hit)
+        value = table.get(raw)
+        if value is None:
+            low = self.bounds.get(raw, 0.0)
+            if low >= bound:
+                self.stats["cutoffs"] += 1
+                return low
+            entry = self.orders.get(raw)
+            if entry is None:
+                cells, union = self.scan(belief, hit)
+                key, same = self.canonical(union, hit, sunk)
+            else:
+                key, order = entry
+            value = table.get(key)
+            if value is not None:
+                self.store(raw, value)
+        if value is not None:
+            self.stats["hits"] += 1
+            table.move_to_end(raw)
+            return value
+
+        n = belief.bit_count()
+        if entry is None:
+            order = []
+            for k, c in cells:
+                # из клеток, которые симметрии состояния переводят друг в друга, считается одна.
+                if any(self.cell_maps[s][c] < c for s in same):
+                    continue
+                order.append((self.estimate(self.outcomes(c, belief, hit, sunk), n)[0], -k, c))
+            order.sort()
+            if len(self.orders) >= self.max_states:
+                self.orders.clear()
+            self.orders[raw] = key, order
+
+        best = float("inf")
+        for i, (low, k, c) in enumerate(order):
+            limit = min(best, bound)
+            if low >= limit:
+                best = min(best, low)
+                break
+            # оценки исходов могли вырасти после прошлых проверок состояния.
+            outcomes = self.outcomes(c, belief, hit, sunk)
+            low, lows = self.estimate(outcomes, n)
+            if low < limit:
+                low = self.expand(outcomes, lows, n, low, limit)
+            # уточнённая оценка клетки пригодится при следующей проверке состояния.
+            order[i] = (low, k, c)
+            best = min(best, low)
+        order.sort()
+
+        if best >= bound:
+            if len(self.bounds) >= self.max_states:
+                self.bounds.clear()
+            self.bounds[raw] = max(best, self.bounds.get(raw, 0.0))
+            return best
+        self.store(key, best)
+        self.store(raw, best)
+        return best
+
+    def bound(self, belief, hit):
+        """
+        Нижняя оценка ожидаемого количества оставшихся выстрелов. До первого
+        попадания стрелок видит только промахи, и его выстрелы заранее
+        известны; t выстрелов попадают не чаще, чем в сумме t самых
+        занятых клеток, поэтому промахов в среднем не меньше суммы
+        1 - S_t / n по t, где S_t - сумма t наибольших занятостей клеток.
+        """
+
+        key = (belief, hit)
+        low = self.bounds.get(key)
+        if low is None:
+            left = self.total - hit.bit_count()
+            n = belief.bit_count()
+            low = float(left)
+            if belief & (belief - 1):
+                # попадания заняты во всех расстановках и стоят в начале списка занятостей.
+                counts = sorted([(belief & occ).bit_count() for occ in self.occ], reverse=True)
+                covered = 0
+                for k in counts[hit.bit_count():]:
+                    covered += k
+                    if covered >= n:
+                        break
+                    low += 1.0 - covered / n
+            if len(self.bounds) >= self.max_states:
+                self.bounds.clear()
+            self.bounds[key] = low
+        return low
+
+    def store(self, key, value):
+        """
+        Записывает значение в таблицу, вытесняя самую давно использованную запись.
+        """
+
+        self.table[key] = value
+        if len(self.table) > self.max_states:
+            self.table.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def expected(self):
+        """
+        :return: float Ожидаемое количество выстрелов с начала партии.
+        """
+
+        return self.value(self.all, 0, 0)
+
+    def belief(self, shot, hit, sunk_ships):
+        """
+        Маска расстановок, согласованных с наблюдением: промахи не заняты,
+        попадания заняты, уничтоженные корабли стоят на своих местах,
+        а других полностью подбитых кораблей нет.
+
+        :param shot: int Маска обстрелянных клеток.
+        :param hit: int Маска попаданий.
+        :param sunk_ships: list Маски клеток уничтоженных кораблей.
+        :return: int
+        """
+
+        belief = self.all
+        for c in bits(shot & ~hit):
+            belief &= ~self.occ[c]
+        for c in bits(hit):
+            belief &= self.occ[c]
+        sunk = set(sunk_ships)
+        for sid, (ship, near) in enumerate(self.slots):
+            if not ship & ~hit:
+                belief &= self.members[sid] if ship in sunk else ~self.members[sid]
+        return belief
+
+    def best(self, shot, hit, sunk_ships):
+        """
+        Лучшие клетки для выстрела по наблюдению.
+
+        :return: tuple(list, float) - номера лучших клеток и ожидаемое
+                 количество оставшихся выстрелов.
+        """
+
+        belief = self.belief(shot, hit, sunk_ships)
+        if not belief:
+            raise ValueError("Наблюдение не согласуется ни с одной расстановкой флота")
+
+        sunk = sum(sunk_ships)
+        top = self.value(belief, hit, sunk)
+        # клетки хуже лучшей отсекаются по границе, не досчитываясь до конца.
+        cells = [c for k, c in self.scan(belief, hit)[0] if self.cost(c, belief, hit, sunk, top + 1e-9) - top < 1e-9]
+        return cells, top
+
+
+class OptimalStrategy(Strategy):
+    """
+    Стратегия оптимальной стрельбы по решателю Solver. Подходит только
+    для полей до 4 x 4: решатель перебирает все расстановки флота.
+    Решатели создаются при первом ходе для каждой пары (размер поля,
+    состав флота) и хранят таблицы значений между партиями.
+    """
+
+    def __init__(self, max_states=1_000_000):
+        self.max_states = max_states
+        self.solvers = {}
+
+    def solver(self, enemy):
+        """
+        :param enemy: класс Board Игровая доска - поле противника.
+        :return: Solver для поля и флота противника.
+        """
+
+        key = (enemy.size, tuple(sorted((ship.len_ for ship in enemy.ships), reverse=True)))
+        if key not in self.solvers:
+            self.solvers[key] = Solver(key[0], key[1], self.max_states)
+        return self.solvers[key]
+
+    def choose(self, enemy, rng):
+        size = enemy.size
+        shot = hit = 0
+        for i, c in enumerate(enemy.cells):
+            if c == Cell.miss:
+                shot |= 1 << i
+            elif c == Cell.hit:
+                shot |= 1 << i
+                hit |= 1 << i
+        sunk = [sum(1 << d.x * size + d.y for d in ship.dots) for ship in enemy.ships if not ship.lives]
+
+        cells, value = self.solver(enemy).best(shot, hit, sunk)
+        i = rng.choice(cells)
+        return dot_table(size)[i // size][i % size]
+
+
+class DensityAI(AI):
+    """
+    Класс игрока - компьютера со стратегией DensityStrategy.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, board, enemy, rng=None):
+        super().__init__(board, enemy, DensityStrategy(), rng)
+
+
+# Стратегии компьютера, доступные из командной строки.
+STRATEGIES = {
+    "random": RandomStrategy,
+    "hunt": HuntTargetStrategy,
+    "parity": ParityStrategy,
+    "density": DensityStrategy,
+    "montecarlo": MonteCarloStrategy,
+    "optimal": OptimalStrategy,
+}
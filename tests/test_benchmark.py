@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import pytest
+
+import Sea_Battle as sb
+from benchmark import benchmarks
+
+
+def options(only=None):
+    return SimpleNamespace(seed=0, fleet=None, repeat=2, number=5, only=only)
+
+
+def test_only_skips_setup(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("setup of a filtered-out benchmark")
+
+    monkeypatch.setattr(sb, "LayoutPool", fail)
+    monkeypatch.setattr(sb, "Game", fail)
+    names = [name for name, params, fn, measure in benchmarks(sb.Board, 10, options(["ship_dots"]))]
+    assert "ship_dots" in names and "pool_board" not in names and "aim" not in names
+
+
+@pytest.mark.parametrize("board_cls", [sb.Board, sb.BitBoard])
+def test_fixtures_do_not_depend_on_only(board_cls):
+    def aims(only):
+        return [params for name, params, fn, measure in benchmarks(board_cls, 10, options(only)) if name == "aim"]
+
+    assert aims(["aim"]) == aims(None)
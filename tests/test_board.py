@@ -0,0 +1,135 @@
+import pickle
+import random
+
+import pytest
+
+import Sea_Battle as sb
+
+BOARDS = (sb.Board, sb.BitBoard)
+
+
+def random_game(board_cls, seed, size=10, lens=None):
+    return sb.Game(size=size, quiet=True, board_cls=board_cls, rng=random.Random(seed), lens=lens)
+
+
+def shoot(board, d):
+    count = board.count
+    hit = board.shot(d)
+    return sb.Shot.sunk if board.count != count else sb.Shot.hit if hit else sb.Shot.miss
+
+
+def test_dot_is_interned_and_immutable():
+    assert sb.Dot(3, 4) is sb.Dot(3, 4)
+    assert sb.Dot(3, 4) == sb.Dot(3, 4) and hash(sb.Dot(3, 4)) == hash(sb.Dot(3, 4))
+    assert sb.dot_table(5)[2][3] is sb.Dot(2, 3)
+    with pytest.raises(AttributeError):
+        sb.Dot(1, 1).x = 2
+    assert pickle.loads(pickle.dumps(sb.Dot(7, 8))) is sb.Dot(7, 8)
+
+
+def test_ship_dots_and_index():
+    ship = sb.Ship(sb.Dot(2, 3), 3, 0)
+    assert ship.dots is ship.dots
+    assert len(ship.dots) == 3 and ship.dots[0] == sb.Dot(2, 3)
+
+    board = sb.Board(quiet=True)
+    board.add_ship(ship)
+    assert all(board.ship_at[d] is ship for d in ship.dots)
+    with pytest.raises(sb.BoardWrongShipException):
+        board.add_ship(sb.Ship(sb.Dot(1, 3), 1, 0))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_board_and_bitboard_agree(seed):
+    boards = [random_game(cls, seed).us.board for cls in BOARDS]
+    cells = [d for row in sb.dot_table(10) for d in row]
+    random.Random(seed).shuffle(cells)
+    for d in cells:
+        results = []
+        for board in boards:
+            try:
+                results.append(shoot(board, d))
+            except sb.BoardException:
+                results.append("busy")
+        assert results[0] == results[1]
+        assert bytes(boards[0].cells) == bytes(boards[1].cells)
+        assert set(boards[0].busy) == set(boards[1].busy)
+        assert set(boards[0].not_aim()) == set(boards[1].not_aim())
+        assert boards[0].count == boards[1].count
+    assert all(board.defeat() for board in boards)
+
+
+@pytest.mark.parametrize("board_cls", BOARDS)
+def test_shot_errors(board_cls):
+    board = random_game(board_cls, 0).us.board
+    with pytest.raises(sb.BoardOutException):
+        board.shot(sb.Dot(10, 0))
+    board.shot(sb.Dot(0, 0))
+    with pytest.raises(sb.BoardException):
+        board.shot(sb.Dot(0, 0))
+
+
+@pytest.mark.parametrize("board_cls", BOARDS)
+def test_snapshot_restore(board_cls):
+    board = random_game(board_cls, 1).us.board
+    rng = random.Random(1)
+    for _ in range(15):
+        board.shot(rng.choice(board.not_aim()))
+    snap = board.snapshot()
+    state = (bytes(board.cells), set(board.busy), board.count, list(board.aim()), bytes(board.observe()))
+    while not board.defeat():
+        board.shot(rng.choice(board.not_aim()))
+    board.restore(snap)
+    assert (bytes(board.cells), set(board.busy), board.count, list(board.aim()), bytes(board.observe())) == state
+
+
+def test_contour_tables():
+    size = 7
+    for len_ in (1, 2, 3):
+        for ori in range(4):
+            for bow in (d for row in sb.dot_table(size) for d in row):
+                ship = sb.Ship(bow, len_, ori)
+                if any(not 0 <= d.x < size or not 0 <= d.y < size for d in ship.dots):
+                    continue
+                near = {
+                    sb.Dot(d.x + dx, d.y + dy)
+                    for d in ship.dots for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                    if 0 <= d.x + dx < size and 0 <= d.y + dy < size
+                }
+                assert set(sb.ship_contour(size, ship)[0]) == near
+
+
+@pytest.mark.parametrize("size, lens", [(10, sb.FLEET), (7, [3, 2, 2, 1, 1]), (16, [5, 4, 3, 3, 2])])
+def test_place_fleet_is_valid(size, lens):
+    rng = random.Random(0)
+    for _ in range(20):
+        ships = sb.place_fleet(size, lens, rng)
+        if ships is None:
+            continue
+        board = sb.Board(size=size, quiet=True)
+        for ship in ships:
+            board.add_ship(ship)
+        assert sorted(ship.len_ for ship in ships) == sorted(lens)
+
+
+def test_slots():
+    board = random_game(sb.Board, 0).us.board
+    for obj in (board, random_game(sb.BitBoard, 0).us.board, board.ships[0], board.free):
+        with pytest.raises(AttributeError):
+            obj.extra = 1
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_aim_agrees_in_lockstep(seed):
+    # корабли длиной до 5, чтобы попадания на одной линии могли идти с пропусками.
+    lens = [5, 4, 3, 2, 1]
+    boards = [random_game(cls, seed, size=8, lens=lens).us.board for cls in BOARDS]
+    rng = random.Random(seed)
+    while not boards[0].defeat():
+        free = list(boards[0].not_aim())
+        targets = list(boards[0].aim())
+        d = rng.choice(targets if targets and rng.random() < 0.5 else free)
+        for board in boards:
+            shoot(board, d)
+        assert set(boards[0].aim()) == set(boards[1].aim())
+        assert set(boards[0].not_aim()) == set(boards[1].not_aim())
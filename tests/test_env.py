@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+import Sea_Battle as sb
+
+np = pytest.importorskip("numpy")
+
+from env import BatchGame, SeaBattleEnv, SeaBattleVecEnv  # noqa: E402
+
+
+def batch_boards(batch):
+    """
+    :return: list Доски Board с теми же расстановками, что и у batch.
+    """
+
+    size = batch.size
+    boards = []
+    for r in range(batch.n):
+        ships = []
+        for k, len_ in enumerate(batch.lens):
+            i = int(np.flatnonzero(batch.ship_cells[batch.slots[r, k]])[0])
+            ships.append(sb.Ship(sb.Dot(i // size, i % size), len_, 2 if batch.horiz[r, k] else 0))
+        board = sb.Board(size=size, quiet=True)
+        board.place(ships)
+        boards.append(board)
+    return boards
+
+
+@pytest.mark.parametrize("size, lens", [(10, None), (7, [3, 2, 2, 1, 1])])
+def test_batch_game_matches_board(size, lens):
+    batch = BatchGame(50, size, lens, seed=4)
+    boards = batch_boards(batch)
+    step = 0
+    while not batch.done.all():
+        targets, free = batch.targets(), batch.free()
+        for r in np.flatnonzero(~batch.done):
+            assert set(np.flatnonzero(free[r])) == {d.x * size + d.y for d in boards[r].not_aim()}
+            assert set(np.flatnonzero(targets[r])) == {d.x * size + d.y for d in boards[r].aim()}
+        shots = batch.choose("hunt" if step % 3 else "random")
+        active = np.flatnonzero(~batch.done)
+        results = batch.step(shots)
+        for r in active:
+            c = int(shots[r])
+            count = boards[r].count
+            hit = boards[r].shot(sb.Dot(c // size, c % size))
+            assert results[r] == (sb.Shot.sunk if boards[r].count != count else sb.Shot.hit if hit else sb.Shot.miss)
+            assert bytes(boards[r].cells) == batch.cells[r].tobytes()
+        step += 1
+    assert all(board.defeat() for board in boards)
+    assert list(batch.shots) == [len(board.shot_at) for board in boards]
+
+
+def test_batch_game_rejects_repeated_shot():
+    batch = BatchGame(5, 10, seed=1)
+    shots = batch.choose()
+    batch.step(shots)
+    with pytest.raises(sb.BoardOutException):
+        batch.step(shots)
+
+
+@pytest.mark.parametrize("cell", [-1, -100, 100, 1000])
+def test_batch_game_rejects_cells_off_board(cell):
+    batch = BatchGame(5, 10, seed=1)
+    shots = batch.choose()
+    shots[2] = cell
+    with pytest.raises(sb.BoardOutException):
+        batch.step(shots)
+    assert (batch.shots == 0).all() and (batch.cells <= sb.Cell.ship).all()
+
+
+def test_batch_game_rejects_wrong_shape():
+    batch = BatchGame(5, 10, seed=1)
+    with pytest.raises(ValueError):
+        batch.step(batch.choose()[:4])
+    with pytest.raises(ValueError):
+        batch.step(batch.choose().astype(float))
+
+
+@pytest.mark.parametrize("board_cls", [sb.Board, sb.BitBoard])
+def test_env_observation_is_board_view(board_cls):
+    env = SeaBattleEnv(10, board_cls=board_cls, seed=1)
+    rng = random.Random(0)
+    for _ in range(3):
+        obs, done, total = env.reset(), False, 0
+        while not done:
+            action = rng.choice(np.flatnonzero(obs.ravel() == sb.Seen.unknown))
+            obs, reward, done, info = env.step(int(action))
+            total += reward
+            assert obs.tobytes() == bytes(env.board.observe())
+        assert total == -info["shots"]
+
+
+def test_env_reset_places_fleet():
+    env = SeaBattleEnv(6, lens=[2, 1], seed=5)
+    layouts = set()
+    for _ in range(5):
+        env.reset()
+        layouts.add(tuple(sorted((d.x, d.y) for ship in env.board.ships for d in ship.dots)))
+    assert all(len(cells) == 3 for cells in layouts) and len(layouts) > 1
+    pool = sb.LayoutPool(6, [2, 1], capacity=10, seed=1)
+    env = SeaBattleEnv(6, lens=[2, 1], seed=5, pool=pool)
+    env.reset()
+    assert sorted(ship.len_ for ship in env.board.ships) == [1, 2]
+
+
+def test_vec_env_resets_finished():
+    env = SeaBattleVecEnv(8, size=6, lens=[2, 1], seed=3)
+    obs = env.reset()
+    rng = np.random.default_rng(0)
+    finished = 0
+    for _ in range(100):
+        keys = rng.random((8, 36))
+        keys[obs.reshape(8, -1) != sb.Seen.unknown] = -1
+        obs, rewards, dones, infos = env.step(keys.argmax(1))
+        finished += sum(dones)
+        for i in np.flatnonzero(dones):
+            assert (obs[i] == sb.Seen.unknown).all()
+            final = infos[i]["final_observation"]
+            assert (final == sb.Seen.sunk).sum() == 3
+            assert (final == sb.Seen.unknown).sum() + infos[i]["shots"] <= 36
+    assert finished > 0
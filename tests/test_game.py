@@ -0,0 +1,159 @@
+import random
+import subprocess
+import sys
+
+import pytest
+
+import Sea_Battle as sb
+
+
+def test_simulate_plays_full_games():
+    for result in sb.simulate(5):
+        assert result.winner in (0, 1)
+        assert len(result.sunk[result.winner]) == len(sb.FLEET)
+        assert result.sunk[result.winner][-1][1] == result.shots[result.winner]
+
+
+@pytest.mark.parametrize("board_cls", [sb.Board, sb.BitBoard])
+def test_seeded_games_repeat(board_cls):
+    first = [sb.seeded_game(7, i, board_cls=board_cls).shots for i in range(5)]
+    assert first == [sb.seeded_game(7, i, board_cls=board_cls).shots for i in range(5)]
+
+
+def test_tournament_does_not_depend_on_workers():
+    local = sb.tournament(8, seed=2, workers=1)
+    pooled = sb.tournament(8, seed=2, workers=2, chunk=3)
+    assert local.games == pooled.games == 8
+    assert local.wins == pooled.wins and local.shots == pooled.shots
+
+
+@pytest.mark.parametrize("strategy", [sb.RandomStrategy(), sb.HuntTargetStrategy(), sb.ParityStrategy()])
+def test_strategies_finish_games(strategy):
+    result = sb.seeded_game(1, 0, first=strategy)
+    assert result.winner in (0, 1)
+
+
+@pytest.mark.parametrize("size, lens", [(1, [1]), (5, [2, 1]), (26, [5, 4, 4, 3, 3, 2, 2, 1])])
+def test_board_sizes_and_fleets(size, lens):
+    game = sb.Game(size=size, quiet=True, lens=lens, rng=random.Random(0))
+    assert sorted(ship.len_ for ship in game.ai.board.ships) == sorted(lens)
+    assert game.simulate().winner in (0, 1)
+
+
+def test_impossible_fleet():
+    with pytest.raises(sb.BoardWrongShipException):
+        sb.Game(size=3, quiet=True, lens=[3, 3, 3])
+
+
+@pytest.mark.parametrize("size", [0, len(sb.L_R)])
+def test_bad_size(size):
+    with pytest.raises(ValueError, match="размер поля"):
+        sb.Game(size=size, quiet=True)
+
+
+@pytest.mark.parametrize("size, lens, ok", [
+    (5, [1] * 9, True), (5, [1] * 10, False), (8, [3] * 10, False),
+    (9, [4] * 8, True), (10, [2] * 20, True), (10, [1] * 26, False),
+])
+def test_fleet_layout_is_exact(size, lens, ok):
+    for rng in (None, random.Random(1)):
+        layout = sb.fleet_layout(size, lens, rng)
+        assert (layout is not None) == ok
+        if ok:
+            board = sb.Board(size=size, quiet=True)
+            for bow, len_, ori in layout:
+                board.add_ship(sb.Ship(bow, len_, ori))
+            assert sorted(ship.len_ for ship in board.ships) == sorted(lens)
+
+
+@pytest.mark.parametrize("size, lens", [(20, [1] * 101), (26, [1] * 170), (8, [3] * 9)])
+def test_fleet_bounds_reject_quickly(size, lens):
+    assert sb.fleet_layout(size, lens, budget=0) is None
+
+
+def test_fleet_search_budget():
+    with pytest.raises(sb.FleetSearchException):
+        sb.fleet_layout(20, [1] * 100, random.Random(1), budget=1000)
+
+
+def test_dense_fleet_is_shuffled():
+    layouts = set()
+    for seed in range(5):
+        game = sb.Game(size=12, quiet=True, lens=[1] * 36, rng=random.Random(seed))
+        board = game.ai.board
+        assert len(board.ships) == 36
+        layouts.add(frozenset(ship.bow for ship in board.ships))
+    assert len(layouts) > 1
+
+
+def test_dense_fleet_falls_back_to_search():
+    game = sb.Game(size=5, quiet=True, lens=[1] * 9, rng=random.Random(0))
+    for board in (game.us.board, game.ai.board):
+        assert len(board.ships) == 9
+
+
+def test_import_has_no_side_effects():
+    code = "import sys, Sea_Battle; print(sorted(m for m in ('numpy', 'asyncio', 'strategies') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=sb.__file__.rsplit("/", 1)[0]).stdout
+    assert out.strip() == "[]"
+
+
+def test_events_count_shots():
+    game = sb.Game(quiet=True, rng=random.Random(4))
+    events = game.attach()
+    sunk = []
+    events.on("on_sink", lambda board, d, ship: sunk.append(ship.len_))
+    result = game.simulate()
+    summary = events.summary()
+    assert summary["games"] == 1 and summary["shots"] == sum(result.shots)
+    assert len(sunk) == summary["sunk"] == len(result.sunk[0]) + len(result.sunk[1])
+
+
+def test_board_times_target_updates():
+    game = sb.Game(quiet=True, rng=random.Random(4))
+    events = game.attach()
+    game.simulate()
+    summary = events.summary()
+    timings = summary["timings"]
+    assert timings["aim"]["calls"] == summary["hits"]
+    assert timings["not_aim"]["calls"] == summary["shots"] + summary["sunk"]
+
+
+@pytest.mark.parametrize("board_cls", [sb.Board, sb.BitBoard])
+def test_save_load_round_trip(board_cls):
+    for seed in range(5):
+        game = sb.Game(quiet=True, board_cls=board_cls, rng=random.Random(seed))
+        player = sb.AI(game.us.board, game.ai.board, rng=random.Random(seed))
+        for _ in range(random.Random(seed).randrange(5, 60)):
+            if game.ai.board.defeat() or game.us.board.defeat():
+                break
+            if not (game.ai.board.shot(player.ask()) if game.turn == 0 else game.us.board.shot(game.ai.ask())):
+                game.turn ^= 1
+
+        data = game.save()
+        loaded = sb.Game.load(data, board_cls=board_cls, quiet=True)
+        assert len(data) < 1024 and loaded.turn == game.turn
+        assert loaded.save() == game.save()
+        for a, b in ((game.us.board, loaded.us.board), (game.ai.board, loaded.ai.board)):
+            assert bytes(a.cells) == bytes(b.cells)
+            assert a.shot_at == b.shot_at and a.blocked == b.blocked
+        if not game.us.board.defeat():
+            assert game.ai.ask() == loaded.ai.ask()
+
+
+def test_load_rejects_garbage():
+    with pytest.raises(ValueError):
+        sb.Game.load(b"not a saved game")
+
+
+def test_renderer_redraws_only_changes():
+    import io
+
+    out = io.StringIO()
+    game = sb.Game(quiet=True, rng=random.Random(0), renderer=sb.TerminalRenderer(out))
+    game.print_board()
+    full = len(out.getvalue())
+    game.ai.board.shot(sb.Dot(0, 0))
+    game.print_board()
+    assert 0 < len(out.getvalue()) - full < full // 10
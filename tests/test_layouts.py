@@ -0,0 +1,31 @@
+import pytest
+
+import Sea_Battle as sb
+
+
+@pytest.mark.parametrize("uniform", [True, False])
+def test_pool_boards_are_valid(uniform):
+    lens = [3, 2, 2, 1]
+    pool = sb.LayoutPool(7, lens, capacity=64, low=8, batch=32, uniform=uniform, seed=1)
+    for board_cls in (sb.Board, sb.BitBoard):
+        for _ in range(100):
+            board = pool.board(board_cls, True)
+            checked = sb.Board(size=7, quiet=True)
+            for ship in board.ships:
+                checked.add_ship(sb.Ship(ship.bow, ship.len_, ship.ori))
+            assert sorted(ship.len_ for ship in board.ships) == sorted(lens)
+    assert pool.stats["taken"] == 200
+
+
+def test_pool_is_uniform():
+    pool = sb.LayoutPool(4, [2, 1], capacity=20000, low=0, seed=3)
+    chi2, dof, z = pool.uniformity(20000)
+    assert abs(z) < 4
+
+
+def test_game_from_pool():
+    pool = sb.LayoutPool(10, capacity=16, low=4, seed=0)
+    game = sb.Game(quiet=True, pool=pool)
+    assert game.simulate().winner in (0, 1)
+    with pytest.raises(ValueError):
+        sb.Game(size=8, quiet=True, pool=pool)
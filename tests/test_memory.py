@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import pytest
+
+import Sea_Battle as sb
+from benchmark import game_memory, memory_budget
+
+
+@pytest.mark.parametrize("size", [10, 16, 26])
+@pytest.mark.parametrize("board_cls", [sb.Board, sb.BitBoard])
+def test_game_fits_memory_budget(board_cls, size):
+    res = game_memory(board_cls, size, SimpleNamespace(seed=0, fleet=None))
+    assert res["bytes_per_game"] <= memory_budget(board_cls, size)
+
+
+def test_miss_does_not_allocate_history():
+    board = sb.Board(size=10, quiet=True)
+    board.place([sb.Ship(sb.Dot(0, 0), 2, 2)])
+    board.shot(sb.Dot(5, 5))
+    board.shot(sb.Dot(0, 0))
+    board.shot(sb.Dot(1, 1))
+    plain, target = sb.miss_entries(10)
+    assert board.history[0] is plain[55]
+    assert board.history[2] is plain[11]
+    board.shot(sb.Dot(1, 0))
+    assert board.history[3] is target[10]
+    board.unmake()
+    assert sb.Dot(1, 0) in board.aim()
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import Sea_Battle as sb
+from records import ARCHIVE_GARBAGE, ARCHIVE_MAGIC, GameArchive, GameReader, GameWriter
+
+
+@pytest.mark.parametrize("board_cls", [sb.Board, sb.BitBoard])
+def test_writer_reader_round_trip(tmp_path, board_cls):
+    path = tmp_path / "games.sbr"
+    games = []
+    with GameWriter(path) as writer:
+        for seed in range(4):
+            game = sb.Game(quiet=True, board_cls=board_cls, rng=random.Random(seed))
+            ships = [[(s.bow, s.len_, s.ori) for s in b.ships] for b in (game.us.board, game.ai.board)]
+            games.append((ships, game.simulate(writer=writer)))
+
+    with GameReader(path) as reader:
+        records = list(reader)
+    assert len(records) == len(games)
+    for record, (ships, result) in zip(records, games):
+        assert record.winner == result.winner
+        for i in range(2):
+            assert [(s.bow, s.len_, s.ori) for s in record.ships(i)] == ships[i]
+        shots = list(record.replay(board_cls))
+        assert [sum(1 for i, _, _ in shots if i == k) for k in (1, 0)] == result.shots
+        assert record.boards[1 - result.winner].defeat()
+
+
+def test_archive_put_get_pop(tmp_path):
+    path = tmp_path / "games.sba"
+    saved = {}
+    with GameArchive(path) as archive:
+        for i in range(20):
+            game = sb.Game(quiet=True, rng=random.Random(i))
+            game.ai.board.shot(sb.Dot(i % 10, i // 10))
+            archive.put(f"g{i}", game)
+            saved[f"g{i}"] = game.save()
+        archive.put("g3", sb.Game(quiet=True, rng=random.Random(99)))
+        saved["g3"] = archive.get("g3").save()
+        assert archive.pop("g5").save() == saved.pop("g5")
+
+    with GameArchive(path) as archive:
+        assert len(archive) == len(saved) and "g5" not in archive
+        for key, data in saved.items():
+            assert archive.get(key, quiet=True).save() == data
+        with pytest.raises(KeyError):
+            archive.get("g5")
+
+
+def test_archive_compacts_rewrites(tmp_path):
+    path = tmp_path / "games.sba"
+    games = [sb.Game(quiet=True, rng=random.Random(i)) for i in range(1000)]
+    with GameArchive(path) as archive:
+        for _ in range(4):
+            for i, game in enumerate(games):
+                game.ai.board.shot(game.ai.board.not_aim()[0])
+                archive.put(f"g{i}", game)
+        for i in range(0, 1000, 2):
+            archive.pop(f"g{i}")
+        live = sum(archive.entry_size(key, length) for key, (_, length) in archive.index.items())
+        assert path.stat().st_size <= (live + len(ARCHIVE_MAGIC)) / (1 - ARCHIVE_GARBAGE)
+        saved = {key: archive.get(key).save() for key in archive.index}
+
+    with GameArchive(path) as archive:
+        assert len(archive) == 500 and "g0" not in archive
+        for key, data in saved.items():
+            assert archive.get(key).save() == data
+        archive.compact()
+        assert archive.garbage == 0
+        assert path.stat().st_size == live + len(ARCHIVE_MAGIC)
+        for key, data in saved.items():
+            assert archive.get(key).save() == data
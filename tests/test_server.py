@@ -0,0 +1,118 @@
+import asyncio
+import json
+import random
+
+from Sea_Battle import HuntTargetStrategy
+from server import SeaBattleServer, bot_client
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 30))
+
+
+async def with_server(fn, **kwargs):
+    server = SeaBattleServer(**kwargs)
+    await server.start()
+    try:
+        return await fn(server)
+    finally:
+        await server.close()
+
+
+def test_games_against_ai():
+    async def play(server):
+        results = await asyncio.gather(*(
+            bot_client(server.host, server.port, "ai", random.Random(i)) for i in range(20)
+        ))
+        return results, server
+
+    results, server = run(with_server(play, size=7, lens=[3, 2, 2, 1]))
+    assert all(msg["type"] == "over" and msg["reason"] == "fleet" for msg in results)
+    assert server.played == 20 and server.active == 0
+
+
+def test_pvp_game():
+    async def play(server):
+        return await asyncio.gather(
+            bot_client(server.host, server.port, "pvp", random.Random(1)),
+            bot_client(server.host, server.port, "pvp", random.Random(2)),
+        )
+
+    first, second = run(with_server(play, size=6, lens=[2, 1]))
+    assert first["reason"] == second["reason"] == "fleet"
+    assert first["win"] != second["win"]
+
+
+async def wait_free(server):
+    while server.waiting is not None:
+        await asyncio.sleep(0.01)
+
+
+def test_pvp_waiting_client_disconnects():
+    async def play(server):
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(b'{"mode": "pvp"}\n')
+        await writer.drain()
+        while server.waiting is None:
+            await asyncio.sleep(0.01)
+        writer.close()
+        await writer.wait_closed()
+        # место ожидания освобождается без подключения следующего клиента.
+        await asyncio.wait_for(wait_free(server), 5)
+        return await asyncio.gather(
+            bot_client(server.host, server.port, "pvp", random.Random(1)),
+            bot_client(server.host, server.port, "pvp", random.Random(2)),
+        )
+
+    first, second = run(with_server(play, size=6, lens=[2, 1]))
+    assert first["reason"] == second["reason"] == "fleet"
+    assert first["win"] != second["win"]
+
+
+def test_pvp_message_before_start_is_ignored():
+    async def play(server):
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(b'{"mode": "pvp"}\n{"type": "hello"}\n')
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        assert server.waiting is not None
+        second = asyncio.ensure_future(bot_client(server.host, server.port, "pvp", random.Random(2)))
+        start = json.loads(await reader.readline())
+        writer.close()
+        return start, await second
+
+    start, second = run(with_server(play, size=6, lens=[2, 1]))
+    assert start["type"] == "start"
+    assert second == {"type": "over", "win": True, "reason": "disconnect"}
+
+
+def test_oversized_line_ends_game():
+    async def play(server):
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(b'{"mode": "ai"}\n')
+        await reader.readline()
+        writer.write(b"x" * (1 << 17) + b"\n")
+        messages = [json.loads(line) for line in (await reader.read()).splitlines()]
+        writer.close()
+        await asyncio.sleep(0.05)
+        return messages, server
+
+    messages, server = run(with_server(play, size=6, lens=[2, 1]))
+    assert messages[-1] == {"type": "over", "win": False, "reason": "disconnect"}
+    assert server.active == 0 and server.played == 1
+
+
+def test_games_get_own_strategy():
+    created = []
+
+    def strategy():
+        created.append(HuntTargetStrategy())
+        return created[-1]
+
+    async def play(server):
+        return await asyncio.gather(*(
+            bot_client(server.host, server.port, "ai", random.Random(i)) for i in range(3)
+        ))
+
+    run(with_server(play, size=6, lens=[2, 1], strategy=strategy))
+    assert len(created) == 3 and len(set(map(id, created))) == 3
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+import Sea_Battle as sb
+from strategies import DensityStrategy, MonteCarloStrategy, OptimalStrategy, Solver, placement_density, sample_occupancy
+
+np = pytest.importorskip("numpy")
+
+
+def clear(strategy, seeds, size=10, lens=None):
+    """
+    :return: list Количество выстрелов strategy до уничтожения флота на досках с зёрнами seeds.
+    """
+
+    shots = []
+    for seed in seeds:
+        board = sb.Game(size=size, quiet=True, rng=random.Random(seed), lens=lens).ai.board
+        rng = random.Random(seed + 1)
+        while not board.defeat():
+            board.shot(strategy.choose(board, rng))
+        shots.append(len(board.shot_at))
+    return shots
+
+
+def test_density_finishes():
+    assert all(n <= 100 for n in clear(DensityStrategy(), range(3)))
+
+
+def test_monte_carlo_finishes():
+    assert all(n <= 100 for n in clear(MonteCarloStrategy(samples=50), range(2)))
+
+
+def test_sample_occupancy_respects_observation():
+    board = sb.Game(quiet=True, rng=random.Random(0)).ai.board
+    rng = random.Random(0)
+    while not board.wounded:
+        board.shot(rng.choice(board.not_aim()))
+    blocked, hits = MonteCarloStrategy.observe(board)
+    lens = [ship.len_ for ship in board.ships if ship.lives]
+    counts, n = sample_occupancy(10, blocked, hits, lens, samples=50, seed=1)
+    assert n == 50
+    assert all(counts[i] == 0 for i in blocked)
+    assert all(counts[i] == n for i in hits)
+
+
+def test_solver_tiny_board():
+    # одна клетка из четырёх: ожидание (1 + 2 + 3 + 4) / 4.
+    assert Solver(2, [1]).expected() == pytest.approx(2.5)
+    assert Solver(4, [3]).expected() == pytest.approx(5.625)
+    solver = Solver(4, [2, 1])
+    assert solver.expected() == pytest.approx(8.7391, abs=1e-4)
+
+
+def test_optimal_strategy_plays():
+    shots = clear(OptimalStrategy(), range(3), size=4, lens=[2, 1])
+    assert all(n <= 16 for n in shots)
+
+
+def test_density_beats_hunt_target():
+    seeds = range(100)
+    hunt = sum(clear(sb.HuntTargetStrategy(), seeds)) / len(seeds)
+    density = sum(clear(DensityStrategy(), seeds)) / len(seeds)
+    assert density <= hunt - 2
+
+
+def test_placement_density_counts_single_ships_once():
+    blocked = np.zeros((5, 5), dtype=bool)
+    score = placement_density(blocked, np.zeros_like(blocked), [1])
+    assert (score == 1).all()